@@ -0,0 +1,71 @@
+import argparse
+import random
+import sys
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.frame import Frame, Slot
+from knowledge_base.query import Condition, matches
+from knowledge_base import columns
+
+
+def build(instances: int, columnar: bool) -> KnowledgeBase:
+    kb = KnowledgeBase()
+    rng = random.Random(1)
+    if columnar:
+        kb.columnar('PRODUCE', 'WEIGHT')
+    frames = [Frame(Frame.CLASS, 'PRODUCE', set(), {})]
+    for i in range(instances):
+        frames.append(Frame(Frame.INSTANCE, f'ITEM{i}', {'PRODUCE'},
+                            {'WEIGHT': Slot(rng.randrange(1000), ['NUMBER'])}))
+    kb.add_frames(frames)
+    return kb
+
+
+def timed(function, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def decrement(kb: KnowledgeBase):
+    # what a per-frame rule does today: read, subtract, write back through the knowledge base
+    for frame in list(kb.extent('PRODUCE')):
+        if frame.type == Frame.INSTANCE:
+            kb.update_slot(frame.name, 'WEIGHT', frame.get_slot('WEIGHT').values[0] - 1)
+
+
+def report(label: str, rows: int, frame_time: float, column_time: float):
+    print(f'{label:<36} {rows:>8} rows  per frame {frame_time * 1000:>9.2f} ms'
+          f'  column {column_time * 1000:>9.2f} ms  {frame_time / column_time:>7.1f}x')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-frame vs columnar updates and range queries on a NUMBER slot')
+    parser.add_argument('--instances', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-numpy', action='store_true', help='measure the array fallback')
+    args = parser.parse_args(argv)
+    if args.no_numpy:
+        columns.numpy = None
+    print(f'numpy: {"no" if columns.numpy is None else columns.numpy.__version__}')
+
+    plain = build(args.instances, False)
+    columnar = build(args.instances, True)
+    _, frame_time = timed(lambda: decrement(plain), args.repeat)
+    _, column_time = timed(lambda: columnar.add_to_column('PRODUCE', 'WEIGHT', -1), args.repeat)
+    report('WEIGHT - 1 over PRODUCE', args.instances, frame_time, column_time)
+
+    for conditions in ([Condition('WEIGHT', '<', '100')], [Condition('WEIGHT', '>=', '990')]):
+        naive, frame_time = timed(lambda: [f for f in plain.extent('PRODUCE')
+                                           if f.type == Frame.INSTANCE and matches(f, conditions)], args.repeat)
+        planned, column_time = timed(lambda: list(columnar.instances_of('PRODUCE', conditions)), args.repeat)
+        assert {f.name for f in naive} == {f.name for f in planned}
+        report(f'INSTANCES OF PRODUCE WHERE {conditions[0]}', len(planned), frame_time, column_time)
+        for line in columnar.query('PRODUCE', conditions, Frame.INSTANCE).explain().split('\n'):
+            print(f'    {line}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import random
+
+from benchmarks.workload import PRELUDE
+
+
+class Shape:
+    # A synthetic FOOD knowledge base: a tree of classes below FOOD, depth levels deep with fanout
+    # subclasses per class, instances spread over its leaves, slots NUMBER-faceted slots on every class
+    # and a value for each on every instance, and a calendar ticked once a day for days days.
+    def __init__(self, depth: int = 3, fanout: int = 4, instances: int = 20000, slots: int = 4, days: int = 10,
+                 lifespan: int = 5, seed: int = 1):
+        self.depth = depth
+        self.fanout = fanout
+        self.instances = instances
+        self.slots = slots
+        self.days = days
+        self.lifespan = lifespan
+        self.seed = seed
+
+    def levels(self) -> [[str]]:
+        # class names by depth, each level fanout times the one above
+        levels = [['FOOD']]
+        for depth in range(1, self.depth + 1):
+            levels.append([f'C{depth}_{i}' for i in range(len(levels[-1]) * self.fanout)])
+        return levels
+
+    def parent(self, depth: int, i: int) -> str:
+        return 'FOOD' if depth == 1 else f'C{depth - 1}_{i // self.fanout}'
+
+    def leaves(self) -> [str]:
+        return self.levels()[-1]
+
+
+def setup(shape: Shape):
+    # the calendar, the FOOD class and every day the calendar will be ticked to
+    yield from PRELUDE
+    for day in range(1, shape.days + 1):
+        yield f'tell add instance day_{day} {{day}} []'
+        yield f'tell update day_{day} update slot number:{day}'
+
+
+def classes(shape: Shape):
+    slots = ', '.join(f's{k}:0{{number}}' for k in range(shape.slots))
+    for depth, names in enumerate(shape.levels()[1:], 1):
+        for i, name in enumerate(names):
+            yield f'tell add class {name} {{{shape.parent(depth, i)}}} [{slots}]'
+
+
+def instances(shape: Shape):
+    rng = random.Random(shape.seed)
+    leaves = shape.leaves()
+    for i in range(shape.instances):
+        slots = ', '.join(f's{k}:{rng.randrange(1000)}' for k in range(shape.slots))
+        yield f'tell add instance i{i} {{{leaves[i % len(leaves)]}}} [{slots}]'
+
+
+def lifespans(shape: Shape):
+    # each write is an if-updated LIFESPAN daemon scheduling the food to spoil
+    for i in range(shape.instances):
+        yield f'tell update i{i} update slot lifespan:{1 + i % shape.lifespan}'
+
+
+def ticks(shape: Shape):
+    # each tick runs update_foods over whatever spoils that day
+    for day in range(1, shape.days + 1):
+        yield f'tell update my_calendar update slot current_day:day_{day}'
+
+
+def asks(shape: Shape, samples: int) -> {str: [str]}:
+    # samples statements of every ASK form, on frames drawn at random; ASK KB, which prints everything,
+    # a few times only
+    rng = random.Random(shape.seed + 1)
+    levels = shape.levels()
+    inner = [name for level in levels[:-1] for name in level]
+    every = [name for level in levels for name in level]
+
+    def instance():
+        return f'i{rng.randrange(shape.instances)}'
+
+    def condition():
+        return f's{rng.randrange(shape.slots)} < {rng.randrange(1000) // 10}' if shape.slots else 'lifespan < 2'
+
+    forms = {
+        'frame': lambda: f'ask {instance()}',
+        'type': lambda: f'ask {instance()} type',
+        'slots': lambda: f'ask {instance()} slots',
+        'slot': lambda: f'ask {instance()} slot lifespan',
+        'supers': lambda: f'ask {instance()} supers',
+        'subs': lambda: f'ask {rng.choice(inner)} subs',
+        'typeof': lambda: f'ask {instance()} typeof {rng.choice(every)}',
+        'subbedby': lambda: f'ask {rng.choice(levels[-1])} subbedby {instance()}',
+        'instances': lambda: f'ask instances of {rng.choice(every)} where {condition()}',
+        'descendants': lambda: f'ask descendants of {rng.choice(inner)}',
+        'where': lambda: f'ask where {condition()} and lifespan = 0',
+        'explain': lambda: f'ask explain instances of {rng.choice(every)} where {condition()}',
+        'kb': lambda: 'ask kb',
+    }
+    return {form: [make() for _ in range(min(samples, 3) if form == 'kb' else samples)]
+            for form, make in forms.items()}
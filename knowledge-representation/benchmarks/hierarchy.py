@@ -0,0 +1,85 @@
+import argparse
+import random
+import sys
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.frame import Frame
+
+
+def build(kb: KnowledgeBase, classes: int, instances: int, fan_out: int, extra_parents: float, rng):
+    names = [f'C{i}' for i in range(classes)]
+    kb.add_frame(Frame(Frame.CLASS, names[0]))
+    for i in range(1, classes):
+        supers = {names[(i - 1) // fan_out]}
+        if rng.random() < extra_parents:
+            supers.add(names[rng.randrange(i)])
+        kb.add_frame(Frame(Frame.CLASS, names[i], supers))
+    for i in range(instances):
+        kb.add_frame(Frame(Frame.INSTANCE, f'I{i}', {names[rng.randrange(classes)]}))
+    return names
+
+
+def walk_typeof(kb: KnowledgeBase, frame_name: str, super_name: str) -> bool:
+    # what a subsumption check costs without the index: a walk up the superclass links
+    seen = set()
+    stack = [frame_name]
+    while stack:
+        name = stack.pop()
+        if name == super_name:
+            return True
+        frame = kb.get_frame(name)
+        if frame is not None:
+            for sup in frame.superclasses:
+                if sup not in seen:
+                    seen.add(sup)
+                    stack.append(sup)
+    return False
+
+
+def timed(name, count, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f'{name:<36} {count:>10} ops {elapsed:>8.3f}s {count / elapsed:>14,.0f} ops/s')
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Subsumption checks on synthetic class hierarchies')
+    parser.add_argument('--classes', type=int, default=10000)
+    parser.add_argument('--instances', type=int, default=1000000)
+    parser.add_argument('--fan-out', type=int, default=3)
+    parser.add_argument('--extra-parents', type=float, default=0.1,
+                        help='probability that a class gets a second, random superclass')
+    parser.add_argument('--queries', type=int, default=100000)
+    parser.add_argument('--updates', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    kb = KnowledgeBase()
+    names = timed('build classes + instances', args.classes + args.instances,
+                  lambda: build(kb, args.classes, args.instances, args.fan_out, args.extra_parents, rng))
+
+    frames = [f'I{rng.randrange(args.instances)}' if args.instances and rng.random() < 0.5
+              else rng.choice(names) for _ in range(args.queries)]
+    supers = [rng.choice(names[:max(1, len(names) // 100)]) for _ in range(args.queries)]
+    pairs = list(zip(frames, supers))
+
+    indexed = timed('kb.typeof (closure index)', len(pairs), lambda: [kb.typeof(f, s) for f, s in pairs])
+    walked = timed('superclass walk', len(pairs), lambda: [walk_typeof(kb, f, s) for f, s in pairs])
+    if indexed != walked:
+        raise AssertionError('closure index disagrees with the superclass walk')
+    print(f'{sum(indexed)} of {len(pairs)} checks true')
+
+    edits = []
+    for _ in range(args.updates):
+        sub = rng.randrange(1, args.classes)
+        edits.append((names[sub], names[rng.randrange(sub)]))
+    timed('add_superclass', len(edits), lambda: [kb.add_superclass(a, b) for a, b in edits])
+    timed('remove_superclass', len(edits), lambda: [kb.remove_superclass(a, b) for a, b in edits])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
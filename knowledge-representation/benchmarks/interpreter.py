@@ -0,0 +1,80 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.input.interpreter import interpret
+from knowledge_base.input.lexer import Tokenizer
+from knowledge_base.input.parser import Parser, split_statements
+from knowledge_base.input.cache import StatementCache
+from knowledge_base.input.compiler import execute
+from knowledge_base.input.loader import load_stream
+from benchmarks.workload import statements, script
+
+
+def report(name, count, elapsed):
+    print(f'{name:<32} {count:>10} statements {elapsed:>8.3f}s {count / elapsed:>12,.0f} statements/s')
+
+
+def per_line(lines, cache):
+    kb = KnowledgeBase()
+    for line in lines:
+        interpret(kb, line, cache)
+
+
+def streamed(text, cache):
+    kb = KnowledgeBase()
+    for _ in load_stream(kb, io.StringIO(text), cache=cache):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Statements/sec of the interpreter on scaled input.txt workloads')
+    parser.add_argument('--foods', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    lines = list(statements(args.foods, args.days))
+    text = script(args.foods, args.days)
+    count = len(lines)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        nodes = [node for line in lines for node in Parser(line).parse().children]
+        parsed = time.perf_counter() - start
+
+        cache = StatementCache()
+        start = time.perf_counter()
+        compiled = [cache.statement(tokens) for tokens in split_statements(Tokenizer(text))]
+        compiling = time.perf_counter() - start
+
+        start = time.perf_counter()
+        execute(KnowledgeBase(), compiled)
+        executing = time.perf_counter() - start
+
+        start = time.perf_counter()
+        per_line(lines, StatementCache(0))
+        uncached = time.perf_counter() - start
+
+        start = time.perf_counter()
+        per_line(lines, StatementCache())
+        cached = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streamed(text, StatementCache())
+        loaded = time.perf_counter() - start
+
+    report('parse to Node trees', len(nodes), parsed)
+    report('tokenize + cached compile', len(compiled), compiling)
+    report('execute compiled batch', len(compiled), executing)
+    report('interpret() per line, no cache', count, uncached)
+    report('interpret() per line, cached', count, cached)
+    report('load_stream', count, loaded)
+    print(f'template cache: {cache.info()}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
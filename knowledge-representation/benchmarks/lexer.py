@@ -0,0 +1,100 @@
+import argparse
+import string
+import sys
+import time
+
+from knowledge_base.input.lexer import Tokenizer, Token, LexerError
+from benchmarks.workload import script
+
+
+class LegacyTokenizer:
+    # The character-at-a-time, recursive-on-whitespace Tokenizer this module is measured against.
+    def __init__(self, text: str = ""):
+        self.text = text.upper()
+        self.end = len(self.text)
+        self.start = 0
+        self.idx = 0
+
+    def has_next_token(self):
+        return self.end > self.idx
+
+    def next_token(self):
+        if not self.has_next_token():
+            return None
+
+        self.idx = self.start
+        cur = self.text[self.idx]
+        match cur:
+            case '(' | ')' | '[' | ']' | '{' | '}' | ',' | ':':
+                self.idx += 1
+                self.start = self.idx
+                return Token(Token.type(cur), cur)
+            case '"':
+                return self.qstring()
+            case _:
+                if cur in string.whitespace:
+                    self.idx += 1
+                    self.start = self.idx
+                    return self.next_token()
+                else:
+                    return self.string()
+
+    def qstring(self):
+        self.idx += 1
+        s = self.string()
+        s.token_type = Token.STR
+        self.idx += 1
+        return s
+
+    def string(self):
+        cur = self.text[self.idx] if self.has_next_token() else ''
+
+        if cur in string.ascii_letters or cur in string.digits or cur == '_':
+            while (cur in string.ascii_letters or cur in string.digits or cur == '_') and self.has_next_token():
+                self.idx += 1
+                cur = self.text[self.idx] if self.has_next_token() else ''
+
+            tok = self.text[self.start:self.idx].upper()
+            self.start = self.idx
+            return Token(Token.type(tok), tok)
+
+        raise LexerError(f"Unexpected token: {cur}")
+
+
+def drain(tokenizer) -> int:
+    count = 0
+    tok = tokenizer.next_token()
+    while tok is not None:
+        count += 1
+        tok = tokenizer.next_token()
+    return count
+
+
+def measure(name, run, text, repeat):
+    best = None
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = run(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{name:<24} {count:>10} tokens {best:>8.3f}s {count / best:>14,.0f} tokens/s')
+    return count / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tokens/sec of the Tokenizer against the legacy lexer')
+    parser.add_argument('--foods', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    text = script(args.foods)
+    print(f'{len(text):,} characters')
+    legacy = measure('legacy next_token', lambda t: drain(LegacyTokenizer(t)), text, args.repeat)
+    current = measure('Tokenizer.next_token', lambda t: drain(Tokenizer(t)), text, args.repeat)
+    iterated = measure('iter(Tokenizer)', lambda t: sum(1 for _ in Tokenizer(t)), text, args.repeat)
+    print(f'speed-up: {current / legacy:.1f}x (next_token), {iterated / legacy:.1f}x (iteration)')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import argparse
+import gc
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.frame import Frame, Slot
+
+# the directory holding the benchmarks and knowledge_base packages, where the child is run from
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss() -> int:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def frames(instances: int, classes: int):
+    yield Frame(Frame.CLASS, 'PRODUCE', set(), {'WEIGHT': Slot(None, ['NUMBER']), 'GRADE': Slot(None, [])})
+    for i in range(classes):
+        yield Frame(Frame.CLASS, f'VARIETY{i}', {'PRODUCE'}, {})
+    for i in range(instances):
+        yield Frame(Frame.INSTANCE, f'ITEM{i}', {f'VARIETY{i % classes}'},
+                    {'WEIGHT': Slot(str(i % 1000), ['NUMBER']), 'GRADE': Slot('ABCDEFGHIJ'[i % 10], [])})
+
+
+def measure(instances: int, classes: int):
+    gc.collect()
+    before = peak_rss()
+    start = time.perf_counter()
+    kb = KnowledgeBase()
+    kb.add_frames(frames(instances, classes))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    used = peak_rss() - before
+    print(f'{len(kb.frames):>10} frames  {used / 2 ** 20:>10.1f} MiB  {used / len(kb.frames):>8.0f} bytes/frame'
+          f'  {elapsed:>8.2f}s to load', flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Peak resident memory of a knowledge base by frame count')
+    parser.add_argument('--frames', type=int, nargs='+', default=[100000, 1000000, 10000000])
+    parser.add_argument('--classes', type=int, default=20)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        measure(args.frames[0], args.classes)
+        return 0
+    # one process per size, so each peak is measured from a fresh interpreter
+    for n in args.frames:
+        result = subprocess.run([sys.executable, '-m', 'benchmarks.memory', '--child', '--frames', str(n),
+                                 '--classes', str(args.classes)], cwd=ROOT)
+        if result.returncode:
+            print(f'{n:>10} frames  failed (exit {result.returncode})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
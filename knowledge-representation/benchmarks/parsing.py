@@ -0,0 +1,67 @@
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.input.loader import compile_stream, parse_parallel, load_file
+from knowledge_base.input.cache import StatementCache
+from benchmarks.workload import statements
+
+
+def write_script(path: str, foods: int, days: int):
+    with open(path, 'w') as out:
+        for line in statements(foods, days):
+            out.write(line)
+            out.write('\n')
+
+
+def report(name: str, count: int, elapsed: float, baseline: float):
+    print(f'{name:<28} {count:>10} statements {elapsed:>8.2f}s {count / elapsed:>12,.0f} statements/s'
+          f'  {baseline / elapsed:>5.2f}x')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parsing and loading a large KRL script with a process pool')
+    parser.add_argument('--foods', type=int, default=300000)
+    parser.add_argument('--days', type=int, default=10)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--load', action='store_true', help='also apply the statements to a knowledge base')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'script.krl')
+        write_script(path, args.foods, args.days)
+        print(f'script: {os.path.getsize(path) / 2 ** 20:.1f} MiB, {os.cpu_count()} CPUs')
+
+        start = time.perf_counter()
+        with open(path) as stream:
+            count = sum(1 for _ in compile_stream(stream, cache=StatementCache()))
+        serial = time.perf_counter() - start
+        report('parse, this process', count, serial, serial)
+        for workers in args.workers:
+            start = time.perf_counter()
+            with open(path) as stream:
+                count = sum(1 for _ in parse_parallel(stream, workers, cache=StatementCache()))
+            report(f'parse, {workers} workers', count, time.perf_counter() - start, serial)
+
+        if args.load:
+            # the statements are applied in this process either way; ASK answers are discarded
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                count = load_file(KnowledgeBase(), path, cache=StatementCache())
+                serial = time.perf_counter() - start
+                timings = []
+                for workers in args.workers:
+                    start = time.perf_counter()
+                    load_file(KnowledgeBase(), path, cache=StatementCache(), workers=workers)
+                    timings.append(time.perf_counter() - start)
+            report('load, this process', count, serial, serial)
+            for workers, elapsed in zip(args.workers, timings):
+                report(f'load, {workers} workers', count, elapsed, serial)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
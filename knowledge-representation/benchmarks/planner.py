@@ -0,0 +1,60 @@
+import argparse
+import random
+import sys
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.frame import Frame, Slot
+from knowledge_base.query import Condition, matches
+
+
+def build(instances: int, classes: int) -> KnowledgeBase:
+    # PRODUCE rather than FOOD so the spoilage rules stay out of the measurement
+    kb = KnowledgeBase()
+    rng = random.Random(1)
+    frames = [Frame(Frame.CLASS, 'PRODUCE', set(), {'WEIGHT': Slot(None, ['NUMBER'])})]
+    frames.extend(Frame(Frame.CLASS, f'VARIETY{i}', {'PRODUCE'}, {}) for i in range(classes))
+    for i in range(instances):
+        frames.append(Frame(Frame.INSTANCE, f'ITEM{i}', {f'VARIETY{rng.randrange(classes)}'},
+                            {'WEIGHT': Slot(str(rng.randrange(1000)), ['NUMBER']),
+                             'GRADE': Slot(rng.choice('ABCDEFGHIJ'), []),
+                             'LOT': Slot(f'LOT{rng.randrange(instances // 10 or 1)}', [])}))
+    kb.add_frames(frames)
+    return kb
+
+
+def timed(function, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Planned vs naive evaluation of multi-predicate extent queries')
+    parser.add_argument('--instances', type=int, default=200000)
+    parser.add_argument('--classes', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    kb = build(args.instances, args.classes)
+    queries = [
+        ('PRODUCE', [Condition('LOT', '=', 'LOT7'), Condition('GRADE', '=', 'A')]),
+        ('PRODUCE', [Condition('WEIGHT', '>=', '995'), Condition('GRADE', '!=', 'A')]),
+        ('VARIETY3', [Condition('GRADE', '=', 'B')]),
+        ('PRODUCE', [Condition('GRADE', '=', 'C'), Condition('WEIGHT', '<', '500')]),
+    ]
+    for class_name, conditions in queries:
+        naive, naive_time = timed(lambda: [f for f in kb.extent(class_name)
+                                           if f.type == Frame.INSTANCE and matches(f, conditions)], args.repeat)
+        planned, planned_time = timed(lambda: list(kb.instances_of(class_name, conditions)), args.repeat)
+        assert {f.name for f in naive} == {f.name for f in planned}
+        print(f'INSTANCES OF {class_name} WHERE {" AND ".join(map(str, conditions))}')
+        print(f'    {len(planned):>8} rows  naive {naive_time * 1000:>9.2f} ms  planned {planned_time * 1000:>9.2f} ms'
+              f'  {naive_time / planned_time:>7.1f}x')
+        for line in kb.query(class_name, conditions, Frame.INSTANCE).explain().split('\n'):
+            print(f'    {line}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.workload import PRELUDE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def requests(connection: int, foods: int):
+    # each connection keeps to foods of its own, so the answers do not depend on the interleaving
+    for i in range(foods):
+        name = f'c{connection}_apple{i}'
+        yield f'tell add instance {name} {{apple}} []'
+        yield f'tell update {name} update slot lifespan:{1 + i % 5}'
+        yield f'ask {name} slot lifespan'
+
+
+async def client(host: str, port: int, lines, depth: int, latencies: list) -> int:
+    # Writes up to depth requests ahead of the answers, and times each one from write to answer.
+    reader, writer = await asyncio.open_connection(host, port)
+    window = asyncio.Semaphore(depth)
+    sent = []
+    errors = 0
+
+    async def send():
+        for line in lines:
+            await window.acquire()
+            sent.append(time.perf_counter())
+            writer.write(line.encode() + b'\n')
+            await writer.drain()
+        writer.write_eof()
+
+    sender = asyncio.create_task(send())
+    answered = 0
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        latencies.append(time.perf_counter() - sent[answered])
+        answered += 1
+        window.release()
+        if not json.loads(line)['ok']:
+            errors += 1
+    await sender
+    writer.close()
+    return errors
+
+
+async def run(host: str, port: int, connections: int, foods: int, depth: int):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(' '.join(PRELUDE).encode() + b'\n')
+    await writer.drain()
+    await reader.readline()
+    writer.close()
+
+    latencies = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(client(host, port, list(requests(c, foods)), depth, latencies)
+                                    for c in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    count = len(latencies)
+    print(f'{connections:>5} connections  depth {depth:>4}  {count:>9} requests  {elapsed:>8.2f}s'
+          f'  {count / elapsed:>10,.0f} requests/s  p50 {latencies[count // 2] * 1000:>8.2f} ms'
+          f'  p99 {latencies[int(count * 0.99)] * 1000:>8.2f} ms  mean {statistics.fmean(latencies) * 1000:>8.2f} ms'
+          f'  errors {sum(errors)}')
+
+
+def start_server():
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py'), '--serve', '--port', '0'],
+                              stdout=subprocess.PIPE, text=True, cwd=ROOT)
+    address = server.stdout.readline().split()[-1]
+    host, port = address.rsplit(':', 1)
+    return server, host, int(port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Throughput and latency of main.py --serve under concurrent clients')
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--depth', type=int, nargs='+', default=[1, 32],
+                        help='requests each client keeps in flight')
+    parser.add_argument('--foods', type=int, default=2000, help='foods per connection, three requests each')
+    parser.add_argument('--connect', metavar='HOST:PORT', help='use a running server instead of starting one')
+    args = parser.parse_args(argv)
+
+    for depth in args.depth:
+        for connections in args.connections:
+            # a fresh server per run, so every run starts from the same empty knowledge base
+            server = None
+            if args.connect:
+                host, port = args.connect.rsplit(':', 1)
+            else:
+                server, host, port = start_server()
+            try:
+                asyncio.run(run(host, int(port), connections, args.foods, depth))
+            finally:
+                if server is not None:
+                    server.terminate()
+                    server.wait()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import argparse
+import sys
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.shards import ShardedKnowledgeBase
+from knowledge_base.frame import Frame, Slot
+from knowledge_base.query import Condition
+
+
+def frames(instances: int, classes: int):
+    yield Frame(Frame.CLASS, 'PRODUCE', set(), {'WEIGHT': Slot(None, ['NUMBER'])})
+    for i in range(classes):
+        yield Frame(Frame.CLASS, f'VARIETY{i}', {'PRODUCE'}, {})
+    for i in range(instances):
+        yield Frame(Frame.INSTANCE, f'ITEM{i}', {f'VARIETY{i % classes}'},
+                    {'WEIGHT': Slot(str(i % 1000), ['NUMBER'])})
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def run(label: str, kb, instances: int, classes: int, lookups: int, expected=None):
+    _, loading = timed(lambda: kb.add_frames(frames(instances, classes)))
+    conditions = [Condition('WEIGHT', '<', '100')]
+    answer, querying = timed(lambda: sorted(frame.name for frame in kb.instances_of('PRODUCE', conditions)))
+    _, looking = timed(lambda: [kb.get_frame(f'ITEM{i}') for i in range(lookups)])
+    _, telling = timed(lambda: [kb.update_slot(f'ITEM{i}', 'WEIGHT', '5') for i in range(lookups)])
+    print(f'{label:<10} load {instances / loading:>10,.0f} frames/s  query {querying * 1000:>8.1f} ms'
+          f' ({len(answer)} rows)  get_frame {lookups / looking:>8,.0f}/s  update_slot {lookups / telling:>8,.0f}/s'
+          + ('' if expected is None else f'  same answer {answer == expected}'))
+    return answer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Loading, scatter-gather queries and routed calls on a '
+                                                 'ShardedKnowledgeBase against a single KnowledgeBase')
+    parser.add_argument('--instances', type=int, default=200000)
+    parser.add_argument('--classes', type=int, default=20)
+    parser.add_argument('--lookups', type=int, default=5000, help='get_frame and update_slot calls timed')
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    expected = run('single', KnowledgeBase(), args.instances, args.classes, args.lookups)
+    for shards in args.shards:
+        with ShardedKnowledgeBase(shards) as kb:
+            run(f'{shards} shards', kb, args.instances, args.classes, args.lookups, expected)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
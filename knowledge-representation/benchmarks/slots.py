@@ -0,0 +1,54 @@
+import argparse
+import sys
+import time
+import tracemalloc
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.frame import Frame, Slot
+
+
+def build(instances: int, slots: int, materialize: bool):
+    kb = KnowledgeBase()
+    kb.add_frame(Frame(Frame.CLASS, 'PRODUCE', set(), {f'S{i}': Slot(None, ['NUMBER']) for i in range(slots)}))
+    kb.add_frame(Frame(Frame.CLASS, 'VARIETY', {'PRODUCE'}))
+    for i in range(instances):
+        frame = Frame(Frame.INSTANCE, f'ITEM{i}', {'VARIETY'})
+        kb.add_frame(frame)
+        if materialize:
+            # what add_frame used to do: a private copy of every inherited slot in every instance
+            for key in frame.slot_names():
+                frame.own_slot(key)
+    return kb
+
+
+def measure(name, instances, slots, materialize):
+    tracemalloc.start()
+    start = time.perf_counter()
+    kb = build(instances, slots, materialize)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:<24} {current / 2 ** 20:>9.1f} MiB live {peak / 2 ** 20:>9.1f} MiB peak '
+          f'{current / instances:>8.0f} B/instance {instances / elapsed:>12,.0f} adds/s')
+    return kb
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory of inherited slots, shared versus copied per instance')
+    parser.add_argument('--instances', type=int, default=100000)
+    parser.add_argument('--slots', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    measure('copied per instance', args.instances, args.slots, True)
+    kb = measure('inherited lazily', args.instances, args.slots, False)
+
+    frame = kb.get_frame('ITEM0')
+    start = time.perf_counter()
+    for _ in range(args.instances):
+        frame.slots['S0']
+    elapsed = time.perf_counter() - start
+    print(f'inherited slot read: {elapsed / args.instances * 1e9:,.0f} ns')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
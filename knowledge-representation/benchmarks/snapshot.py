@@ -0,0 +1,59 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.input.loader import load_stream
+from benchmarks.workload import script
+
+
+def same(kb, other) -> bool:
+    if kb.frames.keys() != other.frames.keys():
+        return False
+    for name, frame in kb.frames.items():
+        copy = other.frames[name]
+        if (frame.type, frame.superclasses, frame.subclasses) != (copy.type, copy.superclasses, copy.subclasses):
+            return False
+        if {k: (s.values, s.facets) for k, s in frame.slots.items()} != \
+                {k: (s.values, s.facets) for k, s in copy.slots.items()}:
+            return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Startup time of replaying a script vs loading a snapshot')
+    parser.add_argument('--foods', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    text = script(args.foods, args.days)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        kb = KnowledgeBase()
+        count = sum(1 for _ in load_stream(kb, io.StringIO(text)))
+        replayed = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'kb.snap')
+        start = time.perf_counter()
+        kb.save(path)
+        saved = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        loaded = KnowledgeBase.load(path)
+        loading = time.perf_counter() - start
+
+    print(f'{"replay script":<24} {count:>10} statements {replayed:>8.3f}s')
+    print(f'{"save snapshot":<24} {len(kb.frames):>10} frames     {saved:>8.3f}s {size:>12,} bytes')
+    print(f'{"load snapshot":<24} {len(loaded.frames):>10} frames     {loading:>8.3f}s {replayed / loading:>8.1f}x')
+    print(f'identical: {same(kb, loaded)}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
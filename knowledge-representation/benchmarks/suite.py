@@ -0,0 +1,175 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.input.lexer import Tokenizer
+from knowledge_base.input.parser import Parser
+from knowledge_base.input.cache import StatementCache
+from benchmarks.memory import peak_rss
+from benchmarks import generator
+from benchmarks.generator import Shape
+
+# a stage is reported slower than its baseline when its throughput drops by more than this
+DEFAULT_TOLERANCE = 0.10
+
+
+class Stage:
+    # Per-operation latencies of one stage, in nanoseconds, and the peak RSS once it is done.
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = []
+        self.peak = 0
+
+    def time(self, operation, items):
+        clock = time.perf_counter_ns
+        latencies = self.latencies
+        for item in items:
+            start = clock()
+            operation(item)
+            latencies.append(clock() - start)
+        self.peak = peak_rss()
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)] / 1000
+
+    def result(self) -> dict:
+        total = sum(self.latencies) / 1e9
+        return {
+            'operations': len(self.latencies),
+            'seconds': total,
+            'per_second': len(self.latencies) / total if total else 0.0,
+            'p50_us': self.percentile(0.50),
+            'p90_us': self.percentile(0.90),
+            'p99_us': self.percentile(0.99),
+            'max_us': max(self.latencies) / 1000,
+            'peak_rss_mib': self.peak / 2 ** 20,
+        }
+
+
+def execute(kb: KnowledgeBase):
+    # runs a compiled statement the way the REPL would, less the printing: lazy answers are drained and
+    # ASK KB is rendered
+    def run(statement):
+        result = statement(kb)
+        if statement.plan.streams:
+            for _ in result:
+                pass
+        elif result is kb:
+            str(result)
+
+    return run
+
+
+def run(shape: Shape, samples: int) -> dict:
+    setup = list(generator.setup(shape))
+    tells = {
+        'add class': list(generator.classes(shape)),
+        'add instance': list(generator.instances(shape)),
+        'update lifespan': list(generator.lifespans(shape)),
+        'tick': list(generator.ticks(shape)),
+    }
+    asks = generator.asks(shape, samples)
+    script = setup + [s for statements in tells.values() for s in statements] + \
+        [s for statements in asks.values() for s in statements]
+
+    stages = []
+    lex = Stage('lex')
+    lex.time(lambda text: list(Tokenizer(text)), script)
+    stages.append(lex)
+    tokens = [list(Tokenizer(text)) for text in script]
+    parse = Stage('parse')
+    parse.time(lambda statement: Parser(tokens=statement).parse(), tokens)
+    stages.append(parse)
+    cache = StatementCache()
+    compile_stage = Stage('compile, cached')
+    compile_stage.time(cache.statement, tokens)
+    stages.append(compile_stage)
+
+    kb = KnowledgeBase()
+    run_statement = execute(kb)
+    for statement in setup:
+        run_statement(cache.statement(list(Tokenizer(statement))))
+    for name, statements in [*tells.items(), *((f'ask {form}', s) for form, s in asks.items())]:
+        compiled = [cache.statement(list(Tokenizer(statement))) for statement in statements]
+        stage = Stage(name)
+        stage.time(run_statement, compiled)
+        stages.append(stage)
+
+    return {
+        'shape': vars(shape),
+        'samples': samples,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'frames': len(kb.frames),
+        'stages': {stage.name: stage.result() for stage in stages},
+    }
+
+
+def report(results: dict):
+    print(f'{results["frames"]} frames, shape {results["shape"]}')
+    print(f'{"stage":<20} {"ops":>8} {"ops/s":>12} {"p50 us":>10} {"p90 us":>10} {"p99 us":>10} {"max us":>11}'
+          f' {"peak MiB":>9}')
+    for name, stage in results['stages'].items():
+        print(f'{name:<20} {stage["operations"]:>8} {stage["per_second"]:>12,.0f} {stage["p50_us"]:>10.1f}'
+              f' {stage["p90_us"]:>10.1f} {stage["p99_us"]:>10.1f} {stage["max_us"]:>11.1f}'
+              f' {stage["peak_rss_mib"]:>9.1f}')
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> int:
+    # Throughput and p99 of every stage against a baseline run; the stages slower than tolerance allows
+    # are marked and counted.
+    if baseline.get('shape') != results['shape']:
+        print(f'baseline shape {baseline.get("shape")} differs; ratios are not comparable')
+    print(f'{"stage":<20} {"ops/s":>12} {"baseline":>12} {"ratio":>7} {"p99 ratio":>10}')
+    slower = 0
+    for name, stage in results['stages'].items():
+        before = baseline['stages'].get(name)
+        if before is None:
+            print(f'{name:<20} {stage["per_second"]:>12,.0f} {"-":>12}')
+            continue
+        ratio = stage['per_second'] / before['per_second'] if before['per_second'] else float('inf')
+        p99 = stage['p99_us'] / before['p99_us'] if before['p99_us'] else float('inf')
+        regressed = ratio < 1 - tolerance
+        slower += regressed
+        print(f'{name:<20} {stage["per_second"]:>12,.0f} {before["per_second"]:>12,.0f} {ratio:>7.2f}'
+              f' {p99:>10.2f}{"  slower" if regressed else ""}')
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Every stage of loading and querying a synthetic knowledge base, '
+                                                 'timed per operation')
+    parser.add_argument('--depth', type=int, default=3, help='levels of classes below FOOD')
+    parser.add_argument('--fanout', type=int, default=4, help='subclasses per class')
+    parser.add_argument('--instances', type=int, default=20000)
+    parser.add_argument('--slots', type=int, default=4, help='NUMBER slots per frame')
+    parser.add_argument('--days', type=int, default=10, help='calendar ticks')
+    parser.add_argument('--samples', type=int, default=200, help='statements timed per ASK form')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', metavar='FILE', help='write the results to FILE as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='compare against the JSON results of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='throughput drop, as a fraction, beyond which --compare reports a stage slower')
+    args = parser.parse_args(argv)
+
+    shape = Shape(args.depth, args.fanout, args.instances, args.slots, args.days, seed=args.seed)
+    results = run(shape, args.samples)
+    report(results)
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(results, out, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            slower = compare(results, json.load(baseline), args.tolerance)
+        # a non-zero exit status lets a script or CI job stop on a regression
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
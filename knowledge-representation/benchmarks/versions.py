@@ -0,0 +1,102 @@
+import argparse
+import random
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.versions import Versions
+from knowledge_base.reasoning.spoilage import Lifespan
+from knowledge_base.input.interpreter import interpret
+from knowledge_base.input.lexer import Tokenizer
+from knowledge_base.input.parser import split_statements
+from knowledge_base.input.cache import statement_cache
+from knowledge_base.input.compiler import execute
+from benchmarks.workload import PRELUDE
+
+
+def build(foods: int, lifespan: int) -> KnowledgeBase:
+    kb = KnowledgeBase()
+    interpret(kb, ' '.join(PRELUDE))
+    for i in range(foods):
+        interpret(kb, f'tell add instance apple{i} {{apple}} [] tell update apple{i} update slot lifespan:{1 + i % lifespan}')
+    return kb
+
+
+def batches(foods: int, days: int, lifespan: int):
+    # a day per batch: a few foods bought, then the calendar ticked, which spoils whatever ran out
+    for day in range(1, days + 1):
+        lines = [f'tell add instance day_{day} {{day}} [] tell update day_{day} update slot number:{day}']
+        for i in range(foods):
+            name = f'd{day}_apple{i}'
+            lines.append(f'tell add instance {name} {{apple}} [] tell update {name} update slot lifespan:{1 + i % lifespan}')
+        lines.append(f'tell update my_calendar update slot current_day:day_{day}')
+        yield [statement_cache.statement(tokens) for tokens in split_statements(Tokenizer(' '.join(lines)))]
+
+
+def consistent(kb: KnowledgeBase, name: str) -> bool:
+    # a food has no life left exactly when it is SPOILED
+    frame = kb.get_frame(name)
+    lifespan = frame.get_slot('LIFESPAN')
+    remaining = lifespan.remaining() if isinstance(lifespan, Lifespan) else int(lifespan.values[0])
+    spoiled = frame.get_slot('SPOILED').values
+    return (remaining == 0) == (spoiled == ['YES'])
+
+
+def run(foods: int, days: int, lifespan: int, bought: int, readers: int, isolated: bool):
+    kb = build(foods, lifespan)
+    versions = Versions(kb) if isolated else None
+    names = [f'APPLE{i}' for i in range(foods)]
+    done = threading.Event()
+    reads = [0] * readers
+    violations = [0] * readers
+
+    def reader(index: int):
+        rng = random.Random(index)
+        while not done.is_set():
+            with versions.read() if isolated else nullcontext(kb) as view:
+                for name in rng.sample(names, 16):
+                    reads[index] += 1
+                    if not consistent(view, name):
+                        violations[index] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for statements in batches(bought, days, lifespan):
+        if isolated:
+            versions.write(lambda copy: execute(copy, statements))
+        else:
+            execute(kb, statements)
+    written = time.perf_counter() - start
+    done.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    label = 'versions' if isolated else 'shared'
+    print(f'{label:<9} {readers:>3} readers  {days:>5} batches in {written:>7.2f}s'
+          f'  {sum(reads):>10} reads  {sum(reads) / elapsed:>10,.0f} reads/s  violations {sum(violations)}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Readers checking LIFESPAN against SPOILED while a writer ticks '
+                                                 'days, on a shared knowledge base and under Versions')
+    parser.add_argument('--foods', type=int, default=20000, help='foods the knowledge base starts with')
+    parser.add_argument('--days', type=int, default=200, help='write batches, a day tick each')
+    parser.add_argument('--bought', type=int, default=50, help='foods added per batch')
+    parser.add_argument('--lifespan', type=int, default=5)
+    parser.add_argument('--readers', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args(argv)
+
+    # threads share one interpreter: under the GIL more readers share the same reads/s rather than
+    # adding to them, and what this shows is that they never see a half-applied batch
+    for readers in args.readers:
+        for isolated in (False, True):
+            run(args.foods, args.days, args.lifespan, args.bought, readers, isolated)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
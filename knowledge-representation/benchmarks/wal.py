@@ -0,0 +1,60 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.input.loader import load_stream
+from knowledge_base.wal import Sync
+from benchmarks.workload import script
+
+
+def report(name, count, elapsed):
+    print(f'{name:<32} {count:>10} statements {elapsed:>8.3f}s {count / elapsed:>12,.0f} statements/s')
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def run(kb, text):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return sum(1 for _ in load_stream(kb, io.StringIO(text)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cost of write-ahead logging TELLs, and recovery time')
+    parser.add_argument('--foods', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    text = script(args.foods, args.days)
+    count, elapsed = timed(lambda: run(KnowledgeBase(), text))
+    report('no log', count, elapsed)
+
+    policies = [('--sync never', dict(sync=Sync.NEVER)), ('--sync group', dict(sync=Sync.GROUP)),
+                ('--sync group --group-size 1024', dict(sync=Sync.GROUP, group_size=1024))]
+    with tempfile.TemporaryDirectory() as directory:
+        for name, options in policies:
+            path = os.path.join(directory, name.replace(' ', ''))
+            kb = KnowledgeBase.open(path, **options)
+            count, elapsed = timed(lambda: run(kb, text))
+            kb.wal.close()
+            report(name, count, elapsed)
+
+        kb, elapsed = timed(lambda: KnowledgeBase.open(path))
+        report('recover by replaying the log', count, elapsed)
+        _, elapsed = timed(lambda: kb.wal.compact(wait=True))
+        print(f'{"compact to a checkpoint":<32} {len(kb.frames):>10} frames     {elapsed:>8.3f}s')
+        kb.wal.close()
+        _, elapsed = timed(lambda: KnowledgeBase.open(path).wal.close())
+        report('recover from the checkpoint', count, elapsed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
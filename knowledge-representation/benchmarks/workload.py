@@ -0,0 +1,26 @@
+# Scaled-up versions of resources/input.txt: a calendar, a day per tick and a basket of foods that spoil.
+PRELUDE = [
+    'tell add class calendar {} [current_day:{day}]',
+    'tell add instance my_calendar {calendar} []',
+    'tell add class day {} [number:{number}]',
+    'tell add class food {} [lifespan:{number}, start_day:{day}, spoilage_day:{day}, spoiled:]',
+    'tell add class apple {food} []',
+    'tell add instance day_0 {day} []',
+    'tell update my_calendar update slot current_day:day_0',
+]
+
+
+def statements(foods: int = 1000, days: int = 10, lifespan: int = 5):
+    yield from PRELUDE
+    for i in range(foods):
+        yield f'tell add instance apple{i} {{apple}} []'
+        yield f'tell update apple{i} update slot lifespan:{1 + i % lifespan}'
+        yield f'ask apple{i} slot lifespan'
+    for day in range(1, days + 1):
+        yield f'tell add instance day_{day} {{day}} []'
+        yield f'tell update day_{day} update slot number:{day}'
+        yield f'tell update my_calendar update slot current_day:day_{day}'
+
+
+def script(foods: int = 1000, days: int = 10, lifespan: int = 5) -> str:
+    return '\n'.join(statements(foods, days, lifespan)) + '\n'
@@ -0,0 +1,343 @@
+import math
+import operator
+from array import array
+from collections.abc import MutableSequence
+
+from knowledge_base.frame import Frame, Slot, Facets
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ColumnError(RuntimeError):
+    pass
+
+
+NAN = float('nan')
+COMPARISONS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def to_number(value):
+    # the numbers a NUMBER cell can hold, or None for anything else (words, None, bools)
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value[-1:].isdigit():
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def from_number(value: float):
+    return int(value) if value.is_integer() else value
+
+
+def column_number(slot):
+    # the number a column holds for slot: a plain NUMBER slot with one number (as Columns.adopt takes it)
+    # or a slot already in a column; None for anything a column leaves alone
+    if type(slot) is ColumnSlot:
+        cell = slot.cell()
+        return None if math.isnan(cell) else cell
+    if type(slot) is not Slot or Facets.NUMBER not in slot.facets or len(slot.values) != 1:
+        return None
+    return to_number(slot.values[0])
+
+
+class Column:
+    # One NUMBER slot of one class, stored as a float64 array with a row per instance in the class's
+    # extent (numpy when it is installed, array('d') otherwise). NaN marks an instance with no number of
+    # its own, one that inherits the slot or holds something that is not a number; those are few and are
+    # answered frame by frame, everything else by whole-array operations.
+    def __init__(self, class_name: str, slot_name: str):
+        self.class_name = class_name
+        self.slot_name = slot_name
+        self.rows: {Frame: int} = {}
+        self.frames: [Frame] = []
+        self.free: [int] = []
+        self.data = numpy.full(0, NAN) if numpy is not None else array('d')
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, frame):
+        return frame in self.rows
+
+    def add(self, frame) -> int:
+        row = self.rows.get(frame)
+        if row is not None:
+            return row
+        if self.free:
+            row = self.free.pop()
+            self.frames[row] = frame
+        else:
+            row = len(self.frames)
+            self.frames.append(frame)
+            if numpy is None:
+                self.data.append(NAN)
+            elif row >= len(self.data):
+                grown = numpy.full(max(16, 2 * len(self.data)), NAN)
+                grown[:len(self.data)] = self.data
+                self.data = grown
+        self.data[row] = NAN
+        self.rows[frame] = row
+        return row
+
+    def remove(self, frame):
+        row = self.rows.pop(frame, None)
+        if row is not None:
+            self.data[row] = NAN
+            self.frames[row] = None
+            self.free.append(row)
+
+    def get(self, row: int):
+        return float(self.data[row])
+
+    def set(self, row: int, value: float):
+        self.data[row] = value
+
+    def live(self):
+        return self.data[:len(self.frames)]
+
+    def add_scalar(self, delta: float):
+        # every instance's number moves by delta at once; call it through KnowledgeBase.add_to_column,
+        # which logs it
+        if numpy is not None:
+            self.data += delta
+        else:
+            data = self.data
+            for row in range(len(data)):
+                data[row] += delta
+
+    def apply(self, function):
+        # function maps the whole column to its new values, e.g. lambda a: a * 2 (numpy ufuncs welcome);
+        # call it through KnowledgeBase.apply_to_column
+        if numpy is not None:
+            self.data[:len(self.frames)] = function(self.live())
+        else:
+            data = self.data
+            for row in range(len(data)):
+                data[row] = function(data[row])
+
+    def rows_where(self, op: str, value: float):
+        compare = COMPARISONS[op]
+        if numpy is not None:
+            data = self.live()
+            with numpy.errstate(invalid='ignore'):
+                mask = compare(data, value)
+            if op == '!=':
+                mask &= ~numpy.isnan(data)
+            return numpy.flatnonzero(mask).tolist()
+        return [row for row, cell in enumerate(self.data) if cell == cell and compare(cell, value)]
+
+    def unknown(self):
+        # rows whose answer the column cannot give: no number of their own
+        if numpy is not None:
+            return [row for row in numpy.flatnonzero(numpy.isnan(self.live())).tolist()
+                    if self.frames[row] is not None]
+        return [row for row, cell in enumerate(self.data) if cell != cell and self.frames[row] is not None]
+
+    def count(self, op: str, value: float) -> int:
+        if numpy is not None:
+            data = self.live()
+            with numpy.errstate(invalid='ignore'):
+                mask = COMPARISONS[op](data, value)
+            if op == '!=':
+                mask &= ~numpy.isnan(data)
+            return int(numpy.count_nonzero(mask))
+        return len(self.rows_where(op, value))
+
+    def select(self, op: str, value: float):
+        frames = self.frames
+        for row in self.rows_where(op, value):
+            yield frames[row]
+        for row in self.unknown():
+            yield frames[row]
+
+
+class ColumnValues(MutableSequence):
+    # What ColumnSlot.values hands out: a list of zero or one number that reads and writes the cell.
+    __slots__ = ('slot',)
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __len__(self):
+        return 0 if math.isnan(self.slot.cell()) else 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self)[i]
+        if i not in (0, -1) or not len(self):
+            raise IndexError(i)
+        return from_number(self.slot.cell())
+
+    def __setitem__(self, i, value):
+        if i not in (0, -1) or not len(self):
+            raise IndexError(i)
+        self.slot.write(value)
+
+    def __delitem__(self, i):
+        if i not in (0, -1) or not len(self):
+            raise IndexError(i)
+        self.slot.column.set(self.slot.row, NAN)
+
+    def insert(self, i, value):
+        if len(self):
+            # a second value does not fit in a cell; the frame goes back to a plain slot
+            self.slot.detach([from_number(self.slot.cell()), value])
+        else:
+            self.slot.write(value)
+
+    def __contains__(self, value):
+        return len(self) == 1 and to_number(value) == self.slot.cell()
+
+    def index(self, value, start=0, stop=None):
+        if value in self:
+            return 0
+        raise ValueError(value)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ColumnSlot(Slot):
+    __slots__ = ('frame', 'column', 'row')
+    indexed = False
+
+    def __init__(self, frame, column: Column, row: int, facets):
+        self.frame = frame
+        self.column = column
+        self.row = row
+        self.facets = facets
+
+    @property
+    def values(self):
+        return ColumnValues(self)
+
+    def cell(self) -> float:
+        return self.column.get(self.row)
+
+    def write(self, value):
+        number = to_number(value)
+        if number is None:
+            self.detach([value])
+        else:
+            self.column.set(self.row, number)
+
+    def detach(self, values):
+        self.column.set(self.row, NAN)
+        self.frame.replace_slot(self.column.slot_name, Slot(values, self.facets))
+
+    def copy(self):
+        return Slot(list(self.values), self.facets)
+
+    def release(self):
+        if self.column.rows.get(self.frame) == self.row:
+            self.column.set(self.row, NAN)
+
+
+class Columns:
+    # The knowledge base's column stores, by class and then slot name. Once a slot of a class is made
+    # columnar, every instance that joins the class's extent gets a row, and a NUMBER slot it owns (or
+    # later writes) is moved into that row.
+    def __init__(self, kb):
+        self.kb = kb
+        self.columns: {str: {str: Column}} = {}
+        self.by_slot: {str: [Column]} = {}
+
+    def __bool__(self):
+        return bool(self.columns)
+
+    def create(self, class_name: str, slot_name: str) -> Column:
+        column = self.columns.get(class_name, {}).get(slot_name)
+        if column is not None:
+            return column
+        column = Column(class_name, slot_name)
+        self.columns.setdefault(class_name, {})[slot_name] = column
+        self.by_slot.setdefault(slot_name, []).append(column)
+        for frame in self.kb.extent(class_name):
+            if frame.type == Frame.INSTANCE:
+                self.join(column, frame)
+        return column
+
+    def get(self, class_name: str, slot_name: str):
+        return self.columns.get(class_name, {}).get(slot_name)
+
+    def covering(self, class_name: str, slot_name: str):
+        # the column of class_name itself, or else of its nearest columnar ancestor
+        column = self.get(class_name, slot_name)
+        if column is not None:
+            return column
+        for candidate in self.by_slot.get(slot_name, ()):
+            if self.kb.typeof(class_name, candidate.class_name):
+                return candidate
+        return None
+
+    def join(self, column: Column, frame):
+        row = column.add(frame)
+        slot = frame.own_slots.get(column.slot_name)
+        if slot is not None:
+            frame.replace_slot(column.slot_name, slot)
+        return row
+
+    def adopt(self, frame, slot_name: str, slot):
+        # called for every slot a frame comes to own; returns what the frame should store
+        number = column_number(slot) if type(slot) is Slot else None
+        if number is None:
+            return slot
+        for column in self.by_slot.get(slot_name, ()):
+            row = column.rows.get(frame)
+            if row is not None:
+                column.set(row, number)
+                return ColumnSlot(frame, column, row, slot.facets)
+        return slot
+
+    def linked(self, frame, super_name: str):
+        # frame is being linked below super_name (before it lists it): it, or the instances below it, may
+        # have entered a columnar extent
+        if frame.type != Frame.INSTANCE:
+            for instance in list(self.kb.extent(frame.name)):
+                if instance.type == Frame.INSTANCE:
+                    self.linked(instance, super_name)
+            return
+        for class_name, columns in self.columns.items():
+            if super_name == class_name or self.kb.typeof(super_name, class_name):
+                for column in columns.values():
+                    if frame not in column:
+                        self.join(column, frame)
+
+    def unlinked(self, frame):
+        if frame.type != Frame.INSTANCE:
+            if frame.kb is not None:
+                for instance in list(self.kb.extent(frame.name)):
+                    if instance.type == Frame.INSTANCE:
+                        self.unlinked(instance)
+            return
+        for class_name, columns in self.columns.items():
+            if frame.kb is None or not self.kb.typeof(frame.name, class_name):
+                for column in columns.values():
+                    self.leave(column, frame)
+
+    def leave(self, column: Column, frame):
+        if frame not in column:
+            return
+        slot = frame.own_slots.get(column.slot_name)
+        values = list(slot.values) if isinstance(slot, ColumnSlot) and slot.column is column else None
+        column.remove(frame)
+        if values is not None:
+            frame.replace_slot(column.slot_name, Slot(values, slot.facets))
@@ -1,32 +1,173 @@
+import sys
+from collections.abc import MutableMapping, MutableSet
+
+
 class Facets:
     NUMBER = 'NUMBER'
     MULTIVALUED = 'MULTIVALUED'
     SYMMETRIC = 'SYMMETRIC'
 
 
+def intern(name):
+    # frame, slot and facet names repeat across every frame that mentions them; one copy of each is kept
+    return sys.intern(name) if type(name) is str else name
+
+
+# Names holds up to this many names in a tuple before it switches to a set
+NAMES_TUPLE_LIMIT = 8
+
+
+class Names(MutableSet):
+    # A frame's superclass or subclass names, kept as a tuple while there are few: most frames have one
+    # superclass and no subclasses, and the empty tuple is shared, where every empty set would cost as much
+    # as a full one. A class with many subclasses gets a set, so adding to it stays O(1).
+    __slots__ = ('names',)
+
+    def __init__(self, names=()):
+        names = dict.fromkeys(map(intern, names))
+        self.names = tuple(names) if len(names) <= NAMES_TUPLE_LIMIT else set(names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        names = self.names
+        if type(names) is set:
+            names.add(intern(name))
+        elif name not in names:
+            if len(names) < NAMES_TUPLE_LIMIT:
+                self.names = names + (intern(name),)
+            else:
+                self.names = {*names, intern(name)}
+
+    def discard(self, name):
+        names = self.names
+        if type(names) is set:
+            names.discard(name)
+        elif name in names:
+            self.names = tuple(n for n in names if n != name)
+
+    def __repr__(self):
+        return repr(set(self.names))
+
+
+class FrameRef(str):
+    # A value naming a frame, kept in a slot faceted with a class name ({day}). It is still the name
+    # wherever a string is expected; frame is the frame that name resolved to when it was written.
+    def __new__(cls, frame):
+        ref = super().__new__(cls, frame.name)
+        ref.frame = frame
+        return ref
+
+
+def as_number(value):
+    # '3' -> 3 and '2.5' -> 2.5; anything that does not read as a number is kept as it is
+    if not isinstance(value, str) or value[-1:] not in '0123456789.':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
 class Slot:
+    __slots__ = ('values', 'facets')
+    # computed slots (see Lifespan) set this to False to stay out of the kb's slot-value index
+    indexed = True
+
     def __init__(self, values, facets):
         if not isinstance(values, list):
             self.values = [values]
         else:
             self.values = values
 
-        if not isinstance(facets, list):
-            self.facets = [facets]
+        # a tuple, so that slots without facets all share the empty one
+        if not isinstance(facets, (list, tuple)):
+            self.facets = (intern(facets),)
         else:
-            self.facets = facets
+            self.facets = tuple(map(intern, facets))
 
     def __str__(self):
         if Facets.MULTIVALUED not in self.facets:
             if len(self.values) >= 1:
-                return f'(value={self.values[0]}, facets={self.facets})'
-        return f'(value={self.values}, facets={self.facets})'
+                return f'(value={self.values[0]}, facets={list(self.facets)})'
+        return f'(value={self.values}, facets={list(self.facets)})'
 
     def __repr__(self):
         return self.__str__()
 
+    def copy(self):
+        return Slot(list(self.values), self.facets)
+
+    def typed(self, value, kb=None):
+        # Values come from the lexer as strings and are converted once, on the way in: a NUMBER slot
+        # keeps numbers and a slot faceted with a class name keeps references to the frames it names.
+        for facet in self.facets:
+            if facet == Facets.NUMBER:
+                return as_number(value)
+            if kb is not None and facet in kb.class_frames and type(value) is str:
+                frame = kb.frames.get(value)
+                if frame is not None:
+                    return FrameRef(frame)
+        return value
+
+    def retype(self, kb=None):
+        if self.facets:
+            values = self.values
+            for i, value in enumerate(values):
+                values[i] = self.typed(value, kb)
+
+    def release(self):
+        # called once the slot is replaced or removed; storage-backed slots (see ColumnSlot) free it here
+        pass
+
+
+class Slots(MutableMapping):
+    # A frame's slots as seen from outside: the ones it owns layered over the ones it inherits.
+    # Inherited Slot objects belong to the ancestor that owns them and must not be mutated through here.
+    __slots__ = ('frame',)
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __getitem__(self, key):
+        slot = self.frame.get_slot(key)
+        if slot is None:
+            raise KeyError(key)
+        return slot
+
+    def __setitem__(self, key, slot):
+        self.frame.replace_slot(key, slot)
+
+    def __delitem__(self, key):
+        if not self.frame.remove_slot(key):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.frame.get_slot(key) is not None
+
+    def __iter__(self):
+        return iter(self.frame.slot_names())
+
+    def __len__(self):
+        return len(self.frame.slot_names())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
 
 class Frame:
+    __slots__ = ('name', 'type', 'superclasses', 'subclasses', 'own_slots', 'kb')
     INSTANCE = 'INSTANCE'
     CLASS = 'CLASS'
 
@@ -41,11 +182,123 @@ class Frame:
         if slots is None:
             slots = {}
 
-        self.name = frame_name
+        self.name = intern(frame_name)
         self.type = frame_type
-        self.superclasses = superclasses
-        self.subclasses = set()
-        self.slots = slots
+        self.superclasses = Names(superclasses)
+        self.subclasses = Names()
+        self.own_slots = {intern(key): slot for key, slot in slots.items()}
+        self.kb = None
+
+    @property
+    def slots(self) -> Slots:
+        return Slots(self)
+
+    def ancestor_frames(self):
+        # breadth first, so the nearest definition of a slot wins
+        if self.kb is None:
+            return
+        frames = self.kb.frames
+        seen = set(self.superclasses)
+        queue = list(self.superclasses)
+        for name in queue:
+            frame = frames.get(name)
+            if frame is not None:
+                yield frame
+                for super_name in frame.superclasses:
+                    if super_name not in seen:
+                        seen.add(super_name)
+                        queue.append(super_name)
+
+    def get_slot(self, key: str):
+        slot = self.own_slots.get(key)
+        if slot is None:
+            for frame in self.ancestor_frames():
+                slot = frame.own_slots.get(key)
+                if slot is not None:
+                    break
+        return slot
+
+    def own_slot(self, key: str):
+        # copy-on-write: an inherited slot becomes local the first time this frame writes to it
+        slot = self.own_slots.get(key)
+        if slot is None:
+            inherited = self.get_slot(key)
+            if inherited is not None:
+                slot = self.replace_slot(key, inherited.copy())
+        return slot
+
+    def slot_index(self):
+        return None if self.kb is None else self.kb.slot_index
+
+    def replace_slot(self, key: str, slot: Slot) -> Slot:
+        index = self.slot_index()
+        old = self.own_slots.get(key)
+        before = list(old.values) if old is not None and self.is_symmetric(old) else ()
+        if index is not None and old is not None:
+            index.discard_slot(key, old, self)
+        slot.retype(self.kb)
+        if self.kb is not None and self.kb.columns:
+            slot = self.kb.columns.adopt(self, key, slot)
+        if old is not None and old is not slot:
+            old.release()
+        self.own_slots[intern(key)] = slot
+        if index is not None:
+            index.add_slot(key, slot, self)
+        if before or self.is_symmetric(slot):
+            after = slot.values
+            self.mirror(key, slot, [v for v in after if v not in before], [v for v in before if v not in after])
+        return slot
+
+    def is_symmetric(self, slot) -> bool:
+        return self.kb is not None and Facets.SYMMETRIC in slot.facets
+
+    def mirror(self, key: str, slot, added=(), removed=()):
+        # Keeps a SYMMETRIC slot two-way: a frame named by a value added here gets this frame's name in its
+        # own slot of the same name, and one named by a value removed loses it. Each side stops as soon as
+        # the other already agrees, so the exchange is one write deep.
+        if not self.is_symmetric(slot):
+            return
+        frames = self.kb.frames
+        for value in removed:
+            target = frames.get(value) if isinstance(value, str) else None
+            if target is not None and target is not self:
+                target_slot = target.own_slots.get(key)
+                while target_slot is not None and self.name in target_slot.values:
+                    target.delete_value(key, self.name)
+                    target_slot = target.own_slots.get(key)
+        for value in added:
+            target = frames.get(value) if isinstance(value, str) else None
+            if target is None or target is self:
+                continue
+            target_slot = target.get_slot(key)
+            if target_slot is None:
+                target.replace_slot(key, Slot([self.name], slot.facets))
+            elif self.name not in target_slot.values:
+                if Facets.MULTIVALUED in target_slot.facets:
+                    target.add_value(key, self.name)
+                else:
+                    target.update_slot(key, self.name)
+
+    def is_local(self, key: str) -> bool:
+        return key in self.own_slots
+
+    def local_slots(self) -> dict:
+        return dict(self.own_slots)
+
+    def inherited_slots(self) -> dict:
+        inherited = {}
+        for frame in self.ancestor_frames():
+            for key, slot in frame.own_slots.items():
+                if key not in self.own_slots and key not in inherited:
+                    inherited[key] = slot
+        return inherited
+
+    def slot_names(self) -> list:
+        names = {}
+        for frame in self.ancestor_frames():
+            names.update(dict.fromkeys(frame.own_slots))
+        names.update(dict.fromkeys(self.own_slots))
+        return list(names)
 
     def add_superclass(self, superclass: str) -> bool:
         if superclass in self.superclasses:
@@ -68,60 +321,111 @@ class Frame:
     def remove_subclass(self, subclass: str) -> bool:
         if self.is_instance() or subclass not in self.subclasses:
             return False
-        self.superclasses.remove(subclass)
+        self.subclasses.remove(subclass)
         return True
 
     def update_slot(self, key: str, val) -> bool:
         # validate update in relation to facets
-        if key not in self.slots:
-            self.slots[key] = val
+        slot = self.own_slot(key)
+        if slot is None:
+            self.replace_slot(key, val if isinstance(val, Slot) else Slot(val, []))
+            return True
+
+        val = slot.typed(val, self.kb)
+        index = self.slot_index() if slot.indexed else None
+        # read once: a computed slot (Lifespan) hands out a fresh list per read and keeps what is written
+        # into the latest one
+        values = slot.values
+        removed = ()
+        if values:
+            removed = values[:1]
+            if index is not None:
+                index.discard(key, values[0], self)
+            values[0] = val
         else:
-            self.slots[key].values[0] = val
+            values.append(val)
+        if index is not None:
+            index.add(key, val, self)
+        self.mirror(key, slot, (val,), [v for v in removed if v not in values])
         return True
 
     def add_value(self, key: str, val) -> bool:
-        if key in self.slots:
-            slot: Slot = self.slots[key]
+        slot = self.own_slot(key)
+        if slot is not None:
+            val = slot.typed(val, self.kb)
             slot.values.append(val)
+            index = self.slot_index()
+            if index is not None and slot.indexed:
+                index.add(key, val, self)
+            self.mirror(key, slot, added=(val,))
             return True
         return False
 
     def delete_value(self, key: str, val) -> bool:
-        if key in self.slots:
-            slot: Slot = self.slots[key]
-            if val in slot.values:
-                del slot.values[val]
-                return True
+        slot = self.own_slot(key)
+        if slot is not None:
+            val = slot.typed(val, self.kb)
+        if slot is not None and val in slot.values:
+            slot.values.remove(val)
+            index = self.slot_index()
+            if index is not None and slot.indexed:
+                index.discard(key, val, self)
+            if val not in slot.values:
+                self.mirror(key, slot, removed=(val,))
+            return True
         return False
 
+    def rename_value(self, key: str, old, new):
+        # the frame a value names was renamed: same relation, new name, so nothing is mirrored
+        slot = self.own_slots.get(key)
+        index = self.slot_index() if slot is not None and slot.indexed else None
+        for i, value in enumerate(slot.values if slot is not None else ()):
+            if value == old:
+                if index is not None:
+                    index.discard(key, value, self)
+                slot.values[i] = slot.typed(new, self.kb)
+                if index is not None:
+                    index.add(key, slot.values[i], self)
+
     def add_facet(self, key: str, facet: str) -> bool:
-        if key in self.slots:
-            slot: Slot = self.slots[key]
-            slot.facets.append(facet)
+        slot = self.own_slot(key)
+        if slot is not None:
+            slot.facets += (intern(facet),)
+            # stored again so that the values already there are converted for the new facet
+            self.replace_slot(key, slot)
             return True
         return False
 
     def delete_facet(self, key: str, facet: str) -> bool:
-        if key in self.slots:
-            slot: Slot = self.slots[key]
-            if facet in slot.facets:
-                del slot.facets[facet]
-                return True
+        slot = self.own_slot(key)
+        if slot is not None and facet in slot.facets:
+            facets = list(slot.facets)
+            facets.remove(facet)
+            slot.facets = tuple(facets)
+            return True
         return False
 
     def remove_slot(self, key: str):
-        if key in self.slots:
-            del self.slots[key]
+        # only a local slot can be removed; an inherited one shows through again afterwards
+        if key in self.own_slots:
+            index = self.slot_index()
+            if index is not None:
+                index.discard_slot(key, self.own_slots[key], self)
+            slot = self.own_slots.pop(key)
+            slot.release()
+            self.mirror(key, slot, removed=list(slot.values))
             return True
         return False
 
     def is_instance(self) -> bool:
         return self.type == Frame.INSTANCE
 
-    def typeof(self, superframe):
-        if superframe in self.superclasses or self.name == superframe:
-            return True
-        return False
+    def typeof(self, superframe) -> bool:
+        # answered by the knowledge base's subsumption index; a frame outside one only knows its own
+        # superclasses
+        if self.kb is not None:
+            return self.kb.typeof(self.name, superframe)
+        return superframe in self.superclasses or self.name == superframe
 
     def __repr__(self):
         return f'{self.type} FRAME (name={self.name}, superclasses={{{", ".join(self.superclasses)}}}, ' \
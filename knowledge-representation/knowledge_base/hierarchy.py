@@ -0,0 +1,145 @@
+class Hierarchy:
+    # Transitive closure of the superclass relation. Every class name gets an interned integer id and two
+    # bitsets (python ints) over those ids: all of its ancestors and all of its descendants. Subsumption is
+    # then a single bit test whatever the depth, and both sets are patched incrementally when an edge changes.
+    def __init__(self):
+        self.ids: {str: int} = {}
+        self.names: [str] = []
+        self.parents: [set] = []
+        self.children: [set] = []
+        self.ancestors: [int] = []
+        self.descendants: [int] = []
+
+    def __contains__(self, name: str):
+        return name in self.ids
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        node = self.ids.get(name)
+        if node is None:
+            node = len(self.names)
+            self.ids[name] = node
+            self.names.append(name)
+            self.parents.append(set())
+            self.children.append(set())
+            self.ancestors.append(0)
+            self.descendants.append(0)
+        return node
+
+    def is_a(self, name: str, super_name: str) -> bool:
+        if name == super_name:
+            return True
+        node = self.ids.get(name)
+        sup = self.ids.get(super_name)
+        if node is None or sup is None:
+            return False
+        return self.ancestors[node] >> sup & 1 == 1
+
+    def has_ancestor(self, node: int, sup: int) -> bool:
+        return self.ancestors[node] >> sup & 1 == 1
+
+    def add_edge(self, name: str, super_name: str) -> bool:
+        node = self.intern(name)
+        sup = self.intern(super_name)
+        if sup in self.parents[node]:
+            return True
+        if node == sup or self.descendants[node] >> sup & 1:
+            return False
+
+        self.parents[node].add(sup)
+        self.children[sup].add(node)
+
+        up = self.ancestors[sup] | 1 << sup
+        down = self.descendants[node] | 1 << node
+        ancestors = self.ancestors
+        descendants = self.descendants
+        for d in bits(down):
+            ancestors[d] |= up
+        for a in bits(up):
+            descendants[a] |= down
+        return True
+
+    def remove_edge(self, name: str, super_name: str) -> bool:
+        node = self.ids.get(name)
+        sup = self.ids.get(super_name)
+        if node is None or sup is None or sup not in self.parents[node]:
+            return False
+
+        self.parents[node].remove(sup)
+        self.children[sup].remove(node)
+
+        affected = self.descendants[node] | 1 << node
+        previous = self.ancestors[node]
+        self.recompute_ancestors(affected)
+
+        # only the old ancestors of the unlinked node can have lost descendants
+        keep = ~affected
+        for a in bits(previous):
+            self.descendants[a] &= keep
+        for d in bits(affected):
+            mask = 1 << d
+            for a in bits(self.ancestors[d]):
+                self.descendants[a] |= mask
+        return True
+
+    def recompute_ancestors(self, affected: int):
+        # Kahn's order over the affected sub-graph so every parent is settled before its children
+        pending = {}
+        for d in bits(affected):
+            pending[d] = sum(1 for p in self.parents[d] if affected >> p & 1)
+        ready = [d for d, count in pending.items() if count == 0]
+        while ready:
+            d = ready.pop()
+            ancestors = 0
+            for p in self.parents[d]:
+                ancestors |= self.ancestors[p] | 1 << p
+            self.ancestors[d] = ancestors
+            for c in self.children[d]:
+                if c in pending:
+                    pending[c] -= 1
+                    if pending[c] == 0:
+                        ready.append(c)
+
+    def unlink(self, name: str):
+        node = self.ids.get(name)
+        if node is None:
+            return
+        for sup in list(self.parents[node]):
+            self.remove_edge(name, self.names[sup])
+
+    def rename(self, name: str, new_name: str):
+        node = self.ids.get(name)
+        if node is None:
+            return
+        parents = [self.names[p] for p in self.parents[node]]
+        children = [self.names[c] for c in self.children[node]]
+        for parent in parents:
+            self.remove_edge(name, parent)
+        for child in children:
+            self.remove_edge(child, name)
+        for parent in parents:
+            self.add_edge(new_name, parent)
+        for child in children:
+            self.add_edge(child, new_name)
+
+    def ancestors_of(self, name: str) -> set:
+        node = self.ids.get(name)
+        if node is None:
+            return set()
+        return {self.names[a] for a in bits(self.ancestors[node])}
+
+    def descendants_of(self, name: str) -> set:
+        node = self.ids.get(name)
+        if node is None:
+            return set()
+        return {self.names[d] for d in bits(self.descendants[node])}
+
+
+def bits(mask: int):
+    digits = bin(mask)[:1:-1]
+    i = digits.find('1')
+    while i != -1:
+        yield i
+        i = digits.find('1', i + 1)
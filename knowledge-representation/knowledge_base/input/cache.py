@@ -0,0 +1,100 @@
+from collections import OrderedDict, namedtuple
+
+from knowledge_base.input.lexer import Token, FIXED_TOKENS
+from knowledge_base.input.parser import Parser, ParseError, Node
+from knowledge_base.input.compiler import Param, Plan, Statement
+
+DEFAULT_CACHE_SIZE = 256
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# a spelling of every keyword and punctuation token type, to turn a template back into tokens
+SPELLINGS = {token.token_type: token for token in FIXED_TOKENS.values()}
+
+
+class StatementCache:
+    # Statements that differ only in their literals share a template: the sequence of token types with
+    # every STR left as a parameter. The template is parsed and compiled once and its plan reused.
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def resize(self, maxsize: int):
+        self.maxsize = maxsize
+        while len(self.plans) > max(maxsize, 0):
+            self.plans.popitem(last=False)
+
+    def clear(self):
+        self.plans.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.plans))
+
+    @staticmethod
+    def normalize(statement):
+        template = tuple(tok.token_type for tok in statement)
+        params = [tok.value for tok in statement if tok.token_type == Token.STR]
+        return template, params
+
+    def plan(self, template) -> Plan:
+        plan = self.plans.get(template)
+        if plan is not None:
+            self.hits += 1
+            self.plans.move_to_end(template)
+            return plan
+
+        self.misses += 1
+        plan = self.compile(template)
+        if self.maxsize > 0:
+            self.plans[template] = plan
+            if len(self.plans) > self.maxsize:
+                self.plans.popitem(last=False)
+        return plan
+
+    @staticmethod
+    def compile(template) -> Plan:
+        tokens = []
+        params = 0
+        for token_type in template:
+            if token_type == Token.STR:
+                tokens.append(Token(Token.STR, Param(params)))
+                params += 1
+            else:
+                tokens.append(Token(token_type, token_type))
+
+        parser = Parser(tokens=tokens)
+        statement = parser.statement()
+        if not parser.EOF():
+            parser.fail()
+        return Plan(statement)
+
+    def statement(self, tokens) -> Statement:
+        template, params = self.normalize(tokens)
+        try:
+            plan = self.plan(template)
+        except ParseError:
+            # reparse the real tokens so the error names the offending literal rather than a parameter
+            Parser(tokens=tokens).parse()
+            raise
+        return Statement(plan, params)
+
+    def prepared(self, template, params) -> Statement:
+        # a statement normalized elsewhere, e.g. by a parse_parallel worker process
+        try:
+            plan = self.plan(template)
+        except ParseError:
+            values = iter(params)
+            Parser(tokens=[Token(Token.STR, next(values)) if token_type == Token.STR else SPELLINGS[token_type]
+                           for token_type in template]).parse()
+            raise
+        return Statement(plan, params)
+
+    def parse(self, tokens) -> Node:
+        return self.statement(tokens).node
+
+
+statement_cache = StatementCache()
@@ -0,0 +1,279 @@
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.input.parser import Node
+from knowledge_base.frame import Frame, Slot
+from knowledge_base.query import Condition
+
+
+class InterpreterError(RuntimeError):
+    pass
+
+
+class Param:
+    def __init__(self, index: int):
+        self.index = index
+
+    def __repr__(self):
+        return f'${self.index}'
+
+
+class Plan:
+    # A statement template lowered to run(kb, params): a closure over the KnowledgeBase call it makes,
+    # with every literal read straight out of params by position. Nothing prints; an ASK returns its
+    # answer for run() to print (or a server to send), and an extent query returns a lazy iterator of
+    # frames, with streams set so that run() prints it as it goes. operation names the statement in
+    # Metrics.
+    def __init__(self, template: Node):
+        self.template = template
+        self.kind = template.type
+        self.operation = operation(template)
+        self.streams = template.type == Node.ASK and template.children[0].type in STREAMED
+        self.run = compile_template(template)
+
+    def bind(self, params) -> Node:
+        return self._bind(self.template, params)
+
+    def _bind(self, node: Node, params) -> Node:
+        value = node.value
+        if value.__class__ is Param:
+            value = params[value.index]
+        return Node(node.type, value, [self._bind(c, params) for c in node.children])
+
+
+class Statement:
+    def __init__(self, plan: Plan, params):
+        self.plan = plan
+        self.params = params
+
+    def __call__(self, kb: KnowledgeBase):
+        if kb.metrics is None:
+            return self.plan.run(kb, self.params)
+        return kb.metrics.statement(self, kb)
+
+    @property
+    def kind(self):
+        return self.plan.kind
+
+    @property
+    def node(self) -> Node:
+        return self.plan.bind(self.params)
+
+    def __repr__(self):
+        return f'Statement(kind={self.kind}, params={self.params})'
+
+
+def execute(kb: KnowledgeBase, statements) -> None:
+    for statement in statements:
+        run(kb, statement)
+
+
+def run(kb: KnowledgeBase, statement: Statement):
+    result = statement(kb)
+    if statement.plan.streams:
+        for frame in result:
+            print(frame.name)
+    elif statement.plan.kind == Node.ASK:
+        print(result)
+        return result
+
+
+def compile(node: Node) -> Statement:
+    params = []
+    template = templatize(node, params)
+    return Statement(Plan(template), params)
+
+
+def templatize(node: Node, params) -> Node:
+    value = node.value
+    if (node.type == Node.LITERAL or node.type == Node.DELETE_FRAME) and value.__class__ is not Param:
+        value = Param(len(params))
+        params.append(node.value)
+    return Node(node.type, value, [templatize(c, params) for c in node.children])
+
+
+def operation(template: Node) -> str:
+    # TELL ADD_FRAME, TELL ADD_SUPER, ASK INSTANCES, ...
+    node = template.children[0] if template.children else None
+    if node is not None and node.type == Node.UPDATE_FRAME and node.children:
+        node = node.children[0]
+    return template.type if node is None else f'{template.type} {node.type}'
+
+
+def compile_template(node: Node):
+    match node.type:
+        case Node.TELL:
+            return compile_tell(node.children[0])
+        case Node.ASK:
+            return compile_ask(node.children[0])
+        case _:
+            raise InterpreterError(f"Illegal node {node}")
+
+
+def index(node: Node) -> int:
+    return node.value.index
+
+
+def indexes(nodes) -> list:
+    return [index(n) for n in nodes]
+
+
+def compile_tell(node: Node):
+    match node.type:
+        case Node.ADD_FRAME:
+            return compile_add_frame(node)
+        case Node.DELETE_FRAME:
+            frame = index(node)
+            return lambda kb, p: kb.delete_frame(p[frame])
+        case Node.UPDATE_FRAME:
+            return compile_update_frame(node.children[0])
+        case _:
+            raise InterpreterError(f"Illegal tell operation {node}")
+
+
+def compile_add_frame(node: Node):
+    children = node.children
+
+    frame_type = children[0].value
+    frame_name = index(children[1])
+    superclasses = []
+    slots = []
+
+    for child in children[2:]:
+        if child.type == Node.LITERAL_LIST:
+            superclasses = indexes(child.children)
+        else:
+            slots.extend(compile_slot(slot) for slot in child.children)
+
+    def run(kb, p):
+        return kb.add_frame(Frame(frame_type, p[frame_name], {p[i] for i in superclasses},
+                                  {p[name]: Slot(None if value is None else p[value],
+                                                 None if facets is None else [p[i] for i in facets])
+                                   for name, value, facets in slots}))
+
+    return run
+
+
+def compile_slot(slot: Node):
+    name = index(slot.children[0])
+    value = None
+    facets = None
+    for child in slot.children[1:]:
+        if child.type == Node.LITERAL:
+            value = index(child)
+        elif child.type == Node.FACET_LIST:
+            facets = indexes(child.children)
+    return name, value, facets
+
+
+def compile_update_frame(node: Node):
+    children = node.children
+    match node.type:
+        case Node.UPDATE_TYPE:
+            target, new_type = index(children[0]), children[1].value
+            return lambda kb, p: kb.update_type(p[target], new_type)
+        case Node.UPDATE_NAME:
+            target, new_name = indexes(children)
+            return lambda kb, p: kb.update_name(p[target], p[new_name])
+        case Node.ADD_SUPER:
+            target, superclass = indexes(children)
+            return lambda kb, p: kb.add_superclass(p[target], p[superclass])
+        case Node.DELETE_SUPER:
+            target, superclass = indexes(children)
+            return lambda kb, p: kb.remove_superclass(p[target], p[superclass])
+        case Node.ADD_SLOT:
+            target = index(children[0])
+            slot = children[1].children
+            slot_name = index(slot[0])
+            slot_value = index(slot[1]) if len(slot) >= 2 and slot[1].type == Node.LITERAL else None
+            if slot_value is None:
+                return lambda kb, p: kb.add_slot(p[target], p[slot_name], None)
+            return lambda kb, p: kb.add_slot(p[target], p[slot_name], p[slot_value])
+        case Node.DELETE_SLOT:
+            target, slot_name = indexes(children)
+            return lambda kb, p: kb.delete_slot(p[target], p[slot_name])
+        case Node.ADD_VALUE | Node.DELETE_VALUE | Node.ADD_FACET | Node.DELETE_FACET | Node.UPDATE_SLOT_VALUE:
+            frame_name, slot_name, value = indexes(children)
+            method = SLOT_METHODS[node.type]
+            return lambda kb, p: getattr(kb, method)(p[frame_name], p[slot_name], p[value])
+        case _:
+            raise InterpreterError(f"Illegal node {node}")
+
+
+STREAMED = {Node.INSTANCES, Node.DESCENDANTS}
+
+# by name, so that a plan runs against anything with the KnowledgeBase methods (see ShardedKnowledgeBase)
+SLOT_METHODS = {
+    Node.ADD_VALUE: 'add_value',
+    Node.DELETE_VALUE: 'delete_value',
+    Node.ADD_FACET: 'add_facet',
+    Node.DELETE_FACET: 'delete_facet',
+    Node.UPDATE_SLOT_VALUE: 'update_value',
+}
+
+
+def compile_ask(node: Node):
+    if node is None:
+        raise InterpreterError("Illegal ask operation")
+
+    if node.type == Node.KB:
+        return lambda kb, p: kb
+    if node.type == Node.STATS:
+        return lambda kb, p: 'Metrics are off' if kb.metrics is None else kb.metrics
+    if node.type == Node.WHERE:
+        query = compile_query(node)
+        return lambda kb, p: [frame.name for frame in query(kb, p)]
+    if node.type == Node.EXPLAIN:
+        query = compile_query(node.children[0])
+        return lambda kb, p: query(kb, p).explain()
+
+    frame_name = index(node.children[0])
+    match node.type:
+        case Node.ASK_FRAME:
+            return lambda kb, p: kb.get_frame(p[frame_name])
+        case Node.TYPE:
+            return ask_frame(frame_name, lambda kb, frame, p: frame.type)
+        case Node.SLOTS:
+            return ask_frame(frame_name, lambda kb, frame, p: frame.slots)
+        case Node.SUPERS:
+            return ask_frame(frame_name, lambda kb, frame, p: frame.superclasses)
+        case Node.SUBS:
+            return ask_frame(frame_name, lambda kb, frame, p: frame.subclasses)
+        case Node.SLOT:
+            slot_name = index(node.children[1])
+            return ask_frame(frame_name, lambda kb, frame, p: frame.slots[p[slot_name]]
+                             if p[slot_name] in frame.slots else 'Not a slot')
+        case Node.TYPEOF:
+            super_name = index(node.children[1])
+            return ask_frame(frame_name, lambda kb, frame, p: kb.typeof(frame.name, p[super_name]))
+        case Node.SUBBEDBY:
+            sub_name = index(node.children[1])
+            return ask_frame(frame_name, lambda kb, frame, p: p[sub_name] in frame.subclasses)
+        case Node.INSTANCES | Node.DESCENDANTS:
+            query = compile_query(node)
+            return lambda kb, p: iter(query(kb, p))
+        case _:
+            raise InterpreterError(f"Illegal ask operation {node}")
+
+
+def compile_query(node: Node):
+    # a QueryPlan is made per run, so it is costed against the statistics of the moment
+    if node.type == Node.WHERE:
+        class_name, frame_type, children = None, None, node.children
+    else:
+        class_name = index(node.children[0])
+        frame_type = Frame.INSTANCE if node.type == Node.INSTANCES else None
+        children = node.children[1:]
+    conditions = [(index(c.children[0]), c.value, index(c.children[1])) for c in children]
+
+    def run(kb, p):
+        return kb.query(None if class_name is None else p[class_name],
+                        [Condition(p[s], op, p[v]) for s, op, v in conditions], frame_type)
+
+    return run
+
+
+def ask_frame(frame_name: int, answer):
+    def run(kb, p):
+        frame = kb.get_frame(p[frame_name])
+        return answer(kb, frame, p) if frame is not None else None
+
+    return run
@@ -1,4 +1,4 @@
-import string
+import re
 
 
 class LexerError(RuntimeError):
@@ -6,6 +6,7 @@ class LexerError(RuntimeError):
 
 
 class Token:
+    __slots__ = ('token_type', 'value', 'pos')
     TELL = 'TELL'
     ADD = 'ADD'
     CLASS = 'CLASS'
@@ -25,6 +26,12 @@ class Token:
     CL_CURLY = 'CL_CURLY'
     COMMA = 'COMMA'
     COLON = 'COLON'
+    EQUALS = 'EQUALS'
+    NOT_EQUALS = 'NOT_EQUALS'
+    LESS = 'LESS'
+    LESS_EQUAL = 'LESS_EQUAL'
+    GREATER = 'GREATER'
+    GREATER_EQUAL = 'GREATER_EQUAL'
     STR = 'STR'
     TO = 'TO'
 
@@ -37,6 +44,13 @@ class Token:
     DELETE_VALUE = 'DELETE_VALUE'
     TYPEOF = 'TYPEOF'
     SUBBEDBY = 'SUBBEDBY'
+    WHERE = 'WHERE'
+    AND = 'AND'
+    INSTANCES = 'INSTANCES'
+    DESCENDANTS = 'DESCENDANTS'
+    OF = 'OF'
+    EXPLAIN = 'EXPLAIN'
+    STATS = 'STATS'
 
     TYPES = {
         TELL: TELL,
@@ -60,6 +74,13 @@ class Token:
         DELETE_VALUE: DELETE_VALUE,
         TYPEOF: TYPEOF,
         SUBBEDBY: SUBBEDBY,
+        WHERE: WHERE,
+        AND: AND,
+        INSTANCES: INSTANCES,
+        DESCENDANTS: DESCENDANTS,
+        OF: OF,
+        EXPLAIN: EXPLAIN,
+        STATS: STATS,
         "(": OP_PAREN,
         ")": CL_PAREN,
         "[": OP_SQUARE,
@@ -68,11 +89,18 @@ class Token:
         "}": CL_CURLY,
         ",": COMMA,
         ":": COLON,
+        "=": EQUALS,
+        "!=": NOT_EQUALS,
+        "<": LESS,
+        "<=": LESS_EQUAL,
+        ">": GREATER,
+        ">=": GREATER_EQUAL,
     }
 
-    def __init__(self, token_type, value):
+    def __init__(self, token_type, value, pos=0):
         self.token_type = token_type
         self.value = value
+        self.pos = pos
 
     def __repr__(self):
         return f"Token(type={self.token_type}, value={self.value})"
@@ -85,56 +113,54 @@ class Token:
             return Token.STR
 
 
+# Keyword and punctuation tokens carry no position and are never mutated, so one shared instance per
+# spelling is handed out instead of allocating a new Token for every occurrence.
+FIXED_TOKENS = {value: Token(token_type, value) for value, token_type in Token.TYPES.items()}
+
+WHITESPACE = re.compile(r'[ \t\n\r\x0b\x0c]*')
+SCANNER = re.compile(r'[ \t\n\r\x0b\x0c]*(?:([A-Z0-9_]+)|"([A-Z0-9_]+)"|(!=|<=|>=|[()\[\]{},:=<>]))')
+WORD, QUOTED, PUNCTUATION = 1, 2, 3
+
+
 class Tokenizer:
     def __init__(self, text: str = ""):
         self.text = text.upper()
         self.end = len(self.text)
-        self.start = 0
         self.idx = 0
 
+    def __iter__(self):
+        text = self.text
+        match = SCANNER.match
+        fixed = FIXED_TOKENS.get
+        m = match(text, self.idx)
+        while m is not None:
+            kind = m.lastindex
+            value = m.group(kind)
+            if kind == QUOTED:
+                yield Token(Token.STR, value, m.start(kind))
+            else:
+                yield fixed(value) or Token(Token.STR, value, m.start(kind))
+            self.idx = m.end()
+            m = match(text, self.idx)
+        self.check_end()
+
     def has_next_token(self):
-        return self.end > self.idx
+        return self.end > WHITESPACE.match(self.text, self.idx).end()
 
     def next_token(self):
-        if not self.has_next_token():
+        m = SCANNER.match(self.text, self.idx)
+        if m is None:
+            self.check_end()
             return None
 
-        self.idx = self.start
-        cur = self.text[self.idx]
-        match cur:
-            case '(' | ')' | '[' | ']' | '{' | '}' | ',' | ':':
-                self.idx += 1
-                self.start = self.idx
-                return Token(Token.type(cur), cur)
-            case '"':
-                return self.qstring()
-            case _:
-                # if whitespace skip
-                if cur in string.whitespace:
-                    self.idx += 1
-                    self.start = self.idx
-                    return self.next_token()
-                else:
-                    return self.string()
-
-    def qstring(self):
-        self.idx += 1
-        s = self.string()
-        s.token_type = Token.STR
-        self.idx += 1
-        return s
-
-    def string(self):
-        cur = self.text[self.idx] if self.has_next_token() else ''
-
-        if cur in string.ascii_letters or cur in string.digits or cur == '_':
-            while (cur in string.ascii_letters or cur in string.digits or cur == '_') and self.has_next_token():
-                self.idx += 1
-                cur = self.text[self.idx] if self.has_next_token() else ''
-
-            tok = self.text[self.start:self.idx].upper()
-            self.start = self.idx
-            return Token(Token.type(tok), tok)
-
-        raise LexerError(f"Unexpected token: {cur}")
-
+        self.idx = m.end()
+        kind = m.lastindex
+        value = m.group(kind)
+        if kind == QUOTED:
+            return Token(Token.STR, value, m.start(kind))
+        return FIXED_TOKENS.get(value) or Token(Token.STR, value, m.start(kind))
+
+    def check_end(self):
+        self.idx = WHITESPACE.match(self.text, self.idx).end()
+        if self.idx < self.end:
+            raise LexerError(f"Unexpected token: {self.text[self.idx]}")
@@ -0,0 +1,141 @@
+import re
+import string
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.input.lexer import Tokenizer
+from knowledge_base.input.parser import split_statements
+from knowledge_base.input.cache import StatementCache, statement_cache
+from knowledge_base.input.compiler import run
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+# characters of script sent to a parse_parallel worker at a time
+DEFAULT_PARALLEL_CHUNK_SIZE = 1 << 20
+# a TELL or ASK keyword, which always starts a statement: a whole word after whitespace, not quoted
+STATEMENT_START = re.compile(r'(?<=[ \t\n\r\x0b\x0c])(?:TELL|ASK)(?=[^A-Z0-9_])', re.IGNORECASE)
+
+
+def chunks(stream, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # Every chunk ends on whitespace so no token is ever split between two chunks.
+    rest = ''
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+
+        data = rest + data
+        cut = max(data.rfind(c) for c in string.whitespace) + 1
+        rest = data[cut:]
+        if cut:
+            yield data[:cut]
+
+    if rest:
+        yield rest
+
+
+def statement_chunks(stream, chunk_size: int = DEFAULT_PARALLEL_CHUNK_SIZE):
+    # Like chunks, but every chunk ends where a statement starts, so chunks can be parsed independently.
+    rest = ''
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+
+        data = rest + data
+        cut = last_statement_start(data)
+        rest = data[cut:]
+        if cut:
+            yield data[:cut]
+
+    if rest:
+        yield rest
+
+
+def last_statement_start(data: str, window: int = 1 << 12) -> int:
+    # searched for backwards a window at a time, since statements are short and chunks are not
+    end = len(data)
+    while True:
+        start = max(end - window, 1)
+        cut = 0
+        for match in STATEMENT_START.finditer(data, start, end):
+            cut = match.start()
+        if cut or start == 1:
+            return cut
+        # windows overlap by a keyword, so one across the boundary is still seen whole
+        end = start + len('TELL')
+
+
+def tokens(stream, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    for chunk in chunks(stream, chunk_size):
+        yield from Tokenizer(chunk)
+
+
+def statements(stream, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return split_statements(tokens(stream, chunk_size))
+
+
+def parse_stream(stream, chunk_size: int = DEFAULT_CHUNK_SIZE, cache: StatementCache = statement_cache):
+    for statement in statements(stream, chunk_size):
+        yield cache.parse(statement)
+
+
+def compile_stream(stream, chunk_size: int = DEFAULT_CHUNK_SIZE, cache: StatementCache = statement_cache):
+    for statement in statements(stream, chunk_size):
+        yield cache.statement(statement)
+
+
+def normalize_chunk(text: str) -> list:
+    # Runs in a parse_parallel worker: the chunk's statements as (template, params) pairs, which pickle
+    # compactly since the statements of a chunk share one tuple per distinct template.
+    templates = {}
+    normalized = []
+    for statement in split_statements(Tokenizer(text)):
+        template, params = StatementCache.normalize(statement)
+        normalized.append((templates.setdefault(template, template), params))
+    return normalized
+
+
+def parse_parallel(stream, workers: int, chunk_size: int = DEFAULT_PARALLEL_CHUNK_SIZE,
+                   cache: StatementCache = statement_cache):
+    # Tokenizing is spread over a pool of worker processes, a chunk of whole statements each; the plans
+    # are compiled here, through the cache, and come out in script order. Only a couple of chunks per
+    # worker are read ahead, however large the script.
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in statement_chunks(stream, chunk_size):
+            pending.append(pool.submit(normalize_chunk, chunk))
+            if len(pending) > 2 * workers:
+                for template, params in pending.popleft().result():
+                    yield cache.prepared(template, params)
+        while pending:
+            for template, params in pending.popleft().result():
+                yield cache.prepared(template, params)
+
+
+def load_stream(kb: KnowledgeBase, stream, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                cache: StatementCache = statement_cache):
+    for statement in compile_stream(stream, chunk_size, cache):
+        run(kb, statement)
+        yield statement
+
+
+def load_parallel(kb: KnowledgeBase, stream, workers: int, chunk_size: int = DEFAULT_PARALLEL_CHUNK_SIZE,
+                  cache: StatementCache = statement_cache):
+    for statement in parse_parallel(stream, workers, chunk_size, cache):
+        run(kb, statement)
+        yield statement
+
+
+def load_file(kb: KnowledgeBase, path: str, chunk_size: int = None,
+              cache: StatementCache = statement_cache, workers: int = 0) -> int:
+    # with workers, the script is parsed by that many processes while this one applies it
+    count = 0
+    with open(path) as stream:
+        if workers:
+            loaded = load_parallel(kb, stream, workers, chunk_size or DEFAULT_PARALLEL_CHUNK_SIZE, cache)
+        else:
+            loaded = load_stream(kb, stream, chunk_size or DEFAULT_CHUNK_SIZE, cache)
+        for _ in loaded:
+            count += 1
+    return count
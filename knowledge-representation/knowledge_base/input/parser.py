@@ -6,6 +6,7 @@ class ParseError(RuntimeError):
 
 
 class Node:
+    __slots__ = ('type', 'value', 'children')
     TELL = 'TELL'
 
     ADD_FRAME = 'ADD_FRAME'
@@ -44,6 +45,21 @@ class Node:
     SUBBEDBY = 'SUBBEDBY'
     ADD_VALUE = 'ADD_VALUE'
     DELETE_VALUE = 'DELETE_VALUE'
+    WHERE = 'WHERE'
+    CONDITION = 'CONDITION'
+    INSTANCES = 'INSTANCES'
+    DESCENDANTS = 'DESCENDANTS'
+    EXPLAIN = 'EXPLAIN'
+    STATS = 'STATS'
+
+    OPERATORS = {
+        Token.EQUALS: '=',
+        Token.NOT_EQUALS: '!=',
+        Token.LESS: '<',
+        Token.LESS_EQUAL: '<=',
+        Token.GREATER: '>',
+        Token.GREATER_EQUAL: '>=',
+    }
 
     def __init__(self, type=None, value=None, children=None):
         if children is None:
@@ -69,13 +85,25 @@ class Node:
         return s
 
 
+def split_statements(tokens):
+    statement = []
+    for tok in tokens:
+        if (tok.token_type == Token.TELL or tok.token_type == Token.ASK) and statement:
+            yield statement
+            statement = []
+        statement.append(tok)
+
+    if statement:
+        yield statement
+
+
 class Parser:
-    def __init__(self, text: str):
-        self.tokenizer = Tokenizer(text)
-        self.lookahead = self.tokenizer.next_token()
+    def __init__(self, text: str = "", tokens=None):
+        self.tokens = iter(Tokenizer(text)) if tokens is None else iter(tokens)
+        self.lookahead = next(self.tokens, None)
 
     def advance(self):
-        self.lookahead = self.tokenizer.next_token()
+        self.lookahead = next(self.tokens, None)
 
     def eat(self, token_type: str) -> str:
         if self.lookahead is None:
@@ -98,16 +126,19 @@ class Parser:
         root = Node()
 
         while not self.EOF():
-            match self.lookahead.token_type:
-                case Token.TELL:
-                    root.add_child(self.tell())
-                case Token.ASK:
-                    root.add_child(self.ask())
-                case _:
-                    self.fail()
+            root.add_child(self.statement())
 
         return root
 
+    def statement(self) -> Node:
+        match self.lookahead.token_type:
+            case Token.TELL:
+                return self.tell()
+            case Token.ASK:
+                return self.ask()
+            case _:
+                self.fail()
+
     def tell(self) -> Node:
         self.advance()
 
@@ -259,6 +290,17 @@ class Parser:
             self.eat(Token.KB)
             return Node(Node.ASK, None, [Node(Node.KB)])
 
+        if self.lookahead.token_type == Token.STATS:
+            self.eat(Token.STATS)
+            return Node(Node.ASK, None, [Node(Node.STATS)])
+
+        if self.lookahead.token_type == Token.EXPLAIN:
+            self.eat(Token.EXPLAIN)
+            return Node(Node.ASK, None, [Node(Node.EXPLAIN, None, [self.query()])])
+
+        if self.lookahead.token_type in (Token.WHERE, Token.INSTANCES, Token.DESCENDANTS):
+            return Node(Node.ASK, None, [self.query()])
+
         frame_name = self.literal()
         child = None
 
@@ -290,6 +332,35 @@ class Parser:
 
         return Node(Node.ASK, None, [child])
 
+    def query(self) -> Node:
+        # ask where spoiled = yes
+        # ask instances of food where spoiled = yes and lifespan < 3
+        # ask descendants of food
+        if self.lookahead.token_type == Token.WHERE:
+            query = Node(Node.WHERE)
+        else:
+            query = Node(Node.INSTANCES if self.lookahead.token_type == Token.INSTANCES else Node.DESCENDANTS)
+            self.advance()
+            self.eat(Token.OF)
+            query.add_child(self.literal())
+        if query.type == Node.WHERE or not self.EOF() and self.lookahead.token_type == Token.WHERE:
+            self.eat(Token.WHERE)
+            query.add_child(self.condition())
+            while not self.EOF() and self.lookahead.token_type == Token.AND:
+                self.eat(Token.AND)
+                query.add_child(self.condition())
+        return query
+
+    def condition(self) -> Node:
+        slot_name = self.literal()
+        if self.lookahead is None:
+            raise ParseError(f"unexpected end of input")
+        op = Node.OPERATORS.get(self.lookahead.token_type)
+        if op is None:
+            self.fail()
+        self.advance()
+        return Node(Node.CONDITION, op, [slot_name, self.literal()])
+
     def list(self, ls_type, op_tok, cl_tok, element) -> Node:
         self.eat(op_tok)
         ls = Node(ls_type)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+from collections.abc import Mapping, Set
+from concurrent.futures import ThreadPoolExecutor
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.frame import Frame, Slot
+from knowledge_base.versions import Versions
+from knowledge_base.metrics import Metrics
+from knowledge_base.input.lexer import Tokenizer
+from knowledge_base.input.parser import Node, split_statements
+from knowledge_base.input.cache import StatementCache, statement_cache
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 7070
+# longest request line accepted; a longer one is answered with an error and its connection closed
+DEFAULT_LINE_LIMIT = 1 << 20
+# bytes of responses a connection may have waiting to be sent before the server stops reading from it
+DEFAULT_HIGH_WATER = 1 << 16
+
+
+class Server:
+    # KRL over TCP: one request per line, holding one or more statements, and one JSON line per request in
+    # return, in order: {"ok": true, "results": [...]} with a result per statement, or {"ok": false,
+    # "error": ...} with the results of the statements that ran before the failing one. A client may
+    # pipeline as many requests as it likes. The next request is read only once the previous answer is
+    # queued and the connection's send buffer is under its high-water mark, so a client that stops
+    # reading is held back by TCP instead of piling answers up in memory. A request runs whole on the
+    # event loop; requests from different connections interleave between lines, never inside one.
+    # With readers, requests run on threads instead: ASK-only lines on a pool of that many, each against
+    # a consistent published version, and lines with TELLs on one writer thread (see Versions).
+    def __init__(self, kb: KnowledgeBase, cache: StatementCache = statement_cache,
+                 line_limit: int = DEFAULT_LINE_LIMIT, high_water: int = DEFAULT_HIGH_WATER, readers: int = 0):
+        self.kb = kb
+        self.cache = cache
+        self.line_limit = line_limit
+        self.high_water = high_water
+        self.versions = Versions(kb) if readers else None
+        self.readers = ThreadPoolExecutor(readers, thread_name_prefix='ask') if readers else None
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix='tell') if readers else None
+        self.connections = 0
+        self.requests = 0
+
+    def respond(self, line: str) -> dict:
+        try:
+            statements = self.parse(line)
+        except Exception as e:
+            return failure(e, [])
+        return self.execute(statements)
+
+    async def answer(self, line: str) -> dict:
+        if self.versions is None:
+            return self.respond(line)
+        try:
+            statements = self.parse(line)
+        except Exception as e:
+            return failure(e, [])
+        reading = all(statement.kind == Node.ASK for statement in statements)
+        return await asyncio.get_running_loop().run_in_executor(self.readers if reading else self.writer,
+                                                                self.execute, statements)
+
+    def parse(self, line: str) -> list:
+        self.requests += 1
+        return [self.cache.statement(tokens) for tokens in split_statements(Tokenizer(line))]
+
+    def execute(self, statements) -> dict:
+        results = []
+        try:
+            if self.versions is None:
+                run(self.kb, statements, results)
+            elif all(statement.kind == Node.ASK for statement in statements):
+                with self.versions.read() as kb:
+                    run(kb, statements, results)
+            else:
+                self.versions.write(lambda kb: run(kb, statements, results))
+        except Exception as e:
+            # a bad request fails on its own; the connection and the server carry on
+            return failure(e, results)
+        return {'ok': True, 'results': results}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        writer.transport.set_write_buffer_limits(high=self.high_water)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(dump({'ok': False, 'error': f'request longer than {self.line_limit} bytes'}))
+                    break
+                if not line:
+                    break
+                writer.write(dump(await self.answer(line.decode(errors='replace'))))
+                await writer.drain()
+                # a client with a deep pipeline would otherwise keep the loop until its buffer ran dry
+                await asyncio.sleep(0)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=self.line_limit)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f'listening on {host}:{port}', flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if self.versions is not None:
+                self.readers.shutdown()
+                self.writer.shutdown()
+                self.versions.close()
+
+
+def serve(kb: KnowledgeBase, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, **options):
+    try:
+        asyncio.run(Server(kb, **options).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+def run(kb: KnowledgeBase, statements, results: list):
+    for statement in statements:
+        result = statement(kb)
+        if statement.plan.streams:
+            result = [frame.name for frame in result]
+        results.append(encode(result))
+
+
+def failure(error: Exception, results: list) -> dict:
+    return {'ok': False, 'error': f'{type(error).__name__}: {error}', 'results': results}
+
+
+def encode(value):
+    # answers as JSON values: frames and slots as objects, name sets as sorted lists
+    match value:
+        case None | bool() | int() | float() | str():
+            return value
+        case Frame():
+            return {'name': value.name, 'type': value.type, 'superclasses': sorted(value.superclasses),
+                    'subclasses': sorted(value.subclasses),
+                    'slots': {name: encode(slot) for name, slot in value.slots.items()}}
+        case Slot():
+            return {'values': [encode(v) for v in value.values], 'facets': list(value.facets)}
+        case Metrics():
+            return value.report()
+        case Mapping():
+            return {str(k): encode(v) for k, v in value.items()}
+        case Set():
+            return sorted(map(str, value))
+        case list() | tuple():
+            return [encode(v) for v in value]
+    return str(value)
+
+
+def dump(response: dict) -> bytes:
+    return json.dumps(response, separators=(',', ':')).encode() + b'\n'
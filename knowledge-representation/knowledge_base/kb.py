@@ -1,147 +1,368 @@
-import copy
 from knowledge_base.frame import Frame, Slot
+from knowledge_base.hierarchy import Hierarchy, bits
+from knowledge_base.planner import QueryPlan, Statistics
+from knowledge_base.columns import Columns, Column, ColumnError, column_number, from_number
+from knowledge_base.slot_index import SlotIndex
+from knowledge_base.reasoning.daemons import Daemons
+from knowledge_base.reasoning.spoilage import FoodSpoilage
+from knowledge_base.metrics import Metrics, attach, detach
+from knowledge_base import snapshot, wal
+
+DEFAULT_RULES = (FoodSpoilage,)
+
+
+def logged(method):
+    # Appends a successful call to the write-ahead log, if one is attached. Calls made while another
+    # logged call is running (daemons, add_superclass -> add_subclass) are left out: replaying the outer
+    # call makes them again.
+    op = method.__name__
+
+    def run(self, *args):
+        if self.wal is None or self.journaling:
+            return method(self, *args)
+        record = wal.encode(op, args)
+        self.journaling = True
+        try:
+            result = method(self, *args)
+        finally:
+            self.journaling = False
+        if result is not False:
+            self.wal.append(record)
+        return result
+
+    run.__name__ = op
+    return run
+
+
+class BulkLoad:
+    def __init__(self, kb):
+        self.kb = kb
+        self.dangling: {str: list} = {}
+        self.cycles: {str: list} = {}
+
+    def __enter__(self):
+        self.kb.begin_bulk()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.kb.end_bulk():
+            self.dangling = self.kb.dangling
+            self.cycles = self.kb.cycles
+        return False
 
 
 class KnowledgeBase:
     ADD_FRAME = 'ADD_FRAME'
     UPDATE_VALUE = 'UPDATE_VALUE'
     DELETE_FRAME = 'DELETE_FRAME'
+    ADD_SLOT = 'ADD_SLOT'
+    DELETE_SLOT = 'DELETE_SLOT'
 
-    def __init__(self):
+    def __init__(self, rules=DEFAULT_RULES):
+        self.frames: {str: Frame} = {}
         self.class_frames: {str: Frame} = {}
         self.instance_frames: {str: Frame} = {}
+        self.extents = {Frame.CLASS: self.class_frames, Frame.INSTANCE: self.instance_frames}
+        self.hierarchy = Hierarchy()
+        # class name -> the frames naming it as a direct superclass
+        self.members: {str: {str: Frame}} = {}
+        self.slot_index = SlotIndex()
+        self.statistics = Statistics(self)
+        self.columns = Columns(self)
+        self.daemons = Daemons()
+        self.rules = [rule(self) for rule in rules]
+        self.bulk_depth = 0
+        self.pending: [Frame] = []
+        self.dangling: {str: list} = {}
+        # frame name -> the superclasses of a bulk load refused because the edge would close a cycle
+        self.cycles: {str: list} = {}
+        self.wal = None
+        self.journaling = False
+        self.metrics = None
         # self.cache = []
 
     # v0.1
+    @logged
     def add_frame(self, frame: Frame) -> bool:
-        if self.has_frame(frame.name):
+        if frame.name in self.frames:
             return False
 
-        if frame.type == Frame.INSTANCE:
-            self.instance_frames[frame.name] = frame
-        elif frame.type == Frame.CLASS:
-            self.class_frames[frame.name] = frame
-        self.validate(frame, operation=self.ADD_FRAME)
+        self.retype((frame,))
+        self.index(frame)
+        if self.bulk_depth:
+            self.pending.append(frame)
+        else:
+            self.relate(frame)
+            self.validate(frame, operation=self.ADD_FRAME)
+        return True
+
+    def index(self, frame: Frame):
+        self.frames[frame.name] = frame
+        self.extents[frame.type][frame.name] = frame
+        frame.kb = self
+        self.slot_index.add_frame(frame)
+
+    def retype(self, frames):
+        # converts slot values by their facets; run again over frames added together, so that a value
+        # naming a frame added after its own resolves too
+        for frame in frames:
+            for slot in frame.own_slots.values():
+                slot.retype(self)
+
+    def relate(self, frame: Frame):
+        # a frame just added joins its SYMMETRIC relations from both ends: the frames its values name, and
+        # the frames already naming it
+        for key, slot in list(frame.own_slots.items()):
+            frame.mirror(key, slot, added=list(slot.values))
+        for key in self.slot_index.symmetric_slots:
+            for source in list(self.slot_index.lookup(key, frame.name)):
+                source.mirror(key, source.own_slots[key], added=(frame.name,))
+
+    def related(self, slot_name: str, frame_name: str) -> list:
+        # frames whose slot_name names frame_name, from the slot index rather than a scan
+        return list(self.slot_index.lookup(slot_name, frame_name))
+
+    def save(self, path: str):
+        snapshot.save(self, path)
+
+    @classmethod
+    def load(cls, path: str, rules=DEFAULT_RULES):
+        return snapshot.load(path, cls(rules))
+
+    @classmethod
+    def open(cls, directory: str, rules=DEFAULT_RULES, **options):
+        # recovers the knowledge base from its write-ahead log directory and keeps logging to it
+        return wal.WriteAheadLog(directory, **options).open(cls, rules)
+
+    def add_frames(self, frames) -> dict:
+        with self.bulk() as batch:
+            for frame in frames:
+                self.add_frame(frame)
+        return batch.dangling
+
+    def bulk(self) -> BulkLoad:
+        # Frames added inside the block are only indexed; their links, inheritance and if-added daemons are
+        # resolved once, superclasses first, when the outermost block exits (or before any other write).
+        # Superclasses still missing then are reported in the block's dangling, and superclass edges refused
+        # for closing a cycle in its cycles.
+        return BulkLoad(self)
+
+    @logged
+    def begin_bulk(self):
+        if self.bulk_depth == 0:
+            self.dangling = {}
+            self.cycles = {}
+        self.bulk_depth += 1
+
+    @logged
+    def end_bulk(self) -> bool:
+        self.bulk_depth -= 1
+        if self.bulk_depth == 0:
+            self.resolve()
+            return True
+        return None
+
+    def resolve(self) -> dict:
+        pending, self.pending = self.pending, []
+        order = self.topological(frame for frame in pending if self.frames.get(frame.name) is frame)
+        cycles = {}
+        for frame in order:
+            refused = self.link_frame(frame)
+            if refused:
+                cycles[frame.name] = refused
+        self.cycles.update(cycles)
+        self.retype(order)
+        for frame in order:
+            self.relate(frame)
+        for frame in order:
+            self.daemons.fire(self, Daemons.IF_ADDED, frame)
+
+        dangling = {}
+        for frame in order:
+            missing = [name for name in frame.superclasses if name not in self.frames]
+            if missing:
+                dangling[frame.name] = missing
+        self.dangling.update(dangling)
+        return dangling
+
+    @staticmethod
+    def topological(frames) -> list:
+        frames = {frame.name: frame for frame in frames}
+        waiting = {name: sum(1 for s in frame.superclasses if s in frames) for name, frame in frames.items()}
+        children = {}
+        for name, frame in frames.items():
+            for super_name in frame.superclasses:
+                if super_name in frames:
+                    children.setdefault(super_name, []).append(name)
+
+        ready = [name for name, count in waiting.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(frames[name])
+            for child in children.get(name, ()):
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    ready.append(child)
+
+        # whatever is left sits on a cycle; linking refuses the closing edge and resolve reports it
+        if len(order) < len(frames):
+            placed = {frame.name for frame in order}
+            order.extend(frame for name, frame in frames.items() if name not in placed)
+        return order
 
     # v0.1
+    @logged
     def delete_frame(self, frame_name: str):
-        if frame_name in self.instance_frames:
-            del self.instance_frames[frame_name]
-
-        if frame_name in self.class_frames:
-            del self.class_frames[frame_name]
-        # TODO: validate delete
-
+        frame = self.frames.get(frame_name)
+        if frame is not None:
+            self.validate(frame, operation=self.DELETE_FRAME)
+            for slot_name in self.slot_index.symmetric_slots:
+                for source in self.related(slot_name, frame_name):
+                    if source is not frame and frame.is_symmetric(source.own_slots[slot_name]):
+                        source.delete_value(slot_name, frame_name)
+            del self.frames[frame_name]
+            del self.extents[frame.type][frame_name]
+            self.hierarchy.unlink(frame_name)
+            for super_name in frame.superclasses:
+                self.unmember(super_name, frame_name)
+            self.slot_index.discard_frame(frame)
+            frame.kb = None
+            if self.columns:
+                self.columns.unlinked(frame)
+
+    @logged
     def update_type(self, frame_name: str, new_type: str):
-        frame = None
-        if frame_name in self.class_frames and new_type == Frame.INSTANCE:
+        frame = self.frames.get(frame_name)
+        if frame is None or frame.type == new_type:
+            return
+
+        if new_type == Frame.INSTANCE:
             # Remove all subclass relations -- Instance frames dont have subclasses
             pass
 
-        if frame_name in self.class_frames or frame_name in self.instance_frames:
-            frame = self.class_frames[frame_name] if frame_name in self.class_frames else self.instance_frames[
-                frame_name]
-            self.delete_frame(frame_name)
-            frame.type = new_type
-            self.add_frame(frame)
+        del self.extents[frame.type][frame_name]
+        frame.type = new_type
+        self.extents[new_type][frame_name] = frame
+        if new_type == Frame.CLASS:
+            self.node(frame_name)
 
+    @logged
     def update_name(self, frame_name: str, new_name: str):
-        frame = None
-        if frame_name in self.class_frames:
-            frame = self.class_frames[frame_name]
-            frame.name = new_name
-            self.delete_frame(frame_name)
-            self.add_frame(frame)
+        frame = self.frames.get(frame_name)
+        if frame is None or new_name in self.frames:
+            return
 
-        # update super-sub relations to use new name
+        del self.frames[frame_name]
+        del self.extents[frame.type][frame_name]
+        frame.name = new_name
+        self.frames[new_name] = frame
+        self.extents[frame.type][new_name] = frame
+        self.hierarchy.rename(frame_name, new_name)
+        for super_name in frame.superclasses:
+            self.unmember(super_name, frame_name)
+            self.members.setdefault(super_name, {})[new_name] = frame
+        if frame_name in self.members:
+            self.members[new_name] = self.members.pop(frame_name)
 
+        # update super-sub relations to use new name
+        for super_name in frame.superclasses:
+            superclass = self.frames.get(super_name)
+            if superclass is not None and frame_name in superclass.subclasses:
+                superclass.subclasses.remove(frame_name)
+                superclass.subclasses.add(new_name)
+        for sub_name in frame.subclasses:
+            subclass = self.frames.get(sub_name)
+            if subclass is not None and frame_name in subclass.superclasses:
+                subclass.superclasses.remove(frame_name)
+                subclass.superclasses.add(new_name)
+
+        # the other ends of its SYMMETRIC relations follow the new name
+        for slot_name in self.slot_index.symmetric_slots:
+            for source in self.related(slot_name, frame_name):
+                if source is not frame:
+                    source.rename_value(slot_name, frame_name, new_name)
+
+    @logged
     def add_superclass(self, frame_name, super_name):
-        if frame_name in self.instance_frames:
-            frame = self.instance_frames[frame_name]
-            if frame.add_superclass(super_name):
-                self.add_subclass(super_name, frame_name)
-        elif frame_name in self.class_frames:
-            frame = self.class_frames[frame_name]
-            if frame.add_superclass(super_name):
-                self.add_subclass(super_name, frame_name)
-
-    def remove_superclass(self, frame_name, super_name):
-        frame = self.instance_frames[frame_name] if frame_name in self.instance_frames \
-            else self.class_frames[frame_name] if frame_name in self.class_frames else None
-
-        if frame is None:
+        frame = self.frames.get(frame_name)
+        if frame is None or super_name in frame.superclasses or not self.link(frame, super_name):
             return
+        frame.add_superclass(super_name)
+        self.add_subclass(super_name, frame_name)
 
-        if frame.remove_superclass(super_name):
+    @logged
+    def remove_superclass(self, frame_name, super_name):
+        frame = self.frames.get(frame_name)
+        if frame is not None and frame.remove_superclass(super_name):
+            self.hierarchy.remove_edge(frame_name, super_name)
+            self.unmember(super_name, frame_name)
+            if self.columns:
+                self.columns.unlinked(frame)
             self.remove_subclass(super_name, frame_name)
 
+    @logged
     def add_subclass(self, frame_name, sub_name):
-        if frame_name in self.instance_frames:
+        frame = self.frames.get(frame_name)
+        if frame is None or frame.is_instance() or sub_name in frame.subclasses:
             return
-        elif frame_name in self.class_frames:
-            frame = self.class_frames[frame_name]
-            if frame.add_subclass(sub_name):
-                self.add_superclass(sub_name, frame_name)
+        sub = self.frames.get(sub_name)
+        if sub is not None and frame_name not in sub.superclasses:
+            self.add_superclass(sub_name, frame_name)
+        else:
+            frame.add_subclass(sub_name)
 
+    @logged
     def remove_subclass(self, frame_name, sub_name):
-        frame = self.instance_frames[frame_name] if frame_name in self.instance_frames \
-            else self.class_frames[frame_name] if frame_name in self.class_frames else None
-
-        if frame is None:
-            return
-
-        if frame.remove_subclass(sub_name):
+        frame = self.frames.get(frame_name)
+        if frame is not None and frame.remove_subclass(sub_name):
             self.remove_superclass(sub_name, frame_name)
 
+    @logged
     def add_slot(self, frame_name, slot_name, slot_value=None):
-        if frame_name in self.instance_frames:
-            frame = self.instance_frames[frame_name]
-            if slot_name in frame.slots:
-                return
-            frame.update_slot(slot_name, slot_value)
-        elif frame_name in self.class_frames:
-            frame = self.class_frames[frame_name]
-            if slot_name in frame.slots:
-                return
+        frame = self.frames.get(frame_name)
+        if frame is not None and slot_name not in frame.slots:
             frame.update_slot(slot_name, slot_value)
+            self.validate(frame, operation=self.ADD_SLOT, slot_name=slot_name)
 
+    @logged
     def update_slot(self, frame_name, slot_name, slot_value=None):
-        if frame_name in self.instance_frames:
-            frame = self.instance_frames[frame_name]
-            frame.update_slot(slot_name, slot_value)
-        elif frame_name in self.class_frames:
-            frame = self.class_frames[frame_name]
+        frame = self.frames.get(frame_name)
+        if frame is not None:
             frame.update_slot(slot_name, slot_value)
+            self.validate(frame, operation=self.UPDATE_VALUE, slot_name=slot_name)
 
+    @logged
     def delete_slot(self, frame_name, slot_name):
-        frame = None
-        if frame_name in self.instance_frames:
-            frame = self.instance_frames[frame_name]
-            frame.remove_slot(slot_name)
-        elif frame_name in self.class_frames:
-            frame = self.class_frames[frame_name]
-            frame.remove_slot(slot_name)
+        frame = self.frames.get(frame_name)
+        if frame is not None and frame.remove_slot(slot_name):
+            self.validate(frame, operation=self.DELETE_SLOT, slot_name=slot_name)
 
+    @logged
     def add_value(self, frame_name, slot_name, val):
         frame: Frame = self.get_frame(frame_name)
-        if frame is not None:
-            frame.add_value(slot_name, val)
+        if frame is not None and frame.add_value(slot_name, val):
+            self.validate(frame, operation=self.UPDATE_VALUE, slot_name=slot_name)
 
+    @logged
     def delete_value(self, frame_name, slot_name, val):
         frame: Frame = self.get_frame(frame_name)
-        if frame is not None:
-            frame.delete_value(slot_name, val)
+        if frame is not None and frame.delete_value(slot_name, val):
+            self.validate(frame, operation=self.UPDATE_VALUE, slot_name=slot_name)
 
+    @logged
     def add_facet(self, frame_name, slot_name, facet):
         frame: Frame = self.get_frame(frame_name)
         if frame is not None:
             frame.add_facet(slot_name, facet)
 
+    @logged
     def delete_facet(self, frame_name, slot_name, facet):
         frame: Frame = self.get_frame(frame_name)
         if frame is not None:
             frame.delete_facet(slot_name, facet)
 
+    @logged
     def update_value(self, frame_name, slot_name, value):
         frame: Frame = self.get_frame(frame_name)
         if frame is not None:
@@ -150,68 +371,177 @@ class KnowledgeBase:
 
     # v0.1
     def has_frame(self, frame_name: str):
-        return frame_name in self.class_frames or frame_name in self.instance_frames
+        return frame_name in self.frames
 
     def get_frame(self, frame_name: str):
-        if frame_name in self.class_frames:
-            return self.class_frames[frame_name]
-        elif frame_name in self.instance_frames:
-            return self.instance_frames[frame_name]
-        return None
+        return self.frames.get(frame_name)
+
+    def find(self, slot_name: str, value):
+        return self.slot_index.lookup(slot_name, value)
+
+    def node(self, frame_name: str):
+        # Class frames (and anything named as a superclass) live in the hierarchy index; instances that
+        # nothing points at stay out of it and are answered from their direct superclasses.
+        if frame_name not in self.hierarchy:
+            self.hierarchy.intern(frame_name)
+            frame = self.frames.get(frame_name)
+            if frame is not None:
+                for super_name in list(frame.superclasses):
+                    self.link(frame, super_name)
+
+    def link(self, frame: Frame, super_name: str) -> bool:
+        self.node(super_name)
+        if frame.type == Frame.CLASS or frame.name in self.hierarchy:
+            linked = self.hierarchy.add_edge(frame.name, super_name)
+        else:
+            linked = super_name != frame.name
+        if linked:
+            self.members.setdefault(super_name, {})[frame.name] = frame
+            if self.columns:
+                self.columns.linked(frame, super_name)
+        return linked
+
+    def columnar(self, class_name: str, slot_name: str) -> Column:
+        # keeps slot_name of every instance below class_name in one numeric column; see Columns
+        return self.columns.create(class_name, slot_name)
+
+    @logged
+    def add_to_column(self, class_name: str, slot_name: str, delta):
+        # Moves slot_name by delta on every instance below class_name holding a number of its own, at once
+        # when the slot is columnar and frame by frame otherwise (as on a replay, which has no columns); the
+        # frame by frame path moves exactly the slots a column would hold, so both end the same.
+        # Daemons are not fired for bulk updates.
+        column = self.columns.get(class_name, slot_name)
+        if column is not None:
+            column.add_scalar(delta)
+            return
+        for frame in list(self.extent(class_name)):
+            slot = frame.own_slots.get(slot_name)
+            number = column_number(slot) if frame.type == Frame.INSTANCE and slot is not None else None
+            if number is not None:
+                frame.update_slot(slot_name, from_number(number + delta))
+
+    def apply_to_column(self, class_name: str, slot_name: str, function):
+        # function maps the whole column to its new values; an arbitrary function cannot be logged, so this
+        # is refused while TELLs are logged (a write-ahead log, or a Versions batch) -- see add_to_column
+        if self.wal is not None:
+            raise ColumnError('apply_to_column cannot be logged; use add_to_column')
+        column = self.columns.get(class_name, slot_name)
+        if column is None:
+            raise ColumnError(f'{slot_name} of {class_name} is not columnar')
+        column.apply(function)
+
+    def instrument(self, metrics: Metrics = None) -> Metrics:
+        # counts, times and histograms every operation from here on, in metrics (or new ones); see Metrics
+        return attach(self, metrics)
+
+    def uninstrument(self):
+        detach(self)
+
+    def unmember(self, super_name: str, frame_name: str):
+        members = self.members.get(super_name)
+        if members is not None:
+            members.pop(frame_name, None)
+            if not members:
+                del self.members[super_name]
+
+    def extent(self, class_name: str):
+        # Every frame below class_name, lazily: the members of the class and of each of its descendant
+        # classes. Only a frame with several superclasses can be reached twice, so only those are
+        # remembered. Like any dict view, the iterator must not outlive a TELL that changes the extent.
+        node = self.hierarchy.ids.get(class_name)
+        names = [class_name] if node is None else \
+            (self.hierarchy.names[d] for d in bits(self.hierarchy.descendants[node] | 1 << node))
+        seen = set()
+        for name in names:
+            for frame in self.members.get(name, {}).values():
+                if len(frame.superclasses) > 1:
+                    if frame.name in seen:
+                        continue
+                    seen.add(frame.name)
+                yield frame
+
+    def query(self, class_name: str = None, conditions=(), frame_type: str = None) -> QueryPlan:
+        return QueryPlan(self, class_name, conditions, frame_type)
+
+    def instances_of(self, class_name: str, conditions=()):
+        return iter(self.query(class_name, conditions, Frame.INSTANCE))
+
+    def descendants_of(self, class_name: str, conditions=()):
+        return iter(self.query(class_name, conditions))
+
+    def typeof(self, frame_name: str, super_name: str) -> bool:
+        hierarchy = self.hierarchy
+        if frame_name == super_name or frame_name in hierarchy:
+            return hierarchy.is_a(frame_name, super_name)
+
+        frame = self.frames.get(frame_name)
+        if frame is None:
+            return False
+        sup = hierarchy.ids.get(super_name)
+        for name in frame.superclasses:
+            if name == super_name:
+                return True
+            node = hierarchy.ids.get(name)
+            if sup is not None and node is not None and hierarchy.has_ancestor(node, sup):
+                return True
+        return False
+
+    def ancestors(self, frame_name: str) -> set:
+        if frame_name in self.hierarchy:
+            return self.hierarchy.ancestors_of(frame_name)
+        frame = self.frames.get(frame_name)
+        if frame is None:
+            return set()
+        ancestors = set(frame.superclasses)
+        for name in frame.superclasses:
+            ancestors |= self.hierarchy.ancestors_of(name)
+        return ancestors
+
+    def descendants(self, frame_name: str) -> set:
+        return self.hierarchy.descendants_of(frame_name)
+
+    def classes(self):
+        return self.class_frames.values()
+
+    def instances(self):
+        return self.instance_frames.values()
 
     def __str__(self):
         return "\n".join([str(x) for x in self.class_frames.values()]) + "\n" + "\n".join(
             [str(x) for x in self.instance_frames.values()])
 
+    def link_frame(self, frame: Frame) -> list:
+        # returns the superclasses refused, whose edge would have closed a cycle
+        refused = []
+        for clazz in list(frame.superclasses):
+            if not self.link(frame, clazz):
+                frame.superclasses.discard(clazz)
+                refused.append(clazz)
+                continue
+            self.add_subclass(clazz, frame.name)
+        return refused
+
     def validate(self, frame: Frame, **kwargs):
         operation = kwargs.get('operation', None)
-        if frame is None and operation != KnowledgeBase.DELETE_FRAME:
+        slot_name = kwargs.get('slot_name', None)
+        if frame is None:
             return
 
+        if self.pending and operation != KnowledgeBase.ADD_FRAME:
+            self.resolve()
+
         match operation:
             case KnowledgeBase.ADD_FRAME:
-                new_supers = set()
-                for clazz in frame.superclasses:
-                    self.add_subclass(clazz, frame.name)
-                    superclass: Frame = self.get_frame(clazz)
-                    if superclass is not None:
-                        new_supers.update(superclass.superclasses)
-                        for key in superclass.slots:
-                            frame.update_slot(key, copy.deepcopy(superclass.slots.get(key)))
-                frame.superclasses.update(new_supers)
-
-                if frame.typeof('FOOD') and frame.is_instance():
-                    frame.update_slot('START_DAY', self.get_frame('MY_CALENDAR').slots['CURRENT_DAY'].values[0])
+                self.link_frame(frame)
+                self.daemons.fire(self, Daemons.IF_ADDED, frame)
+            case KnowledgeBase.ADD_SLOT:
+                self.daemons.fire(self, Daemons.IF_ADDED, frame, slot_name)
             case KnowledgeBase.UPDATE_VALUE:
-                slot_name = kwargs.get('slot_name')
-
-                if frame.typeof('CALENDAR') and slot_name == 'CURRENT_DAY':
-                    self.update_foods()
+                self.daemons.fire(self, Daemons.IF_UPDATED, frame, slot_name)
+            case KnowledgeBase.DELETE_SLOT:
+                self.daemons.fire(self, Daemons.IF_REMOVED, frame, slot_name)
+            case KnowledgeBase.DELETE_FRAME:
+                self.daemons.fire(self, Daemons.IF_REMOVED, frame)
             case _:
                 pass
-
-    def update_foods(self):
-        frame = self.get_frame('FOOD')
-        if frame is None:
-            return
-        for subclass in frame.subclasses:
-            self.update_food(subclass)
-
-    def update_food(self, food):
-        frame = self.get_frame(food)
-        if frame is None:
-            return
-        elif frame.is_instance():
-            lifespan = int(frame.slots['LIFESPAN'].values[0])
-            if lifespan != 0:
-                frame.slots['LIFESPAN'].values[0] = lifespan - 1
-
-            if int(frame.slots['LIFESPAN'].values[0]) == 0:
-                frame.slots['SPOILAGE_DAY'].values[0] = self.get_frame('MY_CALENDAR').slots['CURRENT_DAY'].values[0]
-                frame.slots['SPOILED'].values[0] = 'YES'
-        else:
-            for subclass in frame.subclasses:
-                self.update_food(subclass)
-
-
-
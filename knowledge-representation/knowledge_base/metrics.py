@@ -0,0 +1,303 @@
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from knowledge_base.frame import Frame
+
+# The methods measured when a knowledge base is instrumented, where it has them. Those in ITERATORS
+# return lazy answers, which are measured as they are drained; query answers a QueryPlan, measured the
+# same way through Measured.
+MUTATIONS = ['add_frame', 'add_frames', 'delete_frame', 'update_type', 'update_name', 'add_superclass',
+             'remove_superclass', 'add_subclass', 'remove_subclass', 'add_slot', 'update_slot', 'delete_slot',
+             'add_value', 'delete_value', 'add_facet', 'delete_facet', 'update_value', 'begin_bulk', 'end_bulk',
+             'add_to_column', 'apply_to_column']
+QUERIES = ['has_frame', 'get_frame', 'find', 'typeof', 'ancestors', 'descendants', 'query', 'extent',
+           'instances_of', 'descendants_of']
+INTERNALS = ['validate', 'resolve', 'relate', 'retype', 'scatter']
+ITERATORS = {'extent', 'instances_of', 'descendants_of'}
+# latency histogram buckets: bucket b holds the operations taking under 2 ** b nanoseconds
+BUCKETS = 64
+
+
+class Operation:
+    # Count, total and maximum latency, a power-of-two latency histogram and the frames touched by one
+    # kind of operation.
+    __slots__ = ('count', 'total', 'max', 'histogram', 'frames', 'max_frames')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.histogram = [0] * BUCKETS
+        self.frames = 0
+        self.max_frames = 0
+
+    def add(self, elapsed: int, frames: int):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.histogram[min(elapsed.bit_length(), BUCKETS - 1)] += 1
+        self.frames += frames
+        if frames > self.max_frames:
+            self.max_frames = frames
+
+    def percentile(self, q: float) -> int:
+        # the upper bound of the bucket holding the q-th operation, in nanoseconds
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def report(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': self.total / 1e6,
+            'mean_us': self.total / self.count / 1e3 if self.count else 0.0,
+            'p50_us': self.percentile(0.50) / 1e3,
+            'p90_us': self.percentile(0.90) / 1e3,
+            'p99_us': self.percentile(0.99) / 1e3,
+            'max_us': self.max / 1e3,
+            'frames': self.frames,
+            'max_frames': self.max_frames,
+        }
+
+
+class Measure:
+    # Times a block as one operation of the given name, with the frames touched inside it.
+    def __init__(self, metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.touched = self.metrics.enter()
+        self.start = time.perf_counter_ns()
+        return self.touched
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.leave(self.name, time.perf_counter_ns() - self.start, self.touched)
+        return False
+
+
+class Metrics:
+    # Operation metrics of an instrumented knowledge base, by operation: KnowledgeBase methods by name,
+    # KRL statements as TELL ... and ASK ..., the parse and interpret stages of interpret(), and daemon
+    # procedures as DAEMON <procedure>. An operation's frames touched are the frames it names, those its
+    # nested operations and daemons name, and those whose indexed slots it writes; for a lazy answer, the
+    # frames it yields. Reader threads may share one Metrics (see Versions); each keeps its own stack of
+    # operations in progress.
+    def __init__(self):
+        self.operations: {str: Operation} = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def stack(self) -> list:
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def enter(self) -> set:
+        touched = set()
+        self.stack().append(touched)
+        return touched
+
+    def leave(self, name: str, elapsed: int, touched: set):
+        stack = self.stack()
+        stack.pop()
+        if stack:
+            stack[-1] |= touched
+        self.record(name, elapsed, len(touched))
+
+    def touch(self, frame_name):
+        stack = self.stack()
+        if stack:
+            stack[-1].add(frame_name)
+
+    def record(self, name: str, elapsed: int, frames: int = 0):
+        if getattr(self.local, 'paused', False):
+            return
+        with self.lock:
+            operation = self.operations.get(name)
+            if operation is None:
+                operation = self.operations[name] = Operation()
+            operation.add(elapsed, frames)
+
+    @contextmanager
+    def paused(self):
+        # nothing this thread does inside the block is recorded: a Versions replay of a batch already counted
+        self.local.paused = True
+        try:
+            yield
+        finally:
+            self.local.paused = False
+
+    def measure(self, name: str) -> Measure:
+        return Measure(self, name)
+
+    def call(self, name: str, method, args, kwargs):
+        touched = self.enter()
+        start = time.perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            if args:
+                first = args[0]
+                if first.__class__ is str:
+                    touched.add(first)
+                elif isinstance(first, Frame):
+                    touched.add(first.name)
+            self.leave(name, elapsed, touched)
+
+    def drain(self, name: str, answer, elapsed: int = 0, touched: set = None):
+        # the frames of a lazy answer, as they are asked for; the operation is recorded once the answer is
+        # exhausted or dropped, with the time spent producing it
+        touched = set() if touched is None else touched
+        stack = self.stack()
+        clock = time.perf_counter_ns
+        try:
+            while True:
+                stack.append(touched)
+                start = clock()
+                try:
+                    frame = next(answer)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += clock() - start
+                    stack.pop()
+                touched.add(frame.name)
+                yield frame
+        finally:
+            if stack:
+                stack[-1] |= touched
+            self.record(name, elapsed, len(touched))
+
+    def statement(self, statement, kb):
+        # a KRL statement as one operation; a streamed answer is measured until it is drained
+        name = statement.plan.operation
+        touched = self.enter()
+        start = time.perf_counter_ns()
+        try:
+            result = statement.plan.run(kb, statement.params)
+        except BaseException:
+            self.leave(name, time.perf_counter_ns() - start, touched)
+            raise
+        elapsed = time.perf_counter_ns() - start
+        if statement.plan.streams:
+            self.stack().pop()
+            return self.drain(name, iter(result), elapsed, touched)
+        self.leave(name, elapsed, touched)
+        return result
+
+    def reset(self):
+        with self.lock:
+            self.operations = {}
+
+    def report(self) -> dict:
+        with self.lock:
+            operations = sorted(self.operations.items(), key=lambda item: -item[1].total)
+            return {name: operation.report() for name, operation in operations}
+
+    def __str__(self):
+        report = self.report()
+        if not report:
+            return 'No operations measured'
+        width = max(len(name) for name in report)
+        lines = [f'{"operation":<{width}} {"count":>9} {"total ms":>10} {"mean us":>9} {"p50 us":>9}'
+                 f' {"p99 us":>9} {"max us":>10} {"frames":>9} {"max":>6}']
+        for name, row in report.items():
+            lines.append(f'{name:<{width}} {row["count"]:>9} {row["total_ms"]:>10.2f} {row["mean_us"]:>9.1f}'
+                         f' {row["p50_us"]:>9.1f} {row["p99_us"]:>9.1f} {row["max_us"]:>10.1f}'
+                         f' {row["frames"]:>9} {row["max_frames"]:>6}')
+        return '\n'.join(lines)
+
+
+class Measured:
+    # A QueryPlan whose iteration is measured as the query operation; anything else is the plan's own.
+    def __init__(self, metrics: Metrics, plan, elapsed: int):
+        self.metrics = metrics
+        self.plan = plan
+        self.elapsed = elapsed
+
+    def __iter__(self) -> Iterator:
+        return self.metrics.drain('query', iter(self.plan), self.elapsed)
+
+    def __getattr__(self, name: str):
+        return getattr(self.plan, name)
+
+
+def measured(metrics: Metrics, name: str, method):
+    if name in ITERATORS:
+        def run(*args, **kwargs):
+            start = time.perf_counter_ns()
+            answer = iter(method(*args, **kwargs))
+            return metrics.drain(name, answer, time.perf_counter_ns() - start)
+    elif name == 'query':
+        def run(*args, **kwargs):
+            start = time.perf_counter_ns()
+            plan = method(*args, **kwargs)
+            return Measured(metrics, plan, time.perf_counter_ns() - start)
+    else:
+        def run(*args, **kwargs):
+            return metrics.call(name, method, args, kwargs)
+
+    run.__name__ = name
+    return run
+
+
+def measured_procedure(metrics: Metrics):
+    # the Daemons hook: each procedure fired is measured as an operation of its own
+    def run(procedure, kb, frame, slot_name: str):
+        with metrics.measure(f'DAEMON {procedure.__qualname__}') as touched:
+            touched.add(frame.name)
+            procedure(kb, frame, slot_name)
+
+    return run
+
+
+def measured_index(metrics: Metrics, method):
+    # SlotIndex.add and discard: every indexed slot write, daemons' included, touches its frame
+    def run(slot_name: str, value, frame):
+        metrics.touch(frame.name)
+        return method(slot_name, value, frame)
+
+    return run
+
+
+def attach(kb, metrics: Metrics = None) -> Metrics:
+    # Instruments kb by shadowing its measured methods with instance attributes, so that a knowledge base
+    # without metrics runs the class methods untouched. Statements check kb.metrics themselves.
+    detach(kb)
+    metrics = Metrics() if metrics is None else metrics
+    for name in MUTATIONS + QUERIES + INTERNALS:
+        method = getattr(kb, name, None)
+        if method is not None:
+            setattr(kb, name, measured(metrics, name, method))
+    daemons = getattr(kb, 'daemons', None)
+    if daemons is not None:
+        daemons.hook = measured_procedure(metrics)
+    slot_index = getattr(kb, 'slot_index', None)
+    if slot_index is not None:
+        slot_index.add = measured_index(metrics, slot_index.add)
+        slot_index.discard = measured_index(metrics, slot_index.discard)
+    kb.metrics = metrics
+    return metrics
+
+
+def detach(kb):
+    for name in MUTATIONS + QUERIES + INTERNALS:
+        vars(kb).pop(name, None)
+    daemons = getattr(kb, 'daemons', None)
+    if daemons is not None:
+        daemons.hook = None
+    slot_index = getattr(kb, 'slot_index', None)
+    if slot_index is not None:
+        for name in ('add', 'discard'):
+            vars(slot_index).pop(name, None)
+    kb.metrics = None
@@ -0,0 +1,266 @@
+import bisect
+
+from knowledge_base.frame import Frame
+from knowledge_base.hierarchy import bits
+from knowledge_base.query import Condition, number
+from knowledge_base import columns
+
+HISTOGRAM_BUCKETS = 16
+# a histogram is rebuilt once this share of its slot's postings has changed since it was built
+HISTOGRAM_STALENESS = 0.1
+DEFAULT_SELECTIVITY = 0.1
+RANGE_OPERATORS = ('<', '<=', '>', '>=')
+# cost of testing one row of a column, against 1 for testing one frame
+VECTOR_COST = 0.02 if columns.numpy is not None else 0.5
+
+
+class Histogram:
+    # Equi-depth histogram over the numeric values of one slot: bounds[i] is the largest value in bucket i
+    # and every bucket holds about the same number of frames. Rows below a bound are interpolated linearly
+    # inside its bucket.
+    def __init__(self, weighted: [(float, int)], buckets: int = HISTOGRAM_BUCKETS):
+        weighted.sort()
+        self.total = sum(count for _, count in weighted)
+        self.low = weighted[0][0] if weighted else 0
+        self.bounds = []
+        self.depths = []
+        if not weighted:
+            return
+        depth = self.total / buckets
+        seen = 0
+        for value, count in weighted:
+            seen += count
+            if seen >= depth * (len(self.bounds) + 1):
+                self.bounds.append(value)
+                self.depths.append(seen)
+        if self.bounds[-1] != weighted[-1][0]:
+            self.bounds.append(weighted[-1][0])
+            self.depths.append(self.total)
+
+    def below(self, value: float, inclusive: bool) -> float:
+        if not self.bounds or value < self.low:
+            return 0.0
+        i = bisect.bisect_left(self.bounds, value)
+        if i >= len(self.bounds):
+            return self.total
+        upper = self.bounds[i]
+        before = self.depths[i - 1] if i else 0
+        lower = self.bounds[i - 1] if i else self.low
+        if upper == value:
+            return self.depths[i] if inclusive else before + (self.depths[i] - before) / 2
+        width = upper - lower
+        share = (value - lower) / width if width else 0.5
+        return before + (self.depths[i] - before) * share
+
+    def estimate(self, op: str, value: float) -> float:
+        match op:
+            case '<':
+                return self.below(value, False)
+            case '<=':
+                return self.below(value, True)
+            case '>':
+                return self.total - self.below(value, True)
+            case '>=':
+                return self.total - self.below(value, False)
+        return self.total
+
+
+class Statistics:
+    # Cardinality estimates for the planner, read from the indexes the knowledge base already keeps:
+    # extent sizes from the per-class member lists, distinct values and posting sizes from the slot
+    # index, and a histogram per NUMBER slot built on first use and rebuilt once it goes stale.
+    def __init__(self, kb):
+        self.kb = kb
+        self.histograms: {str: (int, Histogram)} = {}
+
+    def frames(self) -> int:
+        return max(len(self.kb.frames), 1)
+
+    def extent(self, class_name: str) -> int:
+        hierarchy = self.kb.hierarchy
+        members = self.kb.members
+        node = hierarchy.ids.get(class_name)
+        if node is None:
+            return len(members.get(class_name, ()))
+        return sum(len(members.get(hierarchy.names[d], ()))
+                   for d in bits(hierarchy.descendants[node] | 1 << node))
+
+    def equal(self, slot_name: str, value) -> int:
+        index = self.kb.slot_index
+        return sum(index.count(slot_name, key) for key in keys(value))
+
+    def selectivity(self, condition: Condition) -> float:
+        index = self.kb.slot_index
+        size = index.size(condition.slot_name)
+        if condition.op == '=':
+            return self.equal(condition.slot_name, condition.value) / size if size else DEFAULT_SELECTIVITY
+        if condition.op == '!=':
+            return 1 - self.equal(condition.slot_name, condition.value) / size if size else 1 - DEFAULT_SELECTIVITY
+        histogram = self.histogram(condition.slot_name)
+        if histogram is None or not histogram.total or condition.number is None:
+            return DEFAULT_SELECTIVITY
+        return histogram.estimate(condition.op, condition.number) / histogram.total
+
+    def range(self, condition: Condition) -> float:
+        histogram = self.histogram(condition.slot_name)
+        if histogram is None or condition.number is None:
+            return self.kb.slot_index.size(condition.slot_name) * DEFAULT_SELECTIVITY
+        return histogram.estimate(condition.op, condition.number)
+
+    def histogram(self, slot_name: str):
+        index = self.kb.slot_index
+        if not index.is_number(slot_name):
+            return None
+        changes = index.changes.get(slot_name, 0)
+        built = self.histograms.get(slot_name)
+        if built is not None and changes - built[0] <= HISTOGRAM_STALENESS * built[1].total:
+            return built[1]
+
+        weighted = []
+        for value, frames in index.values(slot_name).items():
+            n = number(value)
+            if n is not None:
+                weighted.append((n, len(frames)))
+        histogram = Histogram(weighted)
+        self.histograms[slot_name] = (changes, histogram)
+        return histogram
+
+
+class Step:
+    def __init__(self, description: str, estimate: float):
+        self.description = description
+        self.estimate = estimate
+        self.actual = 0
+
+    def __str__(self):
+        return f'{self.description:<40} estimated {self.estimate:>10.1f}  actual {self.actual:>10}'
+
+
+class QueryPlan:
+    # The cheapest access path drives the query (a class extent, an index lookup for =, a scan of the
+    # index's distinct values for a range on a NUMBER slot, or a whole-column comparison when the slot is
+    # columnar for the class); every other predicate, the class test included, is then checked on the
+    # frames it yields, most selective first, so that the common rejection happens as early as possible.
+    def __init__(self, kb, class_name: str = None, conditions=(), frame_type: str = None):
+        self.kb = kb
+        self.class_name = class_name
+        self.conditions = list(conditions)
+        self.frame_type = frame_type
+        statistics = kb.statistics
+
+        paths = []
+        if class_name is not None:
+            paths.append((statistics.extent(class_name), 'extent', None, None))
+        for condition in self.conditions:
+            column = None
+            if class_name is not None and frame_type == Frame.INSTANCE and condition.number is not None:
+                column = kb.columns.covering(class_name, condition.slot_name)
+            if column is not None:
+                rows = column.count(condition.op, condition.number) + len(column.unknown())
+                paths.append((len(column) * VECTOR_COST + rows, 'column', condition, (column, rows)))
+            if not kb.slot_index.is_complete(condition.slot_name):
+                continue
+            if condition.op == '=':
+                paths.append((statistics.equal(condition.slot_name, condition.value), 'lookup', condition, None))
+            elif condition.op in RANGE_OPERATORS and kb.slot_index.is_number(condition.slot_name):
+                cost = statistics.range(condition) + kb.slot_index.distinct(condition.slot_name)
+                paths.append((cost, 'range', condition, None))
+        if not paths:
+            paths.append((len(kb.frames), 'scan', None, None))
+
+        # on a tie the extent wins: it needs no class test afterwards
+        cost, self.access, self.driver, self.column = min(paths, key=lambda path: path[0])
+        if self.access == 'extent':
+            self.source = Step(f'extent of {class_name}', cost)
+        elif self.access == 'scan':
+            self.source = Step('scan all frames', cost)
+        elif self.access == 'lookup':
+            self.source = Step(f'index {self.driver}', cost)
+        elif self.access == 'column':
+            column, rows = self.column
+            self.column = column
+            self.source = Step(f'column {column.class_name}.{self.driver}', rows)
+        else:
+            self.source = Step(f'index range {self.driver}', statistics.range(self.driver))
+
+        filters = []
+        covered = self.access == 'extent' or self.access == 'column' and self.column.class_name == class_name
+        if class_name is not None and not covered:
+            filters.append((statistics.extent(class_name) / statistics.frames(), f'below {class_name}',
+                            self.below))
+        if frame_type is not None:
+            share = len(kb.extents[frame_type]) / statistics.frames()
+            filters.append((share, f'type {frame_type}', lambda frame: frame.type == frame_type))
+        for condition in self.conditions:
+            # the driving predicate is rechecked, but everything the index yields already meets it
+            selectivity = 1.0 if condition is self.driver else statistics.selectivity(condition)
+            filters.append((selectivity, f'filter {condition}', condition.test))
+        filters.sort(key=lambda f: f[0])
+
+        self.filters = []
+        rows = self.source.estimate
+        for selectivity, description, test in filters:
+            rows *= selectivity
+            self.filters.append((Step(description, rows), test))
+
+    def below(self, frame) -> bool:
+        return frame.name != self.class_name and self.kb.typeof(frame.name, self.class_name)
+
+    def candidates(self):
+        kb = self.kb
+        match self.access:
+            case 'extent':
+                return kb.extent(self.class_name)
+            case 'scan':
+                return iter(list(kb.frames.values()))
+            case 'column':
+                return self.column.select(self.driver.op, self.driver.number)
+            case 'lookup':
+                return self.holders(kb.slot_index.lookup(self.driver.slot_name, key) for key in keys(self.driver.value))
+            case _:
+                values = kb.slot_index.values(self.driver.slot_name)
+                test = self.driver.holds
+                compare = self.driver.compare
+                return self.holders(frames.keys() for value, frames in list(values.items()) if test(value, compare))
+
+    def holders(self, postings):
+        # Frames holding a value in their own slot, and below any class holding it, the frames inheriting
+        # it. Every candidate is still checked against all the conditions afterwards.
+        slot_name = self.driver.slot_name
+        seen = set()
+        for frames in postings:
+            for frame in list(frames):
+                if frame.name not in seen:
+                    seen.add(frame.name)
+                    yield frame
+                if frame.type == Frame.CLASS:
+                    for inheritor in self.kb.extent(frame.name):
+                        if slot_name not in inheritor.own_slots and inheritor.name not in seen:
+                            seen.add(inheritor.name)
+                            yield inheritor
+
+    def __iter__(self):
+        source = self.source
+        filters = self.filters
+        for frame in self.candidates():
+            source.actual += 1
+            for step, test in filters:
+                if not test(frame):
+                    break
+                step.actual += 1
+            else:
+                yield frame
+
+    def explain(self) -> str:
+        rows = sum(1 for _ in self)
+        lines = [str(self.source)]
+        lines.extend(f'  {step}' for step, _ in self.filters)
+        estimate = self.filters[-1][0].estimate if self.filters else self.source.estimate
+        lines.append(f'{"rows":<42} estimated {estimate:>10.1f}  actual {rows:>10}')
+        return '\n'.join(lines)
+
+
+def keys(value) -> list:
+    # an equality on '3' also finds slots that hold the number 3
+    n = number(value)
+    return [value] if n is None or n == value else [value, n]
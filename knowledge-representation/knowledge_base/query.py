@@ -0,0 +1,67 @@
+import operator
+
+
+class QueryError(RuntimeError):
+    pass
+
+
+class Condition:
+    # slot op value, tested against a frame's own or inherited slot. Values that both read as numbers are
+    # compared as numbers ('10' > '9'); anything else is compared as text. A multivalued slot matches if
+    # any of its values does, except for != which needs all of them to differ.
+    OPERATORS = {
+        '=': operator.eq,
+        '!=': operator.ne,
+        '<': operator.lt,
+        '<=': operator.le,
+        '>': operator.gt,
+        '>=': operator.ge,
+    }
+
+    def __init__(self, slot_name: str, op: str, value):
+        if op not in self.OPERATORS:
+            raise QueryError(f'Unknown operator {op}')
+        self.slot_name = slot_name
+        self.op = op
+        self.value = value
+        self.compare = self.OPERATORS[op]
+        self.number = number(value)
+
+    def test(self, frame) -> bool:
+        slot = frame.get_slot(self.slot_name)
+        if slot is None:
+            return False
+        if self.op == '!=':
+            return not any(self.holds(value, operator.eq) for value in slot.values)
+        return any(self.holds(value, self.compare) for value in slot.values)
+
+    def holds(self, value, compare) -> bool:
+        if value is None:
+            return False
+        if self.number is not None:
+            left = number(value)
+            if left is not None:
+                return compare(left, self.number)
+        return compare(str(value), str(self.value))
+
+    def __repr__(self):
+        return f'{self.slot_name} {self.op} {self.value}'
+
+
+def number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    # float() would also take words such as INF and NAN
+    if not isinstance(value, str) or value[-1:] not in '0123456789.':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def matches(frame, conditions) -> bool:
+    for condition in conditions:
+        if not condition.test(frame):
+            return False
+    return True
@@ -0,0 +1,42 @@
+class Daemons:
+    # If-added / if-updated / if-removed procedures attached to a class, and optionally to one of its
+    # slots. They are indexed by (operation, slot) and then by class, so a write only looks at classes
+    # that have a procedure for exactly that operation and slot, and most writes find nothing at all.
+    IF_ADDED = 'IF_ADDED'
+    IF_UPDATED = 'IF_UPDATED'
+    IF_REMOVED = 'IF_REMOVED'
+
+    def __init__(self):
+        self.index: {(str, str): {str: list}} = {}
+        # hook(procedure, kb, frame, slot_name), when set, runs each procedure fired in its place (see Metrics)
+        self.hook = None
+
+    def register(self, operation: str, class_name: str, procedure, slot_name: str = None):
+        classes = self.index.setdefault((operation, slot_name), {})
+        classes.setdefault(class_name, []).append(procedure)
+
+    def unregister(self, operation: str, class_name: str, procedure, slot_name: str = None) -> bool:
+        classes = self.index.get((operation, slot_name))
+        if classes is None or procedure not in classes.get(class_name, ()):
+            return False
+        classes[class_name].remove(procedure)
+        if not classes[class_name]:
+            del classes[class_name]
+        if not classes:
+            del self.index[(operation, slot_name)]
+        return True
+
+    def triggers(self, operation: str, slot_name: str = None) -> dict:
+        return self.index.get((operation, slot_name), {})
+
+    def fire(self, kb, operation: str, frame, slot_name: str = None):
+        classes = self.index.get((operation, slot_name))
+        if not classes:
+            return
+        for class_name, procedures in list(classes.items()):
+            if kb.typeof(frame.name, class_name):
+                for procedure in list(procedures):
+                    if self.hook is None:
+                        procedure(kb, frame, slot_name)
+                    else:
+                        self.hook(procedure, kb, frame, slot_name)
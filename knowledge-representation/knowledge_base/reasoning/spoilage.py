@@ -0,0 +1,123 @@
+import heapq
+import itertools
+
+from knowledge_base.frame import Slot
+from knowledge_base.columns import to_number
+from knowledge_base.reasoning.daemons import Daemons
+
+
+class Lifespan(Slot):
+    # LIFESPAN of a food instance: the lifespan it was given and the day it was given on. The remaining
+    # life is worked out from those whenever it is read, so a day tick never has to rewrite it.
+    __slots__ = ('lifespan', 'start', 'schedule', 'view')
+    indexed = False
+
+    def __init__(self, lifespan: int, start: int, schedule, facets):
+        self.lifespan = lifespan
+        self.start = start
+        self.schedule = schedule
+        self.facets = tuple(facets)
+        self.view = [lifespan]
+
+    @property
+    def values(self):
+        # a fresh list per read; a write into it (frame.update_slot) is what written() hands back
+        self.view = [self.remaining()]
+        return self.view
+
+    def written(self):
+        return self.view[0]
+
+    def remaining(self) -> int:
+        return max(self.lifespan - (self.schedule.day - self.start), 0)
+
+    def copy(self):
+        return Slot(self.values, self.facets)
+
+
+class SpoilageSchedule:
+    # Min-heap of (day, sequence, frame) spoil deadlines. A tick pops only what expires that day; entries
+    # superseded by a later LIFESPAN write are left in the heap and skipped when they surface.
+    def __init__(self):
+        self.day = 0
+        self.deadlines = []
+        self.due = {}
+        self.sequence = itertools.count()
+
+    def schedule(self, frame, lifespan: int, start: int = None) -> int:
+        # a food given no life left still lasts until the next tick, as the per-day decrement used to
+        day = (self.day if start is None else start) + max(lifespan, 1)
+        self.due[frame] = day
+        heapq.heappush(self.deadlines, (day, next(self.sequence), frame))
+        return day
+
+    def cancel(self, frame):
+        self.due.pop(frame, None)
+
+    def tick(self) -> list:
+        self.day += 1
+        expired = []
+        deadlines = self.deadlines
+        while deadlines and deadlines[0][0] <= self.day:
+            day, _, frame = heapq.heappop(deadlines)
+            if self.due.get(frame) == day:
+                del self.due[frame]
+                expired.append(frame)
+        return expired
+
+    def __len__(self):
+        return len(self.due)
+
+
+class FoodSpoilage:
+    # The FOOD / CALENDAR domain rules, installed as daemons on the knowledge base.
+    FOOD = 'FOOD'
+    CALENDAR = 'CALENDAR'
+    MY_CALENDAR = 'MY_CALENDAR'
+    # instances every shard of a ShardedKnowledgeBase keeps a copy of: each one's foods read the calendar
+    SHARED = (MY_CALENDAR,)
+
+    def __init__(self, kb):
+        self.schedule = SpoilageSchedule()
+        kb.daemons.register(Daemons.IF_ADDED, self.FOOD, self.start_day)
+        kb.daemons.register(Daemons.IF_UPDATED, self.FOOD, self.update_lifespan, 'LIFESPAN')
+        kb.daemons.register(Daemons.IF_REMOVED, self.FOOD, self.discard)
+        kb.daemons.register(Daemons.IF_UPDATED, self.CALENDAR, self.update_foods, 'CURRENT_DAY')
+
+    def start_day(self, kb, frame, slot_name):
+        if not frame.is_instance():
+            return
+        calendar = kb.get_frame(self.MY_CALENDAR)
+        if calendar is not None and 'CURRENT_DAY' in calendar.slots:
+            frame.update_slot('START_DAY', calendar.slots['CURRENT_DAY'].values[0])
+        # a lifespan the food was added with, or inherits, counts from today as one written later would
+        slot = frame.get_slot('LIFESPAN')
+        if slot is not None and not isinstance(slot, Lifespan):
+            values = slot.values
+            lifespan = to_number(values[0]) if values else None
+            if lifespan is not None:
+                self.spoil(frame, int(lifespan), slot.facets)
+
+    def update_lifespan(self, kb, frame, slot_name):
+        if not frame.is_instance():
+            return
+        slot = frame.own_slot('LIFESPAN')
+        self.spoil(frame, int(slot.written() if isinstance(slot, Lifespan) else slot.values[0]), slot.facets)
+
+    def spoil(self, frame, lifespan: int, facets):
+        frame.replace_slot('LIFESPAN', Lifespan(lifespan, self.schedule.day, self.schedule, facets))
+        self.schedule.schedule(frame, lifespan)
+
+    def restore(self, frame, lifespan: int, start: int, facets):
+        frame.replace_slot('LIFESPAN', Lifespan(lifespan, start, self.schedule, facets))
+        if start + max(lifespan, 1) > self.schedule.day:
+            self.schedule.schedule(frame, lifespan, start)
+
+    def discard(self, kb, frame, slot_name):
+        self.schedule.cancel(frame)
+
+    def update_foods(self, kb, calendar, slot_name):
+        current_day = calendar.slots['CURRENT_DAY'].values[0]
+        for frame in self.schedule.tick():
+            frame.update_slot('SPOILAGE_DAY', current_day)
+            frame.update_slot('SPOILED', 'YES')
@@ -0,0 +1,395 @@
+import multiprocessing
+import zlib
+from collections.abc import Iterator, Set
+
+from knowledge_base.kb import KnowledgeBase, DEFAULT_RULES
+from knowledge_base.frame import Frame, FrameRef, Names, Slot
+from knowledge_base.metrics import Metrics, attach as attach_metrics, detach as detach_metrics
+from knowledge_base.reasoning.daemons import Daemons
+
+
+class ShardError(RuntimeError):
+    pass
+
+
+class ShardedKnowledgeBase:
+    # A knowledge base partitioned by frame name hash across local shard processes, each holding a
+    # KnowledgeBase of its own, behind the same methods. Class frames, and the instances a rule names in
+    # SHARED (the calendar), are replicated on every shard, so inheritance, typeof and daemons always find
+    # what they need locally; every other instance lives on exactly one shard. A TELL goes to the shards
+    # holding the frame it names and extent queries are scattered to all of them and gathered.
+    #
+    # An operation linking two frames (add_superclass and the like) runs where its first frame lives, and
+    # when the second lives on another shard, the inverse operation then updates that end there, only if
+    # the first shard made the link. A rename that moves a frame to another shard re-adds it there, firing
+    # its daemons as if its slots had just been written. SYMMETRIC values and typeof chains running through
+    # instances on other shards are not followed.
+    def __init__(self, shards: int, rules=DEFAULT_RULES):
+        if shards < 1:
+            raise ShardError(f'Need at least one shard, not {shards}')
+        rules = tuple(rules)
+        self.connections = []
+        self.processes = []
+        for _ in range(shards):
+            router, shard = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=serve_shard, args=(shard, rules), daemon=True)
+            process.start()
+            shard.close()
+            self.connections.append(router)
+            self.processes.append(process)
+        self.shards = range(shards)
+        self.shared = {name for rule in rules for name in getattr(rule, 'SHARED', ())}
+        self.replicated = set(self.shared)
+        self.wal = None
+        self.metrics = None
+
+    def owner(self, frame_name: str) -> int:
+        # crc32 rather than hash(), which differs from one process to the next
+        return zlib.crc32(frame_name.encode()) % len(self.connections)
+
+    def holders(self, frame_name: str):
+        return self.shards if frame_name in self.replicated else (self.owner(frame_name),)
+
+    def scatter(self, batches: dict) -> list:
+        # Sends each shard its batch of calls, all before any answer is read, and returns each batch's
+        # results. Every shard is heard from before an error from one of them is raised, so none is left
+        # out of step.
+        for shard, calls in batches.items():
+            self.connections[shard].send(calls)
+        results = []
+        error = None
+        for shard in batches:
+            ok, result = self.connections[shard].recv()
+            if not ok and error is None:
+                error = result
+            results.append(result)
+        if error is not None:
+            raise error
+        return results
+
+    def call(self, shards, method: str, *args) -> list:
+        calls = [(method, args)]
+        return [results[0] for results in self.scatter({shard: calls for shard in shards})]
+
+    def first(self, shards, method: str, *args):
+        return self.call(shards, method, *args)[0]
+
+    def close(self):
+        # a shard forked after another holds a copy of its pipe, so the end of input is not enough to
+        # stop it; each is told to
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def add_frame(self, frame: Frame) -> bool:
+        name = frame.name
+        if frame.type == Frame.CLASS and name not in self.replicated:
+            if self.first((self.owner(name),), 'has_frame', name):
+                return False
+            self.replicated.add(name)
+        return self.first(self.holders(name), 'add_frame', frame)
+
+    def add_frames(self, frames) -> dict:
+        # one batch per shard, resolved on each as a bulk load
+        batches = {shard: [('begin_bulk', ())] for shard in self.shards}
+        for frame in frames:
+            if frame.type == Frame.CLASS:
+                self.replicated.add(frame.name)
+            for shard in self.holders(frame.name):
+                batches[shard].append(('add_frame', (frame,)))
+        for batch in batches.values():
+            batch.extend((('end_bulk', ()), ('dangling', ())))
+        dangling = {}
+        for results in self.scatter(batches):
+            for name, missing in results[-1].items():
+                missing = [m for m in missing if not self.has_frame(m)]
+                if missing:
+                    dangling[name] = missing
+        return dangling
+
+    def begin_bulk(self):
+        self.call(self.shards, 'begin_bulk')
+
+    def end_bulk(self) -> bool:
+        return self.call(self.shards, 'end_bulk')[0]
+
+    def delete_frame(self, frame_name: str):
+        self.call(self.holders(frame_name), 'delete_frame', frame_name)
+        if frame_name not in self.shared:
+            self.replicated.discard(frame_name)
+
+    def update_type(self, frame_name: str, new_type: str):
+        if frame_name in self.replicated or new_type != Frame.CLASS:
+            return self.first(self.holders(frame_name), 'update_type', frame_name, new_type)
+        # an instance becoming a class is copied to every other shard
+        owner = self.owner(frame_name)
+        frame = self.first((owner,), 'own_frame', frame_name)
+        if frame is None:
+            return None
+        self.first((owner,), 'update_type', frame_name, new_type)
+        frame.type = new_type
+        self.replicated.add(frame_name)
+        self.call([shard for shard in self.shards if shard != owner], 'add_frame', frame)
+        return None
+
+    def update_name(self, frame_name: str, new_name: str):
+        if new_name in self.replicated or not self.has_frame(frame_name) or self.has_frame(new_name):
+            return None
+        if frame_name in self.replicated:
+            self.call(self.shards, 'update_name', frame_name, new_name)
+            self.replicated.discard(frame_name)
+            self.replicated.add(new_name)
+            return None
+        source, target = self.owner(frame_name), self.owner(new_name)
+        if source == target:
+            return self.first((source,), 'update_name', frame_name, new_name)
+        frame = self.first((source,), 'own_frame', frame_name)
+        for super_name in list(frame.superclasses):
+            self.first((source,), 'remove_superclass', frame_name, super_name)
+        self.first((source,), 'delete_frame', frame_name)
+        frame.name = new_name
+        self.first((target,), 'adopt', frame)
+        return None
+
+    def relate_pair(self, method: str, frame_name: str, other_name: str):
+        inverse, side, linked = PAIRS[method]
+        shards = self.holders(frame_name)
+        result = self.first(shards, method, frame_name, other_name)
+        other = self.owner(other_name)
+        if other_name not in self.replicated and other not in shards:
+            if self.first(shards, 'relation', frame_name, other_name)[side] == linked:
+                self.first((other,), inverse, other_name, frame_name)
+        return result
+
+    def add_superclass(self, frame_name, super_name):
+        return self.relate_pair('add_superclass', frame_name, super_name)
+
+    def remove_superclass(self, frame_name, super_name):
+        return self.relate_pair('remove_superclass', frame_name, super_name)
+
+    def add_subclass(self, frame_name, sub_name):
+        return self.relate_pair('add_subclass', frame_name, sub_name)
+
+    def remove_subclass(self, frame_name, sub_name):
+        return self.relate_pair('remove_subclass', frame_name, sub_name)
+
+    def add_slot(self, frame_name, slot_name, slot_value=None):
+        return self.first(self.holders(frame_name), 'add_slot', frame_name, slot_name, slot_value)
+
+    def update_slot(self, frame_name, slot_name, slot_value=None):
+        return self.first(self.holders(frame_name), 'update_slot', frame_name, slot_name, slot_value)
+
+    def delete_slot(self, frame_name, slot_name):
+        return self.first(self.holders(frame_name), 'delete_slot', frame_name, slot_name)
+
+    def add_value(self, frame_name, slot_name, val):
+        return self.first(self.holders(frame_name), 'add_value', frame_name, slot_name, val)
+
+    def delete_value(self, frame_name, slot_name, val):
+        return self.first(self.holders(frame_name), 'delete_value', frame_name, slot_name, val)
+
+    def add_facet(self, frame_name, slot_name, facet):
+        return self.first(self.holders(frame_name), 'add_facet', frame_name, slot_name, facet)
+
+    def delete_facet(self, frame_name, slot_name, facet):
+        return self.first(self.holders(frame_name), 'delete_facet', frame_name, slot_name, facet)
+
+    def update_value(self, frame_name, slot_name, value):
+        return self.first(self.holders(frame_name), 'update_value', frame_name, slot_name, value)
+
+    def instrument(self, metrics: Metrics = None) -> Metrics:
+        # measured here, in the router: a routed call's time includes its round trip to the shards
+        return attach_metrics(self, metrics)
+
+    def uninstrument(self):
+        detach_metrics(self)
+
+    def columnar(self, class_name: str, slot_name: str):
+        self.call(self.shards, 'columnar', class_name, slot_name)
+
+    def add_to_column(self, class_name: str, slot_name: str, delta):
+        self.call(self.shards, 'add_to_column', class_name, slot_name, delta)
+
+    def has_frame(self, frame_name: str) -> bool:
+        return self.first(self.holders(frame_name)[:1], 'has_frame', frame_name)
+
+    def get_frame(self, frame_name: str):
+        # a detached copy, with inherited slots copied in; a replicated frame's subclasses are gathered
+        # from every shard
+        frames = self.call(self.holders(frame_name), 'frame', frame_name)
+        return None if frames[0] is None else self.merged([frames])[0]
+
+    def find(self, slot_name: str, value) -> list:
+        return self.merged(self.call(self.shards, 'find', slot_name, value))
+
+    def extent(self, class_name: str):
+        return iter(self.merged(self.call(self.shards, 'extent', class_name)))
+
+    def query(self, class_name: str = None, conditions=(), frame_type: str = None):
+        return ShardedQuery(self, class_name, list(conditions), frame_type)
+
+    def instances_of(self, class_name: str, conditions=()):
+        return iter(self.query(class_name, conditions, Frame.INSTANCE))
+
+    def descendants_of(self, class_name: str, conditions=()):
+        return iter(self.query(class_name, conditions))
+
+    def typeof(self, frame_name: str, super_name: str) -> bool:
+        return self.first(self.holders(frame_name)[:1], 'typeof', frame_name, super_name)
+
+    def ancestors(self, frame_name: str) -> set:
+        return self.first(self.holders(frame_name)[:1], 'ancestors', frame_name)
+
+    def descendants(self, frame_name: str) -> set:
+        return set().union(*self.call(self.shards, 'descendants', frame_name))
+
+    def classes(self) -> list:
+        return self.merged(self.call(self.shards, 'classes'))
+
+    def instances(self) -> list:
+        return self.merged(self.call(self.shards, 'instances'))
+
+    def merged(self, answers) -> list:
+        # Frames gathered from every shard, in shard order: a replicated frame is taken from the first
+        # shard that sent it, with the subclasses the others know of added in.
+        frames = []
+        seen = {}
+        for answer in answers:
+            for frame in answer:
+                if frame is None:
+                    continue
+                if frame.name not in self.replicated:
+                    frames.append(frame)
+                elif frame.name in seen:
+                    for sub_name in frame.subclasses:
+                        seen[frame.name].subclasses.add(sub_name)
+                else:
+                    seen[frame.name] = frame
+                    frames.append(frame)
+        return frames
+
+    def __str__(self):
+        return "\n".join([str(x) for x in self.classes()]) + "\n" + "\n".join([str(x) for x in self.instances()])
+
+
+class ShardedQuery:
+    # A QueryPlan run on every shard against its own frames, the answers gathered in shard order.
+    def __init__(self, kb: ShardedKnowledgeBase, class_name: str, conditions: list, frame_type: str):
+        self.kb = kb
+        self.class_name = class_name
+        self.conditions = conditions
+        self.frame_type = frame_type
+
+    def __iter__(self):
+        answers = self.kb.call(self.kb.shards, 'query', self.class_name, self.conditions, self.frame_type)
+        return iter(self.kb.merged(answers))
+
+    def explain(self) -> str:
+        plans = self.kb.call(self.kb.shards, 'explain', self.class_name, self.conditions, self.frame_type)
+        return '\n'.join(f'shard {shard}:\n' + '\n'.join(f'  {line}' for line in plan.split('\n'))
+                         for shard, plan in enumerate(plans))
+
+
+# the inverse of each two-frame operation, for the other frame's shard, and when it applies: once the
+# first frame's superclasses (0) or subclasses (1) hold the other (True) or no longer do (False)
+PAIRS = {
+    'add_superclass': ('add_subclass', 0, True),
+    'remove_superclass': ('remove_subclass', 0, False),
+    'add_subclass': ('add_superclass', 1, True),
+    'remove_subclass': ('remove_superclass', 1, False),
+}
+
+
+def detach(frame: Frame, inherited: bool = True):
+    # A copy of frame that can leave its shard: no kb, values as plain as they were written, and unless
+    # inherited is False, the slots it inherits copied in.
+    if frame is None:
+        return None
+    slots = frame.slots if inherited else frame.own_slots
+    copy = Frame(frame.type, frame.name, set(frame.superclasses),
+                 {name: Slot([str(v) if isinstance(v, FrameRef) else v for v in slot.values], slot.facets)
+                  for name, slot in slots.items()})
+    copy.subclasses = Names(frame.subclasses)
+    return copy
+
+
+def detached(frames) -> list:
+    return [detach(frame) for frame in frames]
+
+
+def adopt(kb: KnowledgeBase, frame: Frame):
+    # a frame moved in from another shard: added, and its slots announced as if just written
+    if kb.add_frame(frame):
+        for slot_name in list(frame.own_slots):
+            kb.daemons.fire(kb, Daemons.IF_UPDATED, frame, slot_name)
+
+
+def relation(kb: KnowledgeBase, frame_name: str, other_name: str):
+    frame = kb.get_frame(frame_name)
+    if frame is None:
+        return False, False
+    return other_name in frame.superclasses, other_name in frame.subclasses
+
+
+def columnar(kb: KnowledgeBase, class_name: str, slot_name: str):
+    # the Column itself stays on the shard
+    kb.columnar(class_name, slot_name)
+
+
+# shard-side calls that are not KnowledgeBase methods, or whose answers need detaching
+LOCAL = {
+    'frame': lambda kb, name: detach(kb.get_frame(name)),
+    'own_frame': lambda kb, name: detach(kb.get_frame(name), inherited=False),
+    'adopt': adopt,
+    'relation': relation,
+    'dangling': lambda kb: dict(kb.dangling),
+    'columnar': columnar,
+    'find': lambda kb, slot_name, value: detached(kb.find(slot_name, value)),
+    'extent': lambda kb, class_name: detached(kb.extent(class_name)),
+    'query': lambda kb, class_name, conditions, frame_type: detached(kb.query(class_name, conditions, frame_type)),
+    'explain': lambda kb, class_name, conditions, frame_type: kb.query(class_name, conditions, frame_type).explain(),
+    'classes': lambda kb: detached(kb.classes()),
+    'instances': lambda kb: detached(kb.instances()),
+}
+
+
+def plain(value):
+    # answers go back pickled; name sets are sent as sets and lazy answers as lists
+    if isinstance(value, Set):
+        return set(value)
+    if isinstance(value, Iterator):
+        return [plain(item) for item in value]
+    if isinstance(value, Frame):
+        return detach(value)
+    return value
+
+
+def serve_shard(connection, rules):
+    # A shard process: runs each batch of calls it is sent on its KnowledgeBase and answers with their
+    # results, or with the error that stopped the batch, until the router says to stop.
+    kb = KnowledgeBase(rules)
+    while True:
+        try:
+            calls = connection.recv()
+        except EOFError:
+            break
+        if calls is None:
+            break
+        results = []
+        try:
+            for method, args in calls:
+                local = LOCAL.get(method)
+                results.append(plain(local(kb, *args) if local is not None else getattr(kb, method)(*args)))
+        except Exception as e:
+            connection.send((False, e))
+            continue
+        connection.send((True, results))
@@ -0,0 +1,93 @@
+from knowledge_base.frame import Facets
+
+
+class SlotIndex:
+    # Inverted index from slot name, then value, to the frames holding that value in a slot of their own.
+    # Each posting is a dict of frame -> occurrences, so a multivalued slot listing a value twice stays
+    # indexed until both are gone, and a lookup costs only the size of its result. The per-slot counts
+    # it keeps on the side are what the query planner's statistics read.
+    def __init__(self):
+        self.postings: {str: {object: {object: int}}} = {}
+        self.sizes: {str: int} = {}
+        self.changes: {str: int} = {}
+        # slot names seen with a NUMBER facet; never forgotten, it only steers statistics
+        self.number_slots: set = set()
+        # slot names seen with a SYMMETRIC facet, whose postings double as the inverse relation
+        self.symmetric_slots: set = set()
+        # slot names some frame holds in a computed slot, so a posting list can never be the whole answer
+        self.computed_slots: set = set()
+
+    def add(self, slot_name: str, value, frame):
+        values = self.postings.get(slot_name)
+        if values is None:
+            values = self.postings[slot_name] = {}
+        frames = values.get(value)
+        if frames is None:
+            frames = values[value] = {}
+        if frame in frames:
+            frames[frame] += 1
+            return
+        frames[frame] = 1
+        self.sizes[slot_name] = self.sizes.get(slot_name, 0) + 1
+        self.changes[slot_name] = self.changes.get(slot_name, 0) + 1
+
+    def discard(self, slot_name: str, value, frame):
+        values = self.postings.get(slot_name)
+        frames = None if values is None else values.get(value)
+        if frames is None or frame not in frames:
+            return
+        if frames[frame] > 1:
+            frames[frame] -= 1
+            return
+        del frames[frame]
+        self.sizes[slot_name] -= 1
+        self.changes[slot_name] += 1
+        if not frames:
+            del values[value]
+            if not values:
+                del self.postings[slot_name]
+
+    def add_slot(self, slot_name: str, slot, frame):
+        if Facets.NUMBER in slot.facets:
+            self.number_slots.add(slot_name)
+        if Facets.SYMMETRIC in slot.facets:
+            self.symmetric_slots.add(slot_name)
+        if slot.indexed:
+            for value in slot.values:
+                self.add(slot_name, value, frame)
+        else:
+            self.computed_slots.add(slot_name)
+
+    def discard_slot(self, slot_name: str, slot, frame):
+        if slot.indexed:
+            for value in slot.values:
+                self.discard(slot_name, value, frame)
+
+    def add_frame(self, frame):
+        for slot_name, slot in frame.own_slots.items():
+            self.add_slot(slot_name, slot, frame)
+
+    def discard_frame(self, frame):
+        for slot_name, slot in frame.own_slots.items():
+            self.discard_slot(slot_name, slot, frame)
+
+    def lookup(self, slot_name: str, value):
+        return self.postings.get(slot_name, {}).get(value, {}).keys()
+
+    def values(self, slot_name: str) -> dict:
+        return self.postings.get(slot_name, {})
+
+    def count(self, slot_name: str, value) -> int:
+        return len(self.postings.get(slot_name, {}).get(value, ()))
+
+    def distinct(self, slot_name: str) -> int:
+        return len(self.postings.get(slot_name, ()))
+
+    def size(self, slot_name: str) -> int:
+        return self.sizes.get(slot_name, 0)
+
+    def is_number(self, slot_name: str) -> bool:
+        return slot_name in self.number_slots
+
+    def is_complete(self, slot_name: str) -> bool:
+        return slot_name not in self.computed_slots
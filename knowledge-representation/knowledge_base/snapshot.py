@@ -0,0 +1,250 @@
+import gc
+import io
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from knowledge_base.frame import Frame, Slot, Names
+from knowledge_base.reasoning.spoilage import FoodSpoilage, Lifespan
+
+# Layout: header, then sections of flat arrays. Every name, slot name and string value is stored once in
+# the string table and referred to by index; frames, slots and values are parallel arrays whose ranges
+# are delimited by offset arrays, so loading is a run of memoryview casts over one mapped file, each
+# unpacked in a single call rather than element by element.
+MAGIC = b'KRLS'
+VERSION = 1
+HEADER = struct.Struct('<4sHBxqQQQQ')
+
+FRAME_TYPES = [Frame.CLASS, Frame.INSTANCE]
+PLAIN, LIFESPAN = 0, 1
+NONE, STR, INT, FLOAT, BIG_INT = range(5)
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class SnapshotError(RuntimeError):
+    pass
+
+
+class Writer:
+    def __init__(self, day: int = 0):
+        self.day = day
+        self.strings = {}
+        self.frame_names = array('I')
+        self.frame_types = array('B')
+        self.super_offsets = array('I', [0])
+        self.super_ids = array('I')
+        self.sub_offsets = array('I', [0])
+        self.sub_ids = array('I')
+        self.slot_offsets = array('I', [0])
+        self.slot_names = array('I')
+        self.slot_kinds = array('B')
+        self.value_offsets = array('I', [0])
+        self.facet_offsets = array('I', [0])
+        self.value_tags = array('B')
+        self.value_data = array('q')
+
+    def string(self, text: str) -> int:
+        index = self.strings.get(text)
+        if index is None:
+            index = len(self.strings)
+            self.strings[text] = index
+        return index
+
+    def value(self, value):
+        if value is None:
+            self.value_tags.append(NONE)
+            self.value_data.append(0)
+        elif isinstance(value, str):
+            self.value_tags.append(STR)
+            self.value_data.append(self.string(value))
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            self.value_tags.append(STR)
+            self.value_data.append(self.string(str(value)))
+        elif isinstance(value, float):
+            self.value_tags.append(FLOAT)
+            self.value_data.append(struct.unpack('<q', struct.pack('<d', value))[0])
+        elif INT64_MIN <= value <= INT64_MAX:
+            self.value_tags.append(INT)
+            self.value_data.append(value)
+        else:
+            self.value_tags.append(BIG_INT)
+            self.value_data.append(self.string(str(value)))
+
+    def slot(self, name: str, slot: Slot):
+        self.slot_names.append(self.string(name))
+        if isinstance(slot, Lifespan):
+            self.slot_kinds.append(LIFESPAN)
+            self.value(slot.lifespan)
+            self.value(slot.start)
+        else:
+            self.slot_kinds.append(PLAIN)
+            for value in slot.values:
+                self.value(value)
+        self.value_offsets.append(len(self.value_tags))
+        for facet in slot.facets:
+            self.value(facet)
+        self.facet_offsets.append(len(self.value_tags))
+
+    def frame(self, frame: Frame):
+        self.frame_names.append(self.string(frame.name))
+        self.frame_types.append(FRAME_TYPES.index(frame.type))
+        self.super_ids.extend(self.string(name) for name in frame.superclasses)
+        self.super_offsets.append(len(self.super_ids))
+        self.sub_ids.extend(self.string(name) for name in frame.subclasses)
+        self.sub_offsets.append(len(self.sub_ids))
+        for name, slot in frame.own_slots.items():
+            self.slot(name, slot)
+        self.slot_offsets.append(len(self.slot_names))
+
+    def save(self, path: str):
+        with open(path, 'wb') as stream:
+            self.write(stream)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+    def write(self, stream):
+        encoded = [text.encode() for text in self.strings]
+        string_offsets = array('Q', [0])
+        total = 0
+        for data in encoded:
+            total += len(data)
+            string_offsets.append(total)
+
+        sections = [string_offsets, self.frame_names, self.frame_types, self.super_offsets, self.super_ids,
+                    self.sub_offsets, self.sub_ids, self.slot_offsets, self.slot_names, self.slot_kinds,
+                    self.value_offsets, self.facet_offsets, self.value_tags, self.value_data]
+        stream.write(HEADER.pack(MAGIC, VERSION, sys.byteorder == 'little', self.day, len(self.strings),
+                                 len(self.frame_names), len(self.slot_names), len(self.value_tags)))
+        for section in sections:
+            stream.write(struct.pack('<Q', len(section)))
+        stream.write(struct.pack('<Q', total))
+        for section in sections:
+            stream.write(section.tobytes())
+        for data in encoded:
+            stream.write(data)
+
+
+def capture(kb) -> Writer:
+    # everything a snapshot needs, copied into flat arrays so that writing it out can happen later
+    if kb.pending:
+        kb.resolve()
+    rule = spoilage(kb)
+    writer = Writer(rule.schedule.day if rule is not None else 0)
+    for frame in kb.frames.values():
+        writer.frame(frame)
+    return writer
+
+
+def save(kb, path: str):
+    capture(kb).save(path)
+
+
+def spoilage(kb):
+    for rule in kb.rules:
+        if isinstance(rule, FoodSpoilage):
+            return rule
+    return None
+
+
+SECTION_CODES = ['Q', 'I', 'B', 'I', 'I', 'I', 'I', 'I', 'I', 'B', 'I', 'I', 'B', 'q']
+
+
+def read_sections(view, little_endian: bool):
+    offset = HEADER.size
+    lengths = struct.unpack_from(f'<{len(SECTION_CODES) + 1}Q', view, offset)
+    offset += 8 * len(lengths)
+
+    sections = []
+    for code, length in zip(SECTION_CODES, lengths):
+        size = array(code).itemsize * length
+        if little_endian == (sys.byteorder == 'little'):
+            sections.append(view[offset:offset + size].cast(code).tolist())
+        else:
+            section = array(code, view[offset:offset + size].tobytes())
+            section.byteswap()
+            sections.append(section.tolist())
+        offset += size
+    return sections, view[offset:offset + lengths[-1]]
+
+
+def decode(tag: int, data: int, strings):
+    if tag == FLOAT:
+        return struct.unpack('<d', struct.pack('<q', data))[0]
+    return int(strings[data])
+
+
+def copy(kb, into):
+    # kb restored into another (empty) knowledge base, through an in-memory snapshot
+    stream = io.BytesIO()
+    capture(kb).write(stream)
+    return restore(memoryview(stream.getvalue()), into)
+
+
+def load(path: str, kb):
+    with open(path, 'rb') as stream:
+        mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    # a load only allocates, and a cyclic collection every few thousand new frames would dominate it
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return restore(view, kb)
+    finally:
+        if collecting:
+            gc.enable()
+        view.release()
+        mapped.close()
+
+
+def restore(view, kb):
+    magic, version, little_endian, day, _, frame_count, _, _ = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise SnapshotError(f'not a version {VERSION} knowledge base snapshot')
+
+    (string_offsets, frame_names, frame_types, super_offsets, super_ids, sub_offsets, sub_ids, slot_offsets,
+     slot_names, slot_kinds, value_offsets, facet_offsets, value_tags, value_data), blob = \
+        read_sections(view, bool(little_endian))
+
+    blob = bytes(blob)
+    strings = [blob[string_offsets[i]:string_offsets[i + 1]].decode() for i in range(len(string_offsets) - 1)]
+
+    values = [strings[data] if tag == STR else data if tag == INT else None if tag == NONE else decode(tag, data, strings)
+              for tag, data in zip(value_tags, value_data)]
+
+    rule = spoilage(kb)
+    if rule is not None:
+        rule.schedule.day = day
+
+    frames = []
+    lifespans = []
+    for f in range(frame_count):
+        slots = {}
+        for s in range(slot_offsets[f], slot_offsets[f + 1]):
+            start, end = facet_offsets[s], value_offsets[s + 1]
+            facets = values[end:facet_offsets[s + 1]]
+            if slot_kinds[s] == LIFESPAN:
+                lifespans.append((len(frames), strings[slot_names[s]], values[start:end], facets))
+            else:
+                slots[strings[slot_names[s]]] = Slot(values[start:end], facets)
+
+        frame = Frame(FRAME_TYPES[frame_types[f]], strings[frame_names[f]],
+                      {strings[i] for i in super_ids[super_offsets[f]:super_offsets[f + 1]]}, slots)
+        frame.subclasses = Names(strings[i] for i in sub_ids[sub_offsets[f]:sub_offsets[f + 1]])
+        frames.append(frame)
+
+    for frame in frames:
+        kb.index(frame)
+    # numbers come back typed; this resolves the values naming frames
+    kb.retype(frames)
+    for frame in kb.topological(frames):
+        for super_name in frame.superclasses:
+            kb.link(frame, super_name)
+
+    for f, name, (lifespan, start), facets in lifespans:
+        if rule is not None:
+            rule.restore(frames[f], lifespan, start, facets)
+        else:
+            frames[f].replace_slot(name, Slot(max(lifespan - (day - start), 0), facets))
+    return kb
@@ -0,0 +1,97 @@
+import threading
+from contextlib import contextmanager
+
+from knowledge_base import snapshot, wal
+
+
+class Journal:
+    # Stands in for kb.wal on the copy being written: keeps the batch's records for the other copy and
+    # passes them on to the durable log, if the knowledge base has one.
+    def __init__(self, log=None):
+        self.records: [bytes] = []
+        self.log = log
+
+    def append(self, record: bytes):
+        self.records.append(record)
+        if self.log is not None:
+            self.log.append(record)
+
+
+class Versions:
+    # Snapshot isolation for one writer and any number of reader threads, by keeping two copies of the
+    # knowledge base (left-right). Readers use whichever copy is published, and a writer applies its batch
+    # of TELLs to the other one, then publishes it with a single swap: a reader sees every TELL of a
+    # batch, daemons included, or none. The batch's log records are replayed on the copy just retired once
+    # its last reader has left, at the start of the next batch, so a writer waits for old readers but
+    # readers never wait for a writer. Memory and write work are doubled; reads take a lock only to
+    # register on a copy.
+    def __init__(self, kb):
+        self.log = kb.wal
+        kb.wal = None
+        self.copies = [kb, snapshot.copy(kb, type(kb)(type(rule) for rule in kb.rules))]
+        for class_name, columns in kb.columns.columns.items():
+            for slot_name in columns:
+                self.copies[1].columnar(class_name, slot_name)
+        if kb.metrics is not None:
+            # both copies count into the same metrics; replaying a batch on the standby is not counted again
+            self.copies[1].instrument(kb.metrics)
+        self.active = 0
+        self.version = 0
+        self.readers = [0, 0]
+        self.lock = threading.Lock()
+        self.left = threading.Condition(self.lock)
+        self.writing = threading.Lock()
+        self.pending: [bytes] = []
+
+    @contextmanager
+    def read(self):
+        with self.lock:
+            active = self.active
+            self.readers[active] += 1
+        try:
+            yield self.copies[active]
+        finally:
+            with self.lock:
+                self.readers[active] -= 1
+                if not self.readers[active]:
+                    self.left.notify_all()
+
+    def write(self, batch):
+        # batch(kb) makes the TELLs; its result is returned once they are published
+        with self.writing:
+            standby = 1 - self.active
+            kb = self.copies[standby]
+            with self.lock:
+                self.left.wait_for(lambda: not self.readers[standby])
+            if kb.metrics is None:
+                wal.apply(kb, map(wal.unframe, self.pending))
+            else:
+                # the batch was counted when it was written to the other copy
+                with kb.metrics.paused():
+                    wal.apply(kb, map(wal.unframe, self.pending))
+
+            journal = Journal(self.log)
+            if self.log is not None:
+                # a compaction started by this batch captures the copy being written
+                self.log.kb = kb
+            kb.wal = journal
+            try:
+                return batch(kb)
+            finally:
+                kb.wal = None
+                # whatever ran before a failure is published too: the durable log already holds it
+                with self.lock:
+                    self.active = standby
+                    self.version += 1
+                self.pending = journal.records
+
+    @property
+    def kb(self):
+        # the published copy, for reading outside read() where nothing may be written concurrently
+        return self.copies[self.active]
+
+    def close(self):
+        with self.writing:
+            if self.log is not None:
+                self.log.kb = self.copies[self.active]
+                self.copies[self.active].wal = self.log
@@ -0,0 +1,315 @@
+import os
+import struct
+import threading
+import time
+import zlib
+
+from knowledge_base.frame import Frame, Slot
+from knowledge_base import snapshot
+
+# A log directory holds numbered segments (wal.000001, ...) of framed records and at most one finished
+# checkpoint (checkpoint.000004), a snapshot of the knowledge base as of the end of that segment.
+# Recovery loads the checkpoint and replays only the segments after it.
+MAGIC = b'KRLW'
+VERSION = 1
+SEGMENT_HEADER = struct.Struct('<4sH')
+RECORD_HEADER = struct.Struct('<II')
+SEGMENT = 'wal.'
+CHECKPOINT = 'checkpoint.'
+
+# The KnowledgeBase methods a record can replay, by op code. New ops go on the end.
+OPS = ['add_frame', 'delete_frame', 'update_type', 'update_name', 'add_superclass', 'remove_superclass',
+       'add_subclass', 'remove_subclass', 'add_slot', 'update_slot', 'delete_slot', 'add_value',
+       'delete_value', 'add_facet', 'delete_facet', 'update_value', 'begin_bulk', 'end_bulk', 'add_to_column']
+OP_CODES = {name: code for code, name in enumerate(OPS)}
+
+NONE, STR, INT, FLOAT, BIG_INT, FRAME, LIST = range(7)
+FRAME_TYPES = [Frame.CLASS, Frame.INSTANCE]
+LENGTH = struct.Struct('<I')
+INT64 = struct.Struct('<q')
+DOUBLE = struct.Struct('<d')
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class WalError(RuntimeError):
+    pass
+
+
+class Sync:
+    # ALWAYS writes and fsyncs every record before the TELL returns. GROUP buffers records and commits
+    # them together, with one fsync, once group_size are waiting or the oldest has waited interval
+    # seconds. NEVER commits groups the same way but leaves flushing to disk to the operating system.
+    ALWAYS = 'ALWAYS'
+    GROUP = 'GROUP'
+    NEVER = 'NEVER'
+
+
+def encode_value(out: bytearray, value):
+    if value is None:
+        out.append(NONE)
+    elif isinstance(value, str):
+        data = value.encode()
+        out.append(STR)
+        out += LENGTH.pack(len(data))
+        out += data
+    elif isinstance(value, Frame):
+        encode_frame(out, value)
+    elif isinstance(value, (list, tuple, set)):
+        out.append(LIST)
+        out += LENGTH.pack(len(value))
+        for item in value:
+            encode_value(out, item)
+    elif isinstance(value, bool) or not isinstance(value, (int, float)):
+        encode_value(out, str(value))
+    elif isinstance(value, float):
+        out.append(FLOAT)
+        out += DOUBLE.pack(value)
+    elif INT64_MIN <= value <= INT64_MAX:
+        out.append(INT)
+        out += INT64.pack(value)
+    else:
+        data = str(value).encode()
+        out.append(BIG_INT)
+        out += LENGTH.pack(len(data))
+        out += data
+
+
+def encode_frame(out: bytearray, frame: Frame):
+    out.append(FRAME)
+    out.append(FRAME_TYPES.index(frame.type))
+    encode_value(out, frame.name)
+    encode_value(out, sorted(frame.superclasses))
+    out += LENGTH.pack(len(frame.own_slots))
+    for name, slot in frame.own_slots.items():
+        encode_value(out, name)
+        encode_value(out, slot.values)
+        encode_value(out, slot.facets)
+
+
+def decode_value(data, offset: int):
+    tag = data[offset]
+    offset += 1
+    if tag == STR or tag == BIG_INT:
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += 4
+        text = data[offset:offset + length].decode()
+        return (text if tag == STR else int(text)), offset + length
+    if tag == NONE:
+        return None, offset
+    if tag == INT:
+        return INT64.unpack_from(data, offset)[0], offset + 8
+    if tag == FLOAT:
+        return DOUBLE.unpack_from(data, offset)[0], offset + 8
+    if tag == LIST:
+        (count,) = LENGTH.unpack_from(data, offset)
+        offset += 4
+        items = []
+        for _ in range(count):
+            item, offset = decode_value(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == FRAME:
+        return decode_frame(data, offset)
+    raise WalError(f'Unknown value tag {tag}')
+
+
+def decode_frame(data, offset: int):
+    frame_type = FRAME_TYPES[data[offset]]
+    name, offset = decode_value(data, offset + 1)
+    superclasses, offset = decode_value(data, offset)
+    (count,) = LENGTH.unpack_from(data, offset)
+    offset += 4
+    slots = {}
+    for _ in range(count):
+        slot_name, offset = decode_value(data, offset)
+        values, offset = decode_value(data, offset)
+        facets, offset = decode_value(data, offset)
+        slots[slot_name] = Slot(values, facets)
+    return Frame(frame_type, name, set(superclasses), slots), offset
+
+
+def encode(op: str, args) -> bytes:
+    payload = bytearray()
+    payload.append(OP_CODES[op])
+    encode_value(payload, args)
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode(payload) -> (str, list):
+    args, _ = decode_value(payload, 1)
+    return OPS[payload[0]], args
+
+
+def records(path: str):
+    # A record cut short or failing its checksum can only be the tail of a write the process died in the
+    # middle of; it was never acknowledged, so replay stops there.
+    with open(path, 'rb') as stream:
+        data = stream.read()
+    magic, version = SEGMENT_HEADER.unpack_from(data, 0) if len(data) >= SEGMENT_HEADER.size else (None, None)
+    if magic != MAGIC or version != VERSION:
+        raise WalError(f'{path} is not a version {VERSION} write-ahead log segment')
+
+    offset = SEGMENT_HEADER.size
+    while offset + RECORD_HEADER.size <= len(data):
+        length, checksum = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        yield decode(payload)
+        offset = start + length
+
+
+def replay(kb, path: str) -> int:
+    return apply(kb, records(path))
+
+
+def apply(kb, operations) -> int:
+    count = 0
+    for op, args in operations:
+        getattr(kb, op)(*args)
+        count += 1
+    return count
+
+
+def unframe(record: bytes) -> (str, list):
+    # the inverse of encode, for a record that never went through a segment file
+    return decode(record[RECORD_HEADER.size:])
+
+
+def numbered(directory: str, prefix: str) -> [int]:
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            numbers.append(int(name[len(prefix):]))
+    return sorted(numbers)
+
+
+class WriteAheadLog:
+    # Every successful TELL on the attached knowledge base is appended as one record (op code plus the
+    # method's arguments), so replay calls the KnowledgeBase methods directly and never tokenizes or
+    # parses. Derived state (links, inherited slots, daemon effects) is not logged; replay re-derives it.
+    # Under GROUP and NEVER a flusher thread commits a group once its oldest record has waited interval
+    # seconds, so the last TELLs before a quiet spell are not left in the buffer.
+    def __init__(self, directory: str, sync: str = Sync.GROUP, group_size: int = 64, interval: float = 0.05,
+                 compact_bytes: int = 64 << 20):
+        self.directory = directory
+        self.sync = sync
+        self.group_size = 1 if sync == Sync.ALWAYS else max(group_size, 1)
+        self.interval = interval
+        self.compact_bytes = compact_bytes
+        self.kb = None
+        self.stream = None
+        self.segment = 0
+        self.buffer = bytearray()
+        self.buffered = 0
+        self.oldest = 0.0
+        self.size = 0
+        self.compaction = None
+        # held by the TELL thread around appends and by the flusher around its commits
+        self.lock = threading.RLock()
+        self.closed = threading.Event()
+        self.flusher = None
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, prefix: str, number: int) -> str:
+        return os.path.join(self.directory, f'{prefix}{number:06d}')
+
+    def open(self, kb_class, rules) -> object:
+        checkpoints = numbered(self.directory, CHECKPOINT)
+        covered = checkpoints[-1] if checkpoints else 0
+        if checkpoints:
+            kb = kb_class.load(self.path(CHECKPOINT, covered), rules)
+        else:
+            kb = kb_class(rules)
+
+        segments = numbered(self.directory, SEGMENT)
+        for number in segments:
+            if number > covered:
+                replay(kb, self.path(SEGMENT, number))
+        self.kb = kb
+        self.start_segment(max(segments[-1] if segments else 0, covered) + 1)
+        kb.wal = self
+        if self.group_size > 1 and self.interval > 0:
+            self.flusher = threading.Thread(target=self.flush, name='wal-flusher', daemon=True)
+            self.flusher.start()
+        return kb
+
+    def flush(self):
+        while not self.closed.wait(self.interval):
+            with self.lock:
+                if self.buffered and time.monotonic() - self.oldest >= self.interval and self.stream is not None:
+                    self.commit()
+
+    def start_segment(self, number: int):
+        if self.stream is not None:
+            self.stream.close()
+        self.segment = number
+        self.stream = open(self.path(SEGMENT, number), 'ab')
+        self.stream.write(SEGMENT_HEADER.pack(MAGIC, VERSION))
+        self.size = 0
+        self.commit()
+
+    def append(self, record: bytes):
+        with self.lock:
+            if not self.buffered:
+                self.oldest = time.monotonic()
+            self.buffer += record
+            self.buffered += 1
+            self.size += len(record)
+            if self.buffered >= self.group_size or time.monotonic() - self.oldest >= self.interval:
+                self.commit()
+            if self.size >= self.compact_bytes and not self.kb.bulk_depth:
+                self.compact()
+
+    def commit(self):
+        with self.lock:
+            if self.buffer:
+                self.stream.write(self.buffer)
+                self.buffer = bytearray()
+                self.buffered = 0
+            self.stream.flush()
+            if self.sync != Sync.NEVER:
+                os.fsync(self.stream.fileno())
+
+    def compact(self, wait: bool = False):
+        # The knowledge base is captured here, between two TELLs, into a new segment boundary; writing
+        # the checkpoint out and deleting the segments it covers happen on a background thread.
+        if self.compaction is not None and self.compaction.is_alive():
+            if wait:
+                self.compaction.join()
+            return
+        self.commit()
+        sealed = self.segment
+        self.start_segment(sealed + 1)
+        writer = snapshot.capture(self.kb)
+        self.compaction = threading.Thread(target=self.checkpoint, args=(writer, sealed),
+                                           name='wal-compaction')
+        self.compaction.start()
+        if wait:
+            self.compaction.join()
+
+    def checkpoint(self, writer, sealed: int):
+        path = self.path(CHECKPOINT, sealed)
+        writer.save(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        for number in numbered(self.directory, CHECKPOINT):
+            if number < sealed:
+                os.remove(self.path(CHECKPOINT, number))
+        for number in numbered(self.directory, SEGMENT):
+            if number <= sealed:
+                os.remove(self.path(SEGMENT, number))
+
+    def close(self):
+        self.closed.set()
+        if self.flusher is not None:
+            self.flusher.join()
+        if self.compaction is not None:
+            self.compaction.join()
+        if self.stream is not None:
+            self.commit()
+            self.stream.close()
+            self.stream = None
+        if self.kb is not None:
+            self.kb.wal = None
+
@@ -1,14 +1,81 @@
+import argparse
+
 from knowledge_base.kb import KnowledgeBase
+from knowledge_base.shards import ShardedKnowledgeBase
 from knowledge_base.input.interpreter import interpret
+from knowledge_base.input.loader import load_file
+from knowledge_base.input.cache import statement_cache, DEFAULT_CACHE_SIZE
+from knowledge_base.input.server import serve, DEFAULT_HOST, DEFAULT_PORT
+from knowledge_base.wal import Sync
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--load', metavar='FILE', action='append', default=[],
+                        help='apply the KRL statements in FILE before starting the prompt')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='processes parsing --load files in parallel (0 parses them in this process)')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help='number of parsed statement templates to keep (0 disables the cache)')
+    parser.add_argument('--wal', metavar='DIR',
+                        help='recover the knowledge base from the write-ahead log in DIR and log every TELL to it')
+    parser.add_argument('--sync', choices=[Sync.ALWAYS, Sync.GROUP, Sync.NEVER], default=Sync.GROUP,
+                        type=str.upper, help='when logged TELLs are fsynced to disk')
+    parser.add_argument('--group-size', type=int, default=64,
+                        help='records committed together under --sync group')
+    parser.add_argument('--shards', type=int, default=0,
+                        help='partition the knowledge base across this many local processes (0 keeps it in this one)')
+    parser.add_argument('--serve', action='store_true',
+                        help='answer KRL requests over TCP, one per line, instead of starting the prompt')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='address --serve listens on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='port --serve listens on (0 picks one)')
+    parser.add_argument('--readers', type=int, default=0,
+                        help='threads answering ASKs under --serve, each against a consistent snapshot of the '
+                             'knowledge base while TELLs are applied (0 runs everything on the event loop)')
+    parser.add_argument('--metrics', action='store_true',
+                        help='count and time every operation, for ASK STATS')
+    args = parser.parse_args()
+    if args.shards and (args.wal or args.readers):
+        parser.error('--shards cannot be combined with --wal or --readers')
+    return args
+
+
+def repl(kb: KnowledgeBase):
+    try:
+        line = input("> ")
+        while line.upper() != 'EXIT':
+            interpret(kb, line)
+            line = input("> ")
+    except EOFError:
+        pass
 
 
 def main():
-    kb = KnowledgeBase()
-    line = input("> ").upper()
+    args = parse_args()
+    if args.wal:
+        kb = KnowledgeBase.open(args.wal, sync=args.sync, group_size=args.group_size)
+    elif args.shards:
+        kb = ShardedKnowledgeBase(args.shards)
+    else:
+        kb = KnowledgeBase()
+    statement_cache.resize(args.cache_size)
+    if args.metrics:
+        kb.instrument()
+    log = kb.wal
+
+    try:
+        for path in args.load:
+            load_file(kb, path, workers=args.parse_workers)
 
-    while line != 'EXIT':
-        interpret(kb, line)
-        line = input("> ").upper()
+        if args.serve:
+            serve(kb, args.host, args.port, readers=args.readers)
+        else:
+            repl(kb)
+    finally:
+        if log is not None:
+            log.close()
+        if args.shards:
+            kb.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+import contextlib
+import io
+
+from knowledge_base.input.interpreter import interpret
+
+# A small FOOD knowledge base in KRL: the calendar, classes with slots of several facets, instances
+# with own and inherited slots, superclass edits, a rename, a deletion and three day ticks.
+SCRIPT = [
+    'tell add class calendar {} [current_day:{day}]',
+    'tell add instance my_calendar {calendar} []',
+    'tell add class day {} [number:{number}]',
+    'tell add class food {} [lifespan:{number}, start_day:{day}, spoilage_day:{day}, spoiled:]',
+    'tell add class apple {food} []',
+    'tell add class pear {food} [lifespan:2{number}]',
+    'tell add class colour {} []',
+    'tell add instance day_0 {day} [number:0{number}]',
+    'tell add instance day_1 {day} [number:1{number}]',
+    'tell add instance day_2 {day} [number:2{number}]',
+    'tell add instance day_3 {day} [number:3{number}]',
+    'tell update my_calendar update slot current_day:day_0',
+    'tell add instance apple1 {apple} [weight:120{number}, grade:a]',
+    'tell add instance apple2 {apple} [weight:90{number}]',
+    'tell add instance pear1 {pear} []',
+    'tell add instance plum1 {food} [lifespan:9{number}]',
+    'tell update apple1 update slot lifespan:1',
+    'tell update apple2 update slot lifespan:3',
+    'tell update apple2 update slot lifespan:2',
+    'tell update plum1 add super colour',
+    'tell update plum1 delete super colour',
+    'tell update plum1 name to damson1',
+    'tell update apple2 update slot weight:95',
+    'tell add instance bruised {apple} [weight:1{number}]',
+    'tell delete bruised',
+    'tell update my_calendar update slot current_day:day_1',
+    'tell update my_calendar update slot current_day:day_2',
+    'tell update my_calendar update slot current_day:day_3',
+]
+
+
+def tell(kb, statements=SCRIPT):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for statement in statements:
+            interpret(kb, statement)
+
+
+def state(kb) -> dict:
+    # everything a reader can see of each frame, inherited slots included, in comparable form
+    return {frame.name: (frame.type, sorted(frame.superclasses), sorted(frame.subclasses),
+                         {name: (list(slot.values), list(slot.facets)) for name, slot in frame.slots.items()})
+            for frame in [*kb.classes(), *kb.instances()]}
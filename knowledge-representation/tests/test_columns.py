@@ -0,0 +1,54 @@
+import shutil
+import tempfile
+import unittest
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.frame import Frame, Slot
+
+
+def values(kb: KnowledgeBase, slot_name: str) -> dict:
+    return {frame.name: list(frame.slots[slot_name].values) for frame in kb.instances() if slot_name in frame.slots}
+
+
+class AddToColumnTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, columnar: bool) -> KnowledgeBase:
+        kb = KnowledgeBase.open(self.directory)
+        kb.add_frame(Frame(Frame.CLASS, 'P', set(), {'COUNT': Slot(None, ['NUMBER'])}))
+        kb.add_frame(Frame(Frame.INSTANCE, 'A', {'P'}, {'COUNT': Slot('5', ['NUMBER'])}))
+        kb.add_frame(Frame(Frame.INSTANCE, 'B', {'P'}, {'COUNT': Slot('5', [])}))
+        kb.add_frame(Frame(Frame.INSTANCE, 'C', {'P'}, {'COUNT': Slot('1.5', ['NUMBER'])}))
+        kb.add_frame(Frame(Frame.INSTANCE, 'D', {'P'}, {'COUNT': Slot('MANY', ['NUMBER'])}))
+        kb.add_frame(Frame(Frame.INSTANCE, 'E', {'P'}, {}))
+        if columnar:
+            kb.columnar('P', 'COUNT')
+        return kb
+
+    def assert_replay_matches(self, columnar: bool):
+        kb = self.build(columnar)
+        kb.add_to_column('P', 'COUNT', -1)
+        live = values(kb, 'COUNT')
+        kb.wal.close()
+        replayed = KnowledgeBase.open(self.directory)
+        self.assertEqual(values(replayed, 'COUNT'), live)
+        replayed.wal.close()
+        return live
+
+    def test_replay_matches_columnar(self):
+        live = self.assert_replay_matches(columnar=True)
+        self.assertEqual(live['A'], [4])
+        self.assertEqual(live['B'], ['5'])
+        self.assertEqual(live['C'], [0.5])
+        self.assertEqual(live['D'], ['MANY'])
+
+    def test_replay_matches_frame_by_frame(self):
+        self.assert_replay_matches(columnar=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.input.cache import StatementCache
+from knowledge_base.input.loader import load_file, statement_chunks
+from tests.fixtures import SCRIPT, state
+
+
+class ParallelLoadTest(unittest.TestCase):
+    def setUp(self):
+        descriptor, self.path = tempfile.mkstemp(suffix='.krl')
+        with os.fdopen(descriptor, 'w') as script:
+            script.write('\n'.join(SCRIPT) + '\n')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def load(self, **options) -> KnowledgeBase:
+        kb = KnowledgeBase()
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(load_file(kb, self.path, cache=StatementCache(), **options), len(SCRIPT))
+        return kb
+
+    def test_parallel_matches_serial(self):
+        expected = state(self.load())
+        # chunks this small cut the script at nearly every statement
+        for chunk_size in (64, 1 << 20):
+            self.assertEqual(state(self.load(workers=2, chunk_size=chunk_size)), expected)
+
+    def test_chunks_end_where_statements_start(self):
+        text = '\n'.join(SCRIPT) + '\n'
+        for chunk_size in (1, 17, 64, 1 << 20):
+            chunks = list(statement_chunks(io.StringIO(text), chunk_size))
+            self.assertEqual(''.join(chunks), text)
+            for chunk in chunks:
+                self.assertRegex(chunk, r'^(?i:tell|ask)\b')
+
+
+if __name__ == '__main__':
+    unittest.main()
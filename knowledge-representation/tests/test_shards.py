@@ -0,0 +1,84 @@
+import unittest
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.shards import ShardedKnowledgeBase
+from knowledge_base.frame import Frame, Slot
+from knowledge_base.query import Condition
+from tests.fixtures import tell, state
+
+
+def produce():
+    yield Frame(Frame.CLASS, 'PRODUCE', set(), {'WEIGHT': Slot(None, ['NUMBER'])})
+    for i in range(4):
+        yield Frame(Frame.CLASS, f'VARIETY{i}', {'PRODUCE'}, {})
+    for i in range(40):
+        yield Frame(Frame.INSTANCE, f'ITEM{i}', {f'VARIETY{i % 4}'}, {'WEIGHT': Slot(str(i * 10), ['NUMBER'])})
+
+
+class ShardedAnswersTest(unittest.TestCase):
+    # a sharded knowledge base answers as a single one would, whichever shard holds each frame
+    def setUp(self):
+        self.single = KnowledgeBase()
+        self.sharded = ShardedKnowledgeBase(3)
+        self.addCleanup(self.sharded.close)
+
+    def both(self, method: str, *args) -> tuple:
+        # the single knowledge base keeps the frames it is given, so both get only names and values
+        return getattr(self.single, method)(*args), getattr(self.sharded, method)(*args)
+
+    def test_script(self):
+        tell(self.single)
+        tell(self.sharded)
+        self.assertEqual(state(self.sharded), state(self.single))
+
+    def test_add_frames_and_query(self):
+        self.assertEqual(self.sharded.add_frames(produce()), self.single.add_frames(produce()))
+        conditions = [Condition('WEIGHT', '<', '100')]
+        single, sharded = self.both('instances_of', 'PRODUCE', conditions)
+        self.assertEqual(sorted(frame.name for frame in sharded), sorted(frame.name for frame in single))
+        for name in ('PRODUCE', 'VARIETY2', 'ITEM7'):
+            single, sharded = self.both('get_frame', name)
+            self.assertEqual(state_of(sharded), state_of(single))
+        self.assertEqual(self.both('typeof', 'ITEM7', 'PRODUCE'), (True, True))
+        self.assertEqual(self.both('typeof', 'ITEM7', 'VARIETY0'), (False, False))
+
+    def test_update_slot(self):
+        self.single.add_frames(produce())
+        self.sharded.add_frames(produce())
+        self.both('update_slot', 'ITEM30', 'WEIGHT', '5')
+        single, sharded = self.both('find', 'WEIGHT', '5')
+        self.assertEqual([frame.name for frame in sharded], [frame.name for frame in single])
+        self.assertEqual(state(self.sharded), state(self.single))
+
+    def test_rename_across_shards(self):
+        self.single.add_frames(produce())
+        self.sharded.add_frames(produce())
+        source = self.sharded.owner('ITEM1')
+        new_name = next(f'MOVED{i}' for i in range(100) if self.sharded.owner(f'MOVED{i}') != source)
+        self.both('update_name', 'ITEM1', new_name)
+        self.assertFalse(self.sharded.has_frame('ITEM1'))
+        self.assertEqual(self.both('typeof', new_name, 'VARIETY1'), (True, True))
+        self.assertEqual(state(self.sharded), state(self.single))
+
+
+def state_of(frame: Frame) -> tuple:
+    return frame.type, sorted(frame.superclasses), sorted(frame.subclasses), \
+        {name: (list(slot.values), list(slot.facets)) for name, slot in frame.slots.items()}
+
+
+class ShardedMetricsTest(unittest.TestCase):
+    def test_instrument_then_uninstrument(self):
+        with ShardedKnowledgeBase(2) as kb:
+            metrics = kb.instrument()
+            kb.add_frame(Frame(Frame.CLASS, 'FRUIT', set(), {'WEIGHT': Slot(None, ['NUMBER'])}))
+            kb.get_frame('FRUIT')
+            self.assertEqual(metrics.report()['add_frame']['count'], 1)
+            kb.uninstrument()
+            self.assertIsNone(kb.metrics)
+            self.assertNotIn('add_frame', vars(kb))
+            kb.get_frame('FRUIT')
+            self.assertEqual(metrics.report()['get_frame']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.snapshot import SnapshotError, copy
+from tests.fixtures import SCRIPT, tell, state
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'kb.snapshot')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_load_round_trip(self):
+        kb = KnowledgeBase()
+        tell(kb)
+        kb.save(self.path)
+        self.assertEqual(state(KnowledgeBase.load(self.path)), state(kb))
+
+    def test_spoilage_continues_after_load(self):
+        # stop before the last tick, with APPLE2 (LIFESPAN 2 from day 0) still one day from spoiling
+        kb = KnowledgeBase()
+        tell(kb, SCRIPT[:-2])
+        kb.save(self.path)
+        loaded = KnowledgeBase.load(self.path)
+        self.assertEqual(state(loaded), state(kb))
+        self.assertNotEqual(loaded.get_frame('APPLE2').slots['SPOILED'].values, ['YES'])
+        for each in (kb, loaded):
+            tell(each, SCRIPT[-2:])
+        self.assertEqual(state(loaded), state(kb))
+        self.assertEqual(loaded.get_frame('APPLE2').slots['SPOILED'].values, ['YES'])
+
+    def test_copy(self):
+        kb = KnowledgeBase()
+        tell(kb)
+        self.assertEqual(state(copy(kb, KnowledgeBase())), state(kb))
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as out:
+            out.write(b'\0' * 4096)
+        with self.assertRaises(SnapshotError):
+            KnowledgeBase.load(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
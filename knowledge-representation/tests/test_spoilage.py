@@ -0,0 +1,69 @@
+import contextlib
+import io
+import unittest
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.input.interpreter import interpret
+
+# the calendar and the FOOD classes the spoilage rules act on, on day 0
+PRELUDE = [
+    'tell add class calendar {} [current_day:{day}]',
+    'tell add instance my_calendar {calendar} []',
+    'tell add class day {} [number:{number}]',
+    'tell add class food {} [lifespan:{number}, start_day:{day}, spoilage_day:{day}, spoiled:]',
+    'tell add class apple {food} []',
+    'tell add instance day_0 {day} []',
+    'tell update my_calendar update slot current_day:day_0',
+]
+
+
+def knowledge_base(days: int) -> KnowledgeBase:
+    kb = KnowledgeBase()
+    tell(kb, *PRELUDE)
+    for day in range(1, days + 1):
+        tell(kb, f'tell add instance day_{day} {{day}} []', f'tell update day_{day} update slot number:{day}')
+    return kb
+
+
+def tell(kb: KnowledgeBase, *statements):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for statement in statements:
+            interpret(kb, statement)
+
+
+def tick(kb: KnowledgeBase, day: int):
+    tell(kb, f'tell update my_calendar update slot current_day:day_{day}')
+
+
+def spoiled(kb: KnowledgeBase, name: str) -> bool:
+    return kb.get_frame(name).slots['SPOILED'].values == ['YES']
+
+
+class SpoilageTest(unittest.TestCase):
+    def test_update_lifespan_twice(self):
+        kb = knowledge_base(days=8)
+        tell(kb, 'tell add instance apple1 {apple} []', 'tell update apple1 update slot lifespan:3')
+        tick(kb, 1)
+        tell(kb, 'tell update apple1 update slot lifespan:5')
+        self.assertEqual(kb.get_frame('APPLE1').slots['LIFESPAN'].values, [5])
+        for day in range(2, 6):
+            tick(kb, day)
+            self.assertFalse(spoiled(kb, 'APPLE1'), f'spoiled on day {day}')
+        tick(kb, 6)
+        self.assertTrue(spoiled(kb, 'APPLE1'))
+
+    def test_inline_and_inherited_lifespans_spoil(self):
+        kb = knowledge_base(days=3)
+        tell(kb, 'tell add class pear {food} [lifespan:2{number}]', 'tell add instance pear1 {pear} []',
+             'tell add instance apple1 {apple} [lifespan:3{number}]')
+        tick(kb, 1)
+        self.assertFalse(spoiled(kb, 'PEAR1'))
+        tick(kb, 2)
+        self.assertTrue(spoiled(kb, 'PEAR1'))
+        self.assertFalse(spoiled(kb, 'APPLE1'))
+        tick(kb, 3)
+        self.assertTrue(spoiled(kb, 'APPLE1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+import threading
+import unittest
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.frame import Frame
+from knowledge_base.versions import Versions
+from tests.fixtures import SCRIPT, tell, state
+
+
+class VersionsTest(unittest.TestCase):
+    def test_copies_converge(self):
+        kb = KnowledgeBase()
+        tell(kb, SCRIPT[:12])
+        versions = Versions(kb)
+        expected = KnowledgeBase()
+        tell(expected)
+        for statement in SCRIPT[12:]:
+            versions.write(lambda copy: tell(copy, [statement]))
+        self.assertEqual(state(versions.kb), state(expected))
+        versions.write(lambda copy: None)
+        self.assertEqual(state(versions.copies[0]), state(versions.copies[1]))
+
+    def test_reader_keeps_its_version(self):
+        versions = Versions(KnowledgeBase())
+        versions.write(lambda copy: copy.add_frame(Frame(Frame.CLASS, 'A', set(), {})))
+        reading = threading.Event()
+        done = threading.Event()
+        seen = []
+
+        def read():
+            with versions.read() as kb:
+                seen.append(sorted(kb.frames))
+                reading.set()
+                done.wait(5)
+                seen.append(sorted(kb.frames))
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        reading.wait(5)
+        versions.write(lambda copy: copy.add_frame(Frame(Frame.CLASS, 'B', set(), {})))
+        done.set()
+        reader.join()
+        self.assertEqual(seen, [['A'], ['A']])
+        with versions.read() as kb:
+            self.assertEqual(sorted(kb.frames), ['A', 'B'])
+
+    def test_failed_batch_publishes_what_ran(self):
+        versions = Versions(KnowledgeBase())
+
+        def batch(copy):
+            copy.add_frame(Frame(Frame.CLASS, 'A', set(), {}))
+            raise ValueError('bad statement')
+
+        with self.assertRaises(ValueError):
+            versions.write(batch)
+        self.assertIn('A', versions.kb.frames)
+        versions.write(lambda copy: copy.add_frame(Frame(Frame.CLASS, 'B', set(), {})))
+        self.assertEqual(sorted(versions.kb.frames), ['A', 'B'])
+
+    def test_logged_batches_recover(self):
+        directory = tempfile.mkdtemp()
+        try:
+            versions = Versions(KnowledgeBase.open(directory))
+            for statement in SCRIPT:
+                versions.write(lambda copy: tell(copy, [statement]))
+            expected = state(versions.kb)
+            versions.close()
+            versions.kb.wal.close()
+            recovered = KnowledgeBase.open(directory)
+            self.assertEqual(state(recovered), expected)
+            recovered.wal.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+class VersionsMetricsTest(unittest.TestCase):
+    def test_batches_counted_once(self):
+        kb = KnowledgeBase()
+        metrics = kb.instrument()
+        versions = Versions(kb)
+        for i in range(5):
+            versions.write(lambda copy: copy.add_frame(Frame(Frame.CLASS, f'C{i}', set(), {})))
+        self.assertEqual(metrics.report()['add_frame']['count'], 5)
+        self.assertEqual(len(versions.kb.frames), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
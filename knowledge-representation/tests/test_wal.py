@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from knowledge_base.kb import KnowledgeBase
+from knowledge_base.wal import Sync, SEGMENT, CHECKPOINT, numbered
+from tests.fixtures import tell, state
+
+
+class WriteAheadLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def round_trip(self, **options) -> dict:
+        kb = KnowledgeBase.open(self.directory, **options)
+        tell(kb)
+        expected = state(kb)
+        kb.wal.close()
+        recovered = KnowledgeBase.open(self.directory, **options)
+        self.assertEqual(state(recovered), expected)
+        recovered.wal.close()
+        return expected
+
+    def test_round_trip_always(self):
+        expected = self.round_trip(sync=Sync.ALWAYS)
+        self.assertEqual(expected['APPLE1'][3]['SPOILED'][0], ['YES'])
+        self.assertIn('DAMSON1', expected)
+        self.assertNotIn('BRUISED', expected)
+
+    def test_round_trip_group(self):
+        self.round_trip(sync=Sync.GROUP, group_size=8)
+
+    def test_round_trip_never(self):
+        self.round_trip(sync=Sync.NEVER, group_size=8)
+
+    def test_always_is_durable_without_close(self):
+        kb = KnowledgeBase.open(self.directory, sync=Sync.ALWAYS)
+        tell(kb)
+        recovered = KnowledgeBase.open(self.directory, sync=Sync.ALWAYS)
+        self.assertEqual(state(recovered), state(kb))
+        recovered.wal.close()
+        kb.wal.close()
+
+    def test_group_commits_after_interval_without_close(self):
+        kb = KnowledgeBase.open(self.directory, sync=Sync.GROUP, group_size=1000, interval=0.01)
+        tell(kb)
+        deadline = time.monotonic() + 2
+        while kb.wal.buffered and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(kb.wal.buffered, 0)
+        recovered = KnowledgeBase.open(self.directory, sync=Sync.GROUP)
+        self.assertEqual(state(recovered), state(kb))
+        recovered.wal.close()
+        kb.wal.close()
+
+    def test_compaction(self):
+        kb = KnowledgeBase.open(self.directory, compact_bytes=1 << 10)
+        tell(kb)
+        kb.wal.compact(wait=True)
+        expected = state(kb)
+        kb.wal.close()
+        checkpoints = numbered(self.directory, CHECKPOINT)
+        self.assertEqual(len(checkpoints), 1)
+        self.assertTrue(all(number > checkpoints[0] for number in numbered(self.directory, SEGMENT)))
+        recovered = KnowledgeBase.open(self.directory)
+        self.assertEqual(state(recovered), expected)
+        tell(recovered, ['tell update apple2 update slot weight:80'])
+        expected = state(recovered)
+        recovered.wal.close()
+        again = KnowledgeBase.open(self.directory)
+        self.assertEqual(state(again), expected)
+        again.wal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()